@@ -0,0 +1,52 @@
+"""Throughput of the streaming output stage for each output_format.
+
+Encodes 60 seconds of 24 kHz audio in engine-sized chunks and reports how
+many times faster than realtime each format runs on a single core.
+
+    uv run python benchmarks/bench_output_formats.py
+"""
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from local_tts.audio import create_encoder
+from local_tts.engines.base import SAMPLE_RATE, float32_to_int16
+
+FORMATS = [
+    "pcm_24000",
+    "pcm_16000",
+    "pcm_22050",
+    "pcm_44100",
+    "pcm_48000",
+    "ulaw_8000",
+    "alaw_8000",
+    "wav_16000",
+    "mp3_22050_32",
+    "mp3_44100_128",
+]
+SECONDS = 60
+CHUNK = 2400
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    audio = float32_to_int16((rng.standard_normal(SECONDS * SAMPLE_RATE) * 0.2).astype(np.float32))
+    chunks = [audio[i:i + CHUNK] for i in range(0, len(audio), CHUNK)]
+
+    print(f"{'format':<16}{'x realtime':>12}{'MB/s out':>12}")
+    for name in FORMATS:
+        try:
+            encoder = create_encoder(name)
+        except ValueError as e:
+            print(f"{name:<16}{'skipped':>12}  ({e})")
+            continue
+        start = time.perf_counter()
+        size = sum(len(encoder.encode(c)) for c in chunks) + len(encoder.flush())
+        elapsed = time.perf_counter() - start
+        print(f"{name:<16}{SECONDS / elapsed:>12.0f}{size / elapsed / 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Per-chunk cost of the two WebSocket output modes.
+
+Compares the JSON mode (base64 audio inside a serialized WSAudioMessage)
+with the binary mode (raw bytes in a binary frame) for typical chunk
+sizes, measuring the CPU spent framing each chunk on the event loop and
+the bytes put on the wire.
+
+    uv run python benchmarks/bench_ws_framing.py
+"""
+from __future__ import annotations
+
+import base64
+import time
+
+import numpy as np
+
+from local_tts.server.models import WSAudioMessage
+
+CHUNK_MS = (20, 100, 500)
+ITERATIONS = 2000
+
+
+def json_frame(data: bytes) -> str:
+    audio_b64 = base64.b64encode(data).decode()
+    return WSAudioMessage(audio=audio_b64, isFinal=False).model_dump_json()
+
+
+def binary_frame(data: bytes) -> bytes:
+    return data
+
+
+def measure(frame, data: bytes) -> tuple[float, int]:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        out = frame(data)
+    elapsed = (time.perf_counter() - start) / ITERATIONS
+    return elapsed, len(out)
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"{'chunk':>8}{'json us':>10}{'json B':>10}{'binary us':>12}{'binary B':>10}{'overhead':>10}")
+    for ms in CHUNK_MS:
+        samples = 24000 * ms // 1000
+        data = rng.integers(-32768, 32767, samples, dtype=np.int16).tobytes()
+        json_t, json_b = measure(json_frame, data)
+        bin_t, bin_b = measure(binary_frame, data)
+        print(
+            f"{ms:>6}ms{json_t * 1e6:>10.1f}{json_b:>10}"
+            f"{bin_t * 1e6:>12.2f}{bin_b:>10}{json_b / bin_b - 1:>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,34 @@ DEFAULT_VOICES = {
 }
 
 
+def _parse_replicas(value: str) -> tuple[str, int]:
+    name, sep, count = value.partition("=")
+    if not sep or name not in DEFAULT_VOICES or not count.isdigit() or int(count) < 1:
+        raise argparse.ArgumentTypeError(
+            f"expected MODEL=N with MODEL one of {', '.join(DEFAULT_VOICES)}, got {value!r}"
+        )
+    return name, int(count)
+
+
+def _parse_warmup_voices(value: str) -> tuple[str, list[str]]:
+    name, sep, voices = value.partition("=")
+    if not sep or name not in DEFAULT_VOICES or not voices:
+        raise argparse.ArgumentTypeError(
+            f"expected MODEL=VOICE[,VOICE...] with MODEL one of {', '.join(DEFAULT_VOICES)}, "
+            f"got {value!r}"
+        )
+    return name, voices.split(",")
+
+
+def _parse_bench_voice(value: str) -> tuple[str, str]:
+    name, sep, voice = value.partition("=")
+    if not sep or name not in DEFAULT_VOICES or not voice:
+        raise argparse.ArgumentTypeError(
+            f"expected MODEL=VOICE with MODEL one of {', '.join(DEFAULT_VOICES)}, got {value!r}"
+        )
+    return name, voice
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         prog="local-tts",
@@ -27,7 +55,144 @@ def main() -> None:
         choices=["mini", "micro", "nano", "nano-int8"],
         help="KittenTTS model size (default: micro)",
     )
+    sp.add_argument(
+        "--kokoro-batch-window-ms",
+        type=float,
+        default=0.0,
+        help="Batch Kokoro inference across requests arriving within this window (default: 0, off)",
+    )
+    sp.add_argument(
+        "--kokoro-max-batch",
+        type=int,
+        default=8,
+        help="Maximum sentences per Kokoro batch (default: 8)",
+    )
+    sp.add_argument(
+        "--kokoro-g2p-cache-size",
+        type=int,
+        default=4096,
+        help="Sentences whose Kokoro phonemes are memoized, 0 to disable (default: 4096)",
+    )
+    sp.add_argument(
+        "--kokoro-g2p-lookahead",
+        type=int,
+        default=2,
+        help="Chunks Kokoro G2P may run ahead of inference, 0 to run sequentially (default: 2)",
+    )
+    sp.add_argument(
+        "--kokoro-lazy-voices",
+        action="store_true",
+        help="Load Kokoro voices on first use instead of when the model loads",
+    )
+    sp.add_argument(
+        "--pocket-voice-dir",
+        default=None,
+        metavar="DIR",
+        help="Where computed Pocket TTS voice states are stored, '' to keep them in memory only "
+        "(default: ~/.cache/local-tts/pocket-voices)",
+    )
+    sp.add_argument(
+        "--pocket-voice-cache-size",
+        type=int,
+        default=32,
+        help="Pocket TTS voice states kept in memory (default: 32)",
+    )
+    sp.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Inference worker threads per engine (default: 1)",
+    )
+    sp.add_argument(
+        "--max-queue",
+        type=int,
+        default=16,
+        help="Requests allowed to wait for a worker, per engine (default: 16)",
+    )
+    sp.add_argument(
+        "--queue-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds a request may wait for a worker before failing (default: 30)",
+    )
+    sp.add_argument(
+        "--cache-size-mb",
+        type=float,
+        default=64,
+        help="Memory budget for cached synthesized audio, 0 to disable (default: 64)",
+    )
+    sp.add_argument(
+        "--cache-granularity",
+        default="utterance",
+        choices=["utterance", "sentence"],
+        help="Cache whole requests or individual sentences (default: utterance)",
+    )
+    sp.add_argument(
+        "--engine-processes",
+        action="store_true",
+        help="Run each engine in its own worker process",
+    )
+    sp.add_argument(
+        "--ring-buffer-mb",
+        type=float,
+        default=4,
+        help="Shared-memory audio buffer per request with --engine-processes (default: 4)",
+    )
+    sp.add_argument(
+        "--replicas",
+        type=_parse_replicas,
+        action="append",
+        default=[],
+        metavar="MODEL=N",
+        help="Run N instances of an engine, e.g. kokoro=4 (repeatable, default: 1 each)",
+    )
+    sp.add_argument(
+        "--torch-threads",
+        type=int,
+        default=0,
+        help="torch intra-op threads per replica (default: torch's choice)",
+    )
+    sp.add_argument(
+        "--cpu-affinity",
+        action="store_true",
+        help="Pin each engine process to its own set of CPU cores (needs --engine-processes)",
+    )
+    sp.add_argument(
+        "--warmup-text",
+        action="append",
+        metavar="TEXT",
+        help="Text to synthesize when warming up each engine (repeatable, default: one sentence)",
+    )
+    sp.add_argument(
+        "--warmup-voices",
+        type=_parse_warmup_voices,
+        action="append",
+        default=[],
+        metavar="MODEL=VOICE[,VOICE...]",
+        help="Voices to warm up for an engine (repeatable, default: the engine's first voice)",
+    )
+    sp.add_argument(
+        "--no-warmup-inference",
+        action="store_true",
+        help="Only load models at warmup, without synthesizing anything",
+    )
+    sp.add_argument(
+        "--compile",
+        action="store_true",
+        help="torch.compile the Kokoro and Pocket models at warmup",
+    )
+    sp.add_argument(
+        "--compile-cache-dir",
+        default=None,
+        metavar="DIR",
+        help="Where compiled models are cached across restarts (default: ~/.cache/local-tts/compile)",
+    )
     sp.add_argument("--no-preload", action="store_true", help="Skip preloading models at startup")
+    sp.add_argument(
+        "--background-load",
+        action="store_true",
+        help="Start serving immediately and load models in the background",
+    )
     sp.add_argument("--disable-kokoro", action="store_true", help="Disable the Kokoro engine")
     sp.add_argument("--disable-pocket", action="store_true", help="Disable the Pocket TTS engine")
     sp.add_argument("--disable-kitten", action="store_true", help="Disable the KittenTTS engine")
@@ -58,11 +223,139 @@ def main() -> None:
     cp.add_argument("--model", default="kokoro", choices=DEFAULT_VOICES, help="Model ID (default: kokoro)")
     cp.add_argument("--speed", type=float, default=1.0, help="Speech speed (default: 1.0)")
     cp.add_argument("-t", "--text", help="Text to synthesize (non-interactive)")
+    cp.add_argument(
+        "--lookahead",
+        type=int,
+        default=2,
+        help="Sentences to request ahead of the one playing, 0 to send the input as one request "
+        "(default: 2)",
+    )
+    cp.add_argument(
+        "--http2",
+        action="store_true",
+        help="Use HTTP/2 if the server offers it (needs the 'h2' package)",
+    )
+    cp.add_argument(
+        "--preroll-ms",
+        type=float,
+        default=200,
+        help="Audio to buffer before playback starts; grows after each underrun (default: 200)",
+    )
+
+    # Load test
+    lp = sub.add_parser("loadtest", help="Generate load against a running server")
+    lp.add_argument("--server", default="http://localhost:8880", help="Server URL")
+    lp.add_argument("--transport", default="http", choices=["http", "ws"], help="Endpoint to load (default: http)")
+    lp.add_argument("--model", default="kokoro", choices=DEFAULT_VOICES, help="Model ID (default: kokoro)")
+    lp.add_argument("--voice", default=None, help="Voice ID (default: per-model)")
+    lp.add_argument("--sessions", type=int, default=10, help="Total sessions to run (default: 10)")
+    lp.add_argument("--concurrency", type=int, default=10, help="Maximum open sessions (default: 10)")
+    lp.add_argument(
+        "--rate",
+        type=float,
+        default=0.0,
+        help="Mean session arrivals per second, 0 to start all at once (default: 0)",
+    )
+    lp.add_argument(
+        "--text-mix",
+        default="short,medium,long",
+        help="Comma-separated corpus texts to pick from (default: short,medium,long)",
+    )
+    lp.add_argument(
+        "--drip-rate",
+        type=float,
+        default=0.0,
+        help="WebSocket words sent per second, 0 to send the text at once (default: 0)",
+    )
+    lp.add_argument("--binary", action="store_true", help="Use binary WebSocket frames")
+    lp.add_argument("--timeout", type=float, default=120.0, help="Per-session timeout in seconds (default: 120)")
+    lp.add_argument("--seed", type=int, default=0, help="Random seed for arrivals and texts (default: 0)")
+    lp.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    lp.add_argument(
+        "--fake-server",
+        action="store_true",
+        help="Start an in-process server backed by a fake engine and load that instead",
+    )
+
+    # Bench
+    bp = sub.add_parser("bench", help="Benchmark the engines in-process")
+    bp.add_argument(
+        "--models",
+        default="kokoro,pocket,kitten",
+        help="Comma-separated engines to benchmark (default: kokoro,pocket,kitten)",
+    )
+    bp.add_argument(
+        "--kitten-sizes",
+        default="micro",
+        help="Comma-separated KittenTTS model sizes to benchmark (default: micro)",
+    )
+    bp.add_argument(
+        "--voice",
+        type=_parse_bench_voice,
+        action="append",
+        default=[],
+        metavar="MODEL=VOICE",
+        help="Voice for one engine, e.g. pocket=alba (repeatable, default: each engine's first voice)",
+    )
+    bp.add_argument("--runs", type=int, default=3, help="Timed runs per text (default: 3)")
+    bp.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Simultaneous streams per timed run, to measure aggregate throughput (default: 1)",
+    )
+    bp.add_argument("--workers", type=int, default=1, help="Inference workers per engine (default: 1)")
+    bp.add_argument(
+        "--kokoro-batch-window-ms",
+        type=float,
+        default=0.0,
+        help="Kokoro cross-request batching window, as for the server (default: 0, off)",
+    )
+    bp.add_argument("--json", metavar="PATH", help="Also write results as JSON ('-' for stdout)")
+    bp.add_argument(
+        "--fake",
+        action="store_true",
+        help="Benchmark a fake engine instead of real models, to check the harness",
+    )
+
+    # Render
+    rp = sub.add_parser("render", help="Render a text or JSONL file to WAV files")
+    rp.add_argument("input", help="Text file with one segment per line, or a .jsonl file")
+    rp.add_argument(
+        "-o",
+        "--output-dir",
+        default=None,
+        help="Directory for the segment WAV files (default: the input path without its extension)",
+    )
+    rp.add_argument("--concat", metavar="PATH", help="Also join all segments, in order, into one WAV file")
+    rp.add_argument("--server", default="http://localhost:8880", help="Server URL")
+    rp.add_argument("--model", default="kokoro", choices=DEFAULT_VOICES, help="Model ID (default: kokoro)")
+    rp.add_argument("--voice", default=None, help="Voice ID (default: per-model)")
+    rp.add_argument("--speed", type=float, default=1.0, help="Speech speed (default: 1.0)")
+    rp.add_argument("--sample-rate", type=int, default=24000, help="WAV sample rate (default: 24000)")
+    rp.add_argument("--concurrency", type=int, default=4, help="Segments rendered at once (default: 4)")
+    rp.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help="Retries per segment while the server is busy (default: 3)",
+    )
+    rp.add_argument("--force", action="store_true", help="Render segments again even if they are up to date")
 
     args = parser.parse_args()
 
     if args.command == "server":
-        from .engines.base import KittenOptions, ModelOptions
+        from .engines.base import (
+            CacheOptions,
+            KittenOptions,
+            KokoroOptions,
+            ModelOptions,
+            PocketOptions,
+            ProcessOptions,
+            ReplicaOptions,
+            SchedulerOptions,
+            WarmupOptions,
+        )
         from .server.main import run_server
 
         disabled = set()
@@ -73,9 +366,49 @@ def main() -> None:
         if args.disable_kitten:
             disabled.add("kitten")
 
+        warmup = WarmupOptions(voices=dict(args.warmup_voices), compile=args.compile)
+        if args.no_warmup_inference:
+            warmup.texts = []
+        elif args.warmup_text:
+            warmup.texts = args.warmup_text
+        if args.compile_cache_dir:
+            warmup.cache_dir = args.compile_cache_dir
+
+        pocket = PocketOptions(voice_cache_size=args.pocket_voice_cache_size)
+        if args.pocket_voice_dir is not None:
+            pocket.voice_dir = args.pocket_voice_dir
+
         model_options = ModelOptions(
+            kokoro=KokoroOptions(
+                batch_window_ms=args.kokoro_batch_window_ms,
+                max_batch_size=args.kokoro_max_batch,
+                g2p_cache_size=args.kokoro_g2p_cache_size,
+                g2p_lookahead=args.kokoro_g2p_lookahead,
+                preload_voices=not args.kokoro_lazy_voices,
+            ),
             kitten=KittenOptions(model_size=args.kitten_model_size),
+            pocket=pocket,
+            scheduler=SchedulerOptions(
+                workers=args.workers,
+                max_queue=args.max_queue,
+                queue_timeout=args.queue_timeout,
+            ),
+            cache=CacheOptions(
+                max_bytes=int(args.cache_size_mb * 1024 * 1024),
+                granularity=args.cache_granularity,
+            ),
+            process=ProcessOptions(
+                enabled=args.engine_processes,
+                ring_bytes=int(args.ring_buffer_mb * 1024 * 1024),
+            ),
+            replicas=ReplicaOptions(
+                counts=dict(args.replicas),
+                torch_threads=args.torch_threads,
+                cpu_affinity=args.cpu_affinity,
+            ),
+            warmup=warmup,
             preload=not args.no_preload,
+            background_load=args.background_load,
             disabled=disabled,
         )
         run_server(host=args.host, port=args.port, model_options=model_options)
@@ -87,9 +420,120 @@ def main() -> None:
         voice = args.voice or DEFAULT_VOICES.get(args.model, "af_heart")
 
         if args.text:
-            asyncio.run(run_once(args.server, voice, args.model, args.speed, args.text))
+            asyncio.run(
+                run_once(
+                    args.server,
+                    voice,
+                    args.model,
+                    args.speed,
+                    args.text,
+                    args.http2,
+                    args.lookahead,
+                    args.preroll_ms,
+                )
+            )
         else:
-            asyncio.run(run_repl(args.server, voice, args.model, args.speed))
+            asyncio.run(
+                run_repl(
+                    args.server,
+                    voice,
+                    args.model,
+                    args.speed,
+                    args.http2,
+                    args.lookahead,
+                    args.preroll_ms,
+                )
+            )
+
+    elif args.command == "loadtest":
+        import asyncio
+        from .bench import CORPUS
+        from .client.loadtest import LoadTestConfig, main as loadtest_main
+
+        text_mix = [t for t in args.text_mix.split(",") if t]
+        for name in text_mix:
+            if name not in CORPUS:
+                parser.error(f"unknown text: {name!r} (choose from {', '.join(CORPUS)})")
+        config = LoadTestConfig(
+            server_url=args.server,
+            transport=args.transport,
+            model_id=args.model,
+            voice_id=args.voice or DEFAULT_VOICES.get(args.model, "af_heart"),
+            sessions=args.sessions,
+            concurrency=args.concurrency,
+            arrival_rate=args.rate,
+            text_mix=text_mix,
+            drip_rate=args.drip_rate,
+            binary=args.binary,
+            timeout=args.timeout,
+            seed=args.seed,
+        )
+        asyncio.run(loadtest_main(config, fake=args.fake_server, json_path=args.json))
+
+    elif args.command == "bench":
+        import asyncio
+        from .bench import engine_factories, run_bench, write_json
+
+        models = [m for m in args.models.split(",") if m]
+        sizes = [s for s in args.kitten_sizes.split(",") if s]
+        for model in models:
+            if model not in DEFAULT_VOICES:
+                parser.error(f"unknown model: {model!r}")
+        if "kitten" in models:
+            from .engines.kitten import KITTEN_MODEL_SIZES
+
+            for size in sizes:
+                if size not in KITTEN_MODEL_SIZES:
+                    parser.error(
+                        f"unknown KittenTTS model size: {size!r} "
+                        f"(choose from {', '.join(KITTEN_MODEL_SIZES)})"
+                    )
+        factories = engine_factories(
+            models,
+            sizes,
+            fake=args.fake,
+            workers=args.workers,
+            batch_window_ms=args.kokoro_batch_window_ms,
+        )
+        # Keep stdout clean for JSON output.
+        out = sys.stderr if args.json == "-" else sys.stdout
+        results = asyncio.run(
+            run_bench(
+                factories,
+                dict(args.voice),
+                args.runs,
+                out=out,
+                concurrency=args.concurrency,
+                isolate=True,
+            )
+        )
+        if args.json:
+            write_json(results, args.json)
+
+    elif args.command == "render":
+        import asyncio
+        from .client.render import main as render_main
+
+        try:
+            summary = asyncio.run(
+                render_main(
+                    args.input,
+                    args.output_dir,
+                    args.server,
+                    args.voice or DEFAULT_VOICES.get(args.model, "af_heart"),
+                    args.model,
+                    speed=args.speed,
+                    sample_rate=args.sample_rate,
+                    concurrency=args.concurrency,
+                    retries=args.retries,
+                    force=args.force,
+                    concat=args.concat,
+                )
+            )
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        if summary.failed:
+            sys.exit(1)
 
     else:
         parser.print_help()
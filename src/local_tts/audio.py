@@ -0,0 +1,357 @@
+"""Streaming audio output stage: resampling, encoding and framing of engine PCM.
+
+Engines produce 24 kHz int16 mono PCM. The encoders here turn that stream,
+chunk by chunk, into the ElevenLabs ``output_format`` the client asked for.
+All of them are stateful so chunk boundaries never cause clicks or gaps.
+``AudioOutput`` can then regroup the encoded stream into fixed-duration
+frames, whatever chunk sizes the engine happened to produce.
+"""
+from __future__ import annotations
+
+import functools
+import math
+import re
+import struct
+from dataclasses import dataclass
+from typing import Protocol
+
+import numpy as np
+
+from .engines.base import SAMPLE_RATE
+
+PCM_RATES = (8000, 16000, 22050, 24000, 44100, 48000)
+MP3_RATES = (22050, 44100)
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    codec: str  # "pcm", "ulaw", "alaw", "wav" or "mp3"
+    sample_rate: int
+    bitrate: int | None = None  # kbps, compressed codecs only
+
+    @property
+    def media_type(self) -> str:
+        if self.codec == "pcm":
+            return f"audio/pcm;rate={self.sample_rate};encoding=signed-int;bits=16"
+        if self.codec == "ulaw":
+            return f"audio/PCMU;rate={self.sample_rate}"
+        if self.codec == "alaw":
+            return f"audio/PCMA;rate={self.sample_rate}"
+        if self.codec == "wav":
+            return "audio/wav"
+        return "audio/mpeg"
+
+    @property
+    def bytes_per_second(self) -> int:
+        if self.codec == "mp3":
+            return self.bitrate * 1000 // 8
+        return self.sample_rate * self.sample_width
+
+    @property
+    def sample_width(self) -> int:
+        """Bytes per sample: 2 for 16-bit PCM, 1 for μ-law and A-law (and mp3)."""
+        return 2 if self.codec in ("pcm", "wav") else 1
+
+
+_FORMAT_RE = re.compile(r"^(pcm|ulaw|alaw|wav|mp3)_(\d+)(?:_(\d+))?$")
+
+
+def parse_output_format(value: str) -> OutputFormat:
+    """Parse an ElevenLabs ``output_format`` string such as ``ulaw_8000``.
+
+    Raises ValueError for unknown or unsupported formats.
+    """
+    m = _FORMAT_RE.match(value)
+    if m is None:
+        raise ValueError(f"Unsupported output_format: {value!r}")
+    codec, rate, bitrate = m.group(1), int(m.group(2)), m.group(3)
+    if codec in ("ulaw", "alaw"):
+        valid = rate == 8000 and bitrate is None
+    elif codec == "mp3":
+        valid = rate in MP3_RATES and bitrate is not None
+    else:
+        valid = rate in PCM_RATES and bitrate is None
+    if not valid:
+        raise ValueError(f"Unsupported output_format: {value!r}")
+    return OutputFormat(codec, rate, int(bitrate) if bitrate else None)
+
+
+# -- Resampling ---------------------------------------------------------------
+
+
+@functools.lru_cache(maxsize=None)
+def polyphase_filter(up: int, down: int, half_taps: int = 16, beta: float = 8.0) -> np.ndarray:
+    """Design a Kaiser-windowed sinc low-pass split into ``up`` polyphase branches.
+
+    Returns an ``(up, taps)`` float32 matrix; row ``p`` holds the taps applied
+    to input samples for output samples at upsampled phase ``p``.
+    """
+    factor = max(up, down)
+    rolloff = 0.94
+    taps = 2 * half_taps * math.ceil(factor / up)
+    n = taps * up
+    # Centre on an integer upsampled sample so the delay can be compensated exactly.
+    t = (np.arange(n) - (n - 1) // 2) / factor
+    h = up * rolloff / factor * np.sinc(rolloff * t) * np.kaiser(n, beta)
+    return np.ascontiguousarray(h.reshape(taps, up).T, dtype=np.float32)
+
+
+class Resampler:
+    """Stateful rational-ratio polyphase resampler for int16 mono audio.
+
+    Feeding a signal in arbitrary chunks produces exactly the same samples
+    as feeding it in one go; ``flush`` emits the filter tail.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int) -> None:
+        g = math.gcd(in_rate, out_rate)
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.passthrough = self.up == self.down
+        if self.passthrough:
+            return
+        self._h = polyphase_filter(self.up, self.down)
+        self._taps = self._h.shape[1]
+        self._delay = (self._h.size - 1) // 2
+        self._offsets = np.arange(self._taps)
+        # Input history, starting at absolute input index self._start. The
+        # leading zeros stand in for the signal before the first sample.
+        self._buf = np.zeros(self._taps - 1, dtype=np.float32)
+        self._start = -(self._taps - 1)
+        self._received = 0
+        self._next = 0
+
+    def _run(self, n_end: int) -> np.ndarray:
+        n = np.arange(self._next, n_end, dtype=np.int64)
+        pos = n * self.down + self._delay
+        base = pos // self.up
+        idx = (base - self._start)[:, None] - self._offsets[None, :]
+        y = np.einsum("ij,ij->i", self._h[pos % self.up], self._buf[idx])
+        self._next = n_end
+        # Drop input no later output can reach.
+        keep_from = (n_end * self.down + self._delay) // self.up - (self._taps - 1)
+        drop = max(0, keep_from - self._start)
+        if drop:
+            self._buf = self._buf[drop:]
+            self._start += drop
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        if self.passthrough:
+            return audio
+        self._buf = np.concatenate([self._buf, audio.astype(np.float32)])
+        self._received += len(audio)
+        # Output n needs input up to index (n * down + delay) // up.
+        n_end = max(self._next, -(-(self._received * self.up - self._delay) // self.down))
+        return self._run(n_end)
+
+    def flush(self) -> np.ndarray:
+        if self.passthrough:
+            return np.zeros(0, dtype=np.int16)
+        total = -(-self._received * self.up // self.down)
+        self._buf = np.concatenate([self._buf, np.zeros(self._taps, dtype=np.float32)])
+        return self._run(max(self._next, total))
+
+
+# -- G.711 --------------------------------------------------------------------
+
+
+@functools.lru_cache(maxsize=None)
+def _ulaw_table() -> np.ndarray:
+    """μ-law code for every int16 value, indexed by the value as uint16."""
+    v = np.arange(65536, dtype=np.int32).astype(np.uint16).view(np.int16).astype(np.int32)
+    sign = np.where(v < 0, 0x80, 0)
+    mag = np.minimum(np.abs(v), 32635) + 0x84
+    exponent = sum((mag >= (1 << (e + 7))).astype(np.int32) for e in range(1, 8))
+    mantissa = (mag >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+@functools.lru_cache(maxsize=None)
+def _alaw_table() -> np.ndarray:
+    """A-law code for every int16 value, indexed by the value as uint16."""
+    v = np.arange(65536, dtype=np.int32).astype(np.uint16).view(np.int16).astype(np.int32)
+    pcm = v >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    pcm = np.where(pcm >= 0, pcm, -pcm - 1)
+    seg_end = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+    seg = np.searchsorted(seg_end, pcm, side="left")
+    shift = np.where(seg < 2, 1, seg)
+    code = (np.minimum(seg, 7) << 4) | ((pcm >> shift) & 0x0F)
+    code = np.where(seg >= 8, 0x7F, code)
+    return (code ^ mask).astype(np.uint8)
+
+
+def ulaw_encode(audio: np.ndarray) -> np.ndarray:
+    return _ulaw_table()[audio.view(np.uint16)]
+
+
+def alaw_encode(audio: np.ndarray) -> np.ndarray:
+    return _alaw_table()[audio.view(np.uint16)]
+
+
+def wav_header(sample_rate: int, data_size: int = 0xFFFFFFFF) -> bytes:
+    """RIFF/WAVE header for 16-bit mono PCM.
+
+    The default size marks a stream of unknown length, which players accept
+    for streamed WAV.
+    """
+    riff_size = 0xFFFFFFFF if data_size == 0xFFFFFFFF else data_size + 36
+    return b"RIFF" + struct.pack("<I", riff_size) + b"WAVE" + b"fmt " + struct.pack(
+        "<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16
+    ) + b"data" + struct.pack("<I", data_size)
+
+
+# -- Encoders -----------------------------------------------------------------
+
+
+class AudioEncoder(Protocol):
+    def encode(self, audio: np.ndarray) -> bytes:
+        """Encode a chunk of 24 kHz int16 PCM."""
+        ...
+
+    def flush(self) -> bytes:
+        """Return any buffered output at the end of the stream."""
+        ...
+
+
+class _PCMEncoder:
+    """Raw PCM, μ-law, A-law or streamed WAV at the target sample rate."""
+
+    def __init__(self, fmt: OutputFormat) -> None:
+        self._codec = fmt.codec
+        self._resampler = Resampler(SAMPLE_RATE, fmt.sample_rate)
+        self._header = wav_header(fmt.sample_rate) if fmt.codec == "wav" else b""
+
+    def _convert(self, audio: np.ndarray) -> bytes:
+        if self._codec == "ulaw":
+            data = ulaw_encode(audio).tobytes()
+        elif self._codec == "alaw":
+            data = alaw_encode(audio).tobytes()
+        else:
+            data = audio.astype("<i2", copy=False).tobytes()
+        if self._header:
+            data, self._header = self._header + data, b""
+        return data
+
+    def encode(self, audio: np.ndarray) -> bytes:
+        return self._convert(self._resampler.process(audio))
+
+    def flush(self) -> bytes:
+        return self._convert(self._resampler.flush())
+
+
+class _MP3Encoder:
+    def __init__(self, fmt: OutputFormat) -> None:
+        try:
+            import lameenc
+        except ImportError:
+            raise ValueError("MP3 output requires the 'lameenc' package") from None
+        self._resampler = Resampler(SAMPLE_RATE, fmt.sample_rate)
+        self._lame = lameenc.Encoder()
+        self._lame.set_bit_rate(fmt.bitrate)
+        self._lame.set_in_sample_rate(fmt.sample_rate)
+        self._lame.set_channels(1)
+        self._lame.set_quality(5)
+
+    def encode(self, audio: np.ndarray) -> bytes:
+        return bytes(self._lame.encode(self._resampler.process(audio).tobytes()))
+
+    def flush(self) -> bytes:
+        tail = self._resampler.flush()
+        return bytes(self._lame.encode(tail.tobytes())) + bytes(self._lame.flush())
+
+
+def create_encoder(fmt: OutputFormat | str) -> AudioEncoder:
+    """Create a streaming encoder; raises ValueError if the format is unavailable."""
+    if isinstance(fmt, str):
+        fmt = parse_output_format(fmt)
+    if fmt.codec == "mp3":
+        return _MP3Encoder(fmt)
+    return _PCMEncoder(fmt)
+
+
+# -- Framing ------------------------------------------------------------------
+
+MAX_FRAME_MS = 1000
+
+
+class FrameChunker:
+    """Regroups a byte stream into frames of exactly ``frame_bytes``.
+
+    Partial frames are assembled in one reusable buffer, so the only
+    allocation per frame is the ``bytes`` object handed to the network.
+    """
+
+    def __init__(self, frame_bytes: int) -> None:
+        if frame_bytes <= 0:
+            raise ValueError("Frame size must be positive")
+        self._buf = bytearray(frame_bytes)
+        self._view = memoryview(self._buf)
+        self._fill = 0
+
+    def push(self, data: bytes) -> list[bytes]:
+        """Add data, returning every frame it completes."""
+        frames = []
+        src = memoryview(data)
+        size = len(self._buf)
+        pos = 0
+        while pos < len(src):
+            if self._fill == 0 and len(src) - pos >= size:
+                # Whole frame available: copy it out directly.
+                frames.append(bytes(src[pos:pos + size]))
+                pos += size
+                continue
+            n = min(size - self._fill, len(src) - pos)
+            self._view[self._fill:self._fill + n] = src[pos:pos + n]
+            self._fill += n
+            pos += n
+            if self._fill == size:
+                frames.append(bytes(self._buf))
+                self._fill = 0
+        return frames
+
+    def flush(self) -> bytes:
+        """Return the last, partial frame."""
+        data = bytes(self._view[:self._fill])
+        self._fill = 0
+        return data
+
+
+def frame_bytes(fmt: OutputFormat, frame_ms: float) -> int:
+    """Size of a ``frame_ms`` frame in fmt, rounded to whole samples."""
+    if fmt.codec == "mp3":
+        # Constant bitrate, so bytes map to a fixed duration.
+        return max(1, round(fmt.bytes_per_second * frame_ms / 1000))
+    return max(1, round(fmt.sample_rate * frame_ms / 1000)) * fmt.sample_width
+
+
+class AudioOutput:
+    """Encoder plus optional fixed-duration framing.
+
+    HTTP and WebSocket responses both write engine chunks through this, so
+    what goes out on the network has the same shape for every engine. With
+    ``frame_ms`` 0 each engine chunk is sent as encoded.
+    """
+
+    def __init__(self, fmt: OutputFormat, frame_ms: float = 0) -> None:
+        if not 0 <= frame_ms <= MAX_FRAME_MS:
+            raise ValueError(f"frame_ms must be between 0 and {MAX_FRAME_MS}, got {frame_ms}")
+        self._encoder = create_encoder(fmt)
+        self._chunker = FrameChunker(frame_bytes(fmt, frame_ms)) if frame_ms else None
+
+    def _frames(self, data: bytes) -> list[bytes]:
+        if self._chunker is None:
+            return [data] if data else []
+        return self._chunker.push(data)
+
+    def write(self, audio: np.ndarray) -> list[bytes]:
+        """Encode a chunk of 24 kHz int16 PCM, returning the frames to send."""
+        return self._frames(self._encoder.encode(audio))
+
+    def close(self) -> list[bytes]:
+        """Flush the encoder and any partial frame at the end of the stream."""
+        frames = self._frames(self._encoder.flush())
+        if self._chunker is not None and (tail := self._chunker.flush()):
+            frames.append(tail)
+        return frames
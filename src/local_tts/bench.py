@@ -0,0 +1,271 @@
+"""In-process engine benchmark behind ``local-tts bench``.
+
+Every engine runs the same fixed corpus, so results are comparable across
+engines, Kitten model sizes and machines.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, TextIO
+
+from .engines.base import (
+    SAMPLE_RATE,
+    KittenOptions,
+    KokoroOptions,
+    ModelOptions,
+    SchedulerOptions,
+    TTSEngine,
+    WarmupOptions,
+)
+
+CORPUS = {
+    "short": "Hello! How can I help you today?",
+    "medium": (
+        "The quick brown fox jumps over the lazy dog. "
+        "Meanwhile, the weather service expects light rain in the afternoon, "
+        "clearing up by evening with temperatures around fifteen degrees."
+    ),
+    "long": (
+        "Text to speech systems turn written language into audio in two broad steps. "
+        "First, the text is normalized and converted into phonemes, the units of sound "
+        "that make up spoken words. Numbers, abbreviations and punctuation all need "
+        "special handling at this stage. Second, an acoustic model predicts how those "
+        "phonemes should sound, including their duration, pitch and energy, and a "
+        "vocoder renders the final waveform. Small models can now do all of this faster "
+        "than real time on an ordinary laptop, which makes fully local voice assistants "
+        "practical. The remaining challenge is latency: listeners notice a pause of more "
+        "than a few hundred milliseconds before speech begins."
+    ),
+}
+
+
+@dataclass
+class BenchResult:
+    model: str
+    variant: str
+    corpus: str
+    chars: int
+    runs: int
+    concurrency: int
+    load_seconds: float
+    voice_load_seconds: float
+    ttfc_seconds: float
+    total_seconds: float
+    audio_seconds: float
+    rtf: float
+    samples_per_second: float
+    peak_rss_mb: float | None
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process so far, if the OS reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+async def _run_once(engine: TTSEngine, text: str, voice_id: str) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    ttfc = None
+    samples = 0
+    async for chunk in engine.generate_audio_stream(text, voice_id):
+        if ttfc is None:
+            ttfc = time.perf_counter() - start
+        samples += len(chunk)
+    total = time.perf_counter() - start
+    return (ttfc if ttfc is not None else total), total, samples
+
+
+async def _run_concurrent(
+    engine: TTSEngine, text: str, voice_id: str, concurrency: int
+) -> tuple[float, float, int]:
+    """Run ``concurrency`` identical streams at once.
+
+    Returns the median time to first chunk, the wall time until the last
+    stream finished and the samples of all streams together.
+    """
+    if concurrency <= 1:
+        return await _run_once(engine, text, voice_id)
+    start = time.perf_counter()
+    timings = await asyncio.gather(
+        *(_run_once(engine, text, voice_id) for _ in range(concurrency))
+    )
+    total = time.perf_counter() - start
+    ttfc = statistics.median(t[0] for t in timings)
+    return ttfc, total, sum(t[2] for t in timings)
+
+
+async def bench_engine(
+    engine: TTSEngine,
+    voice_id: str | None = None,
+    runs: int = 3,
+    corpus: dict[str, str] = CORPUS,
+    concurrency: int = 1,
+) -> list[BenchResult]:
+    """Measure cold load, then warm latency and throughput for each corpus text.
+
+    Loading the model and preloading voices (for engines that can) are
+    timed separately. Warm figures are medians over ``runs`` runs, after
+    one untimed run per text. With ``concurrency`` above 1 each run is that
+    many simultaneous streams, and samples per second is their aggregate
+    throughput. Peak RSS is the process-wide high-water mark after the
+    engine ran.
+    """
+    voice_id = voice_id or engine.list_voices()[0].id
+
+    start = time.perf_counter()
+    await asyncio.to_thread(engine.warmup)
+    load_seconds = time.perf_counter() - start
+    voice_load_seconds = 0.0
+    if hasattr(engine, "preload_voices"):
+        start = time.perf_counter()
+        await asyncio.to_thread(engine.preload_voices)
+        voice_load_seconds = time.perf_counter() - start
+
+    results = []
+    for label, text in corpus.items():
+        await _run_concurrent(engine, text, voice_id, concurrency)
+        timings = [await _run_concurrent(engine, text, voice_id, concurrency) for _ in range(runs)]
+        ttfc = statistics.median(t[0] for t in timings)
+        total = statistics.median(t[1] for t in timings)
+        samples = timings[-1][2]
+        audio_seconds = samples / concurrency / SAMPLE_RATE
+        results.append(
+            BenchResult(
+                model=engine.name,
+                variant=getattr(engine, "variant", ""),
+                corpus=label,
+                chars=len(text),
+                runs=runs,
+                concurrency=concurrency,
+                load_seconds=load_seconds,
+                voice_load_seconds=voice_load_seconds,
+                ttfc_seconds=ttfc,
+                total_seconds=total,
+                audio_seconds=audio_seconds,
+                rtf=total / audio_seconds if audio_seconds else 0.0,
+                samples_per_second=samples / total if total else 0.0,
+                peak_rss_mb=peak_rss_mb(),
+            )
+        )
+    return results
+
+
+def engine_factories(
+    models: list[str],
+    kitten_sizes: list[str],
+    fake: bool = False,
+    workers: int = 1,
+    batch_window_ms: float = 0.0,
+) -> list[Callable[[], TTSEngine]]:
+    """Constructors for the engines to benchmark, in order.
+
+    Engines are only built when their turn comes, so cold load times and
+    memory are measured one engine at a time. The factories are picklable,
+    so run_bench can build each one in its own process. ``workers`` and
+    ``batch_window_ms`` are the server's ``--workers`` and
+    ``--kokoro-batch-window-ms``.
+    """
+    if fake:
+        from .engines.fake import FakeEngine
+
+        return [FakeEngine]
+
+    from .engines.registry import create_engine
+
+    factories: list[Callable[[], TTSEngine]] = []
+    for model in models:
+        sizes = kitten_sizes if model == "kitten" else [""]
+        for size in sizes:
+            # bench_engine does its own untimed run and preloads voices
+            # itself, so load time is just the model.
+            options = ModelOptions(
+                kokoro=KokoroOptions(batch_window_ms=batch_window_ms, preload_voices=False),
+                kitten=KittenOptions(model_size=size or "micro"),
+                # Concurrent streams queue for the workers instead of being rejected.
+                scheduler=SchedulerOptions(workers=workers, max_queue=1024),
+                warmup=WarmupOptions(texts=[]),
+            )
+            factories.append(functools.partial(create_engine, model, options))
+    return factories
+
+
+def format_table(results: list[BenchResult]) -> str:
+    header = (
+        f"{'model':<18}{'corpus':<8}{'chars':>6}{'streams':>8}{'load s':>9}{'voices s':>10}"
+        f"{'ttfc ms':>9}"
+        f"{'rtf':>8}{'samples/s':>12}{'rss MB':>9}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        model = f"{r.model}/{r.variant}" if r.variant else r.model
+        rss = f"{r.peak_rss_mb:.0f}" if r.peak_rss_mb is not None else "-"
+        lines.append(
+            f"{model:<18}{r.corpus:<8}{r.chars:>6}{r.concurrency:>8}{r.load_seconds:>9.2f}"
+            f"{r.voice_load_seconds:>10.2f}{r.ttfc_seconds * 1000:>9.1f}{r.rtf:>8.3f}{r.samples_per_second:>12.0f}{rss:>9}"
+        )
+    return "\n".join(lines)
+
+
+async def _bench_one(
+    engine: TTSEngine, voices: dict[str, str], runs: int, concurrency: int
+) -> list[BenchResult]:
+    print(f"Benchmarking {engine.name}...", file=sys.stderr)
+    return await bench_engine(engine, voices.get(engine.name), runs, concurrency=concurrency)
+
+
+def _bench_isolated(
+    factory: Callable[[], TTSEngine], voices: dict[str, str], runs: int, concurrency: int
+) -> list[BenchResult]:
+    """Build and benchmark one engine in a fresh process, see run_bench."""
+    return asyncio.run(_bench_one(factory(), voices, runs, concurrency))
+
+
+async def run_bench(
+    factories: list[Callable[[], TTSEngine]],
+    voices: dict[str, str] | None = None,
+    runs: int = 3,
+    out: TextIO = sys.stdout,
+    concurrency: int = 1,
+    isolate: bool = False,
+) -> list[BenchResult]:
+    """Benchmark each engine in turn and print the table.
+
+    ``voices`` maps engine names to the voice to use; other engines use
+    their first voice. With ``isolate`` every engine runs in its own
+    process, so its load time and peak RSS do not include the engines
+    before it; the factories must then be picklable.
+    """
+    voices = voices or {}
+    results = []
+    for factory in factories:
+        if not isolate:
+            results.extend(await _bench_one(factory(), voices, runs, concurrency))
+            continue
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            fut = pool.submit(_bench_isolated, factory, voices, runs, concurrency)
+            results.extend(await asyncio.wrap_future(fut))
+    print(format_table(results), file=out)
+    return results
+
+
+def write_json(results: list[BenchResult], path: str) -> None:
+    data = json.dumps([asdict(r) for r in results], indent=2)
+    if path == "-":
+        print(data)
+    else:
+        with open(path, "w") as f:
+            f.write(data + "\n")
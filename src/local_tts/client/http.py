@@ -1,33 +1,117 @@
 from __future__ import annotations
 
-from typing import Iterator
+import asyncio
+from collections import deque
+from typing import AsyncIterator
 
 import httpx
 import numpy as np
 
+from ..engines.base import SAMPLE_RATE
+from ..engines.text import split_sentences
+
 
 class TTSHTTPClient:
-    """Streams PCM audio from the HTTP POST endpoint."""
+    """Streams PCM audio from the HTTP POST endpoint.
+
+    One keep-alive connection pool is used for the whole session, so only
+    the first utterance pays for connection setup. Close the client with
+    ``aclose`` or use it as an async context manager.
+    """
 
-    def __init__(self, server_url: str, voice_id: str, model_id: str) -> None:
+    def __init__(
+        self, server_url: str, voice_id: str, model_id: str, http2: bool = False
+    ) -> None:
         self.server_url = server_url.rstrip("/")
         self.voice_id = voice_id
         self.model_id = model_id
+        try:
+            self._client = httpx.AsyncClient(
+                http2=http2,
+                timeout=httpx.Timeout(connect=10, read=120, write=10, pool=10),
+            )
+        except ImportError:
+            raise ValueError("HTTP/2 requires the 'h2' package") from None
+
+    async def __aenter__(self) -> TTSHTTPClient:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def synthesize(
+        self,
+        text: str,
+        speed: float = 1.0,
+        *,
+        voice_id: str | None = None,
+        model_id: str | None = None,
+        sample_rate: int = SAMPLE_RATE,
+    ) -> AsyncIterator[np.ndarray]:
+        """POST text and yield int16 PCM chunks as they stream back.
 
-    def synthesize(self, text: str, speed: float = 1.0) -> Iterator[np.ndarray]:
-        """POST text and yield int16 PCM chunks as they stream back."""
-        url = f"{self.server_url}/v1/text-to-speech/{self.voice_id}/stream"
-        body: dict = {"text": text, "model_id": self.model_id}
+        ``voice_id`` and ``model_id`` override the client's for this request.
+        """
+        url = f"{self.server_url}/v1/text-to-speech/{voice_id or self.voice_id}/stream"
+        body: dict = {"text": text, "model_id": model_id or self.model_id}
         if speed != 1.0:
             body["voice_settings"] = {"speed": speed}
+        params = {"output_format": f"pcm_{sample_rate}"} if sample_rate != SAMPLE_RATE else None
 
-        with httpx.stream(
-            "POST",
-            url,
-            json=body,
-            timeout=httpx.Timeout(connect=10, read=120, write=10, pool=10),
-        ) as resp:
+        async with self._client.stream("POST", url, json=body, params=params) as resp:
             resp.raise_for_status()
-            for raw in resp.iter_bytes(chunk_size=4800):  # 100ms of int16 mono
+            async for raw in resp.aiter_bytes(chunk_size=4800):  # 100ms of int16 mono
                 if raw:
                     yield np.frombuffer(raw, dtype=np.int16)
+
+    async def synthesize_sentences(
+        self, text: str, speed: float = 1.0, lookahead: int = 2
+    ) -> AsyncIterator[np.ndarray]:
+        """Like synthesize, but with one request per sentence.
+
+        While one sentence is being yielded, the next ``lookahead`` are
+        already being fetched, so long input starts playing after its first
+        sentence. Audio still comes out in order. Closing or cancelling the
+        iterator cancels every outstanding request.
+        """
+        sentences = split_sentences(text)
+        if lookahead <= 0 or len(sentences) <= 1:
+            async for chunk in self.synthesize(text, speed):
+                yield chunk
+            return
+
+        async def fetch(sentence: str, out: asyncio.Queue) -> None:
+            try:
+                async for chunk in self.synthesize(sentence, speed):
+                    out.put_nowait(chunk)
+            except Exception as e:
+                out.put_nowait(e)
+            else:
+                out.put_nowait(None)
+
+        remaining = iter(sentences)
+        pending: deque[tuple[asyncio.Task, asyncio.Queue]] = deque()
+
+        def start_next() -> None:
+            sentence = next(remaining, None)
+            if sentence is not None:
+                out: asyncio.Queue = asyncio.Queue()
+                pending.append((asyncio.create_task(fetch(sentence, out)), out))
+
+        try:
+            for _ in range(1 + lookahead):
+                start_next()
+            while pending:
+                out = pending[0][1]
+                while (item := await out.get()) is not None:
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+                pending.popleft()
+                start_next()
+        finally:
+            for task, _ in pending:
+                task.cancel()
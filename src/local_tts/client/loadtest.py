@@ -0,0 +1,300 @@
+"""Load generator for the HTTP and WebSocket streaming endpoints.
+
+Each simulated session synthesizes one text and plays the result back in
+(simulated) real time, so besides latency the report shows how often audio
+would have run dry on the listener's side.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import random
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator
+
+import httpx
+import numpy as np
+
+from ..bench import CORPUS
+from ..engines.base import SAMPLE_RATE
+
+TRANSPORTS = ("http", "ws")
+
+
+class SessionError(Exception):
+    """The server answered, but not with audio."""
+
+
+@dataclass
+class LoadTestConfig:
+    server_url: str = "http://localhost:8880"
+    transport: str = "http"
+    model_id: str = "kokoro"
+    voice_id: str = "af_heart"
+    # Total sessions, and how many may be open at once.
+    sessions: int = 10
+    concurrency: int = 10
+    # Mean session arrivals per second (Poisson). 0 starts them all at once.
+    arrival_rate: float = 0.0
+    # Corpus entries (see bench.CORPUS) to pick texts from at random.
+    text_mix: list[str] = field(default_factory=lambda: list(CORPUS))
+    # WebSocket only: words sent per second, like an LLM streaming tokens.
+    # 0 sends the whole text at once.
+    drip_rate: float = 0.0
+    binary: bool = False
+    timeout: float = 120.0
+    seed: int = 0
+
+
+@dataclass
+class SessionResult:
+    ok: bool
+    error: str = ""
+    ttfb: float | None = None  # first response byte
+    ttfa: float | None = None  # first audio sample
+    total: float = 0.0
+    audio_seconds: float = 0.0
+    underruns: int = 0
+    stall_seconds: float = 0.0
+
+
+class _Playback:
+    """Tracks a real-time playback clock that starts with the first audio."""
+
+    def __init__(self) -> None:
+        self.end: float | None = None
+        self.underruns = 0
+        self.stall = 0.0
+        self.samples = 0
+
+    def feed(self, now: float, samples: int) -> None:
+        if not samples:
+            return
+        if self.end is not None and now > self.end:
+            self.underruns += 1
+            self.stall += now - self.end
+        start = now if self.end is None or now > self.end else self.end
+        self.end = start + samples / SAMPLE_RATE
+        self.samples += samples
+
+
+async def _http_session(
+    client: httpx.AsyncClient, config: LoadTestConfig, text: str, result: SessionResult
+) -> AsyncIterator[tuple[float, int]]:
+    url = f"{config.server_url}/v1/text-to-speech/{config.voice_id}/stream"
+    start = time.perf_counter()
+    async with client.stream("POST", url, json={"text": text, "model_id": config.model_id}) as resp:
+        result.ttfb = time.perf_counter() - start
+        if resp.status_code != 200:
+            await resp.aread()
+            raise SessionError(f"HTTP {resp.status_code}")
+        received = 0
+        async for raw in resp.aiter_bytes():
+            # Chunks need not end on a sample boundary.
+            samples = (received + len(raw)) // 2 - received // 2
+            received += len(raw)
+            yield time.perf_counter() - start, samples
+
+
+async def _ws_session(
+    config: LoadTestConfig, text: str, result: SessionResult
+) -> AsyncIterator[tuple[float, int]]:
+    import websockets
+
+    base = config.server_url.replace("http://", "ws://").replace("https://", "wss://")
+    url = (
+        f"{base}/v1/text-to-speech/{config.voice_id}/stream-input"
+        f"?model_id={config.model_id}&output_format=pcm_24000"
+        f"{'&binary=true' if config.binary else ''}"
+    )
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send(json.dumps({"text": " "}))
+        start = time.perf_counter()
+
+        async def send_text() -> None:
+            if config.drip_rate <= 0:
+                await ws.send(json.dumps({"text": text + " "}))
+            else:
+                for word in text.split():
+                    await ws.send(json.dumps({"text": word + " "}))
+                    await asyncio.sleep(1 / config.drip_rate)
+            await ws.send(json.dumps({"text": ""}))
+
+        sender = asyncio.create_task(send_text())
+        try:
+            async for message in ws:
+                now = time.perf_counter() - start
+                if result.ttfb is None:
+                    result.ttfb = now
+                if isinstance(message, bytes):
+                    yield now, len(message) // 2
+                    continue
+                msg = json.loads(message)
+                if msg.get("audio"):
+                    yield now, len(base64.b64decode(msg["audio"])) // 2
+                if msg.get("isFinal"):
+                    break
+            else:
+                raise SessionError(f"WebSocket closed with {ws.close_code}")
+            await sender
+        finally:
+            sender.cancel()
+
+
+async def run_session(
+    client: httpx.AsyncClient, config: LoadTestConfig, text: str
+) -> SessionResult:
+    result = SessionResult(ok=False)
+    playback = _Playback()
+    start = time.perf_counter()
+    if config.transport == "http":
+        chunks = _http_session(client, config, text, result)
+    else:
+        chunks = _ws_session(config, text, result)
+
+    async def consume() -> None:
+        async for now, samples in chunks:
+            if samples and result.ttfa is None:
+                result.ttfa = now
+            playback.feed(now, samples)
+
+    try:
+        await asyncio.wait_for(consume(), config.timeout)
+        result.ok = playback.samples > 0
+        if not result.ok:
+            result.error = "no audio"
+    except Exception as e:
+        result.error = str(e) if isinstance(e, SessionError) else type(e).__name__
+    finally:
+        await chunks.aclose()
+    result.total = time.perf_counter() - start
+    result.audio_seconds = playback.samples / SAMPLE_RATE
+    result.underruns = playback.underruns
+    result.stall_seconds = playback.stall
+    return result
+
+
+async def run_load_test(config: LoadTestConfig) -> list[SessionResult]:
+    if config.transport not in TRANSPORTS:
+        raise ValueError(
+            f"Unknown transport: {config.transport!r}. Available: {', '.join(TRANSPORTS)}"
+        )
+    rng = random.Random(config.seed)
+    texts = [CORPUS[name] for name in config.text_mix]
+    semaphore = asyncio.Semaphore(config.concurrency)
+    limits = httpx.Limits(
+        max_connections=config.concurrency, max_keepalive_connections=config.concurrency
+    )
+
+    async with httpx.AsyncClient(timeout=config.timeout, limits=limits) as client:
+
+        async def session(text: str) -> SessionResult:
+            async with semaphore:
+                return await run_session(client, config, text)
+
+        tasks = []
+        for _ in range(config.sessions):
+            tasks.append(asyncio.create_task(session(rng.choice(texts))))
+            if config.arrival_rate > 0:
+                await asyncio.sleep(rng.expovariate(config.arrival_rate))
+        return list(await asyncio.gather(*tasks))
+
+
+def summarize(results: list[SessionResult], wall_seconds: float) -> dict:
+    def percentiles(values: list[float]) -> dict[str, float | None]:
+        if not values:
+            return {"p50": None, "p95": None, "p99": None}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+    ok = [r for r in results if r.ok]
+    return {
+        "sessions": len(results),
+        "errors": len(results) - len(ok),
+        "error_rate": (len(results) - len(ok)) / len(results) if results else 0.0,
+        "error_kinds": dict(Counter(r.error for r in results if not r.ok)),
+        "ttfb": percentiles([r.ttfb for r in ok if r.ttfb is not None]),
+        "ttfa": percentiles([r.ttfa for r in ok if r.ttfa is not None]),
+        "sessions_with_underruns": sum(1 for r in ok if r.underruns),
+        "underruns": sum(r.underruns for r in ok),
+        "stall_seconds": sum(r.stall_seconds for r in ok),
+        "audio_seconds": sum(r.audio_seconds for r in ok),
+        "wall_seconds": wall_seconds,
+    }
+
+
+def format_summary(summary: dict) -> str:
+    def ms(value: float | None) -> str:
+        return f"{value * 1000:8.1f}" if value is not None else "       -"
+
+    lines = [
+        f"sessions: {summary['sessions']}  errors: {summary['errors']} "
+        f"({summary['error_rate']:.1%})",
+    ]
+    for kind, count in summary["error_kinds"].items():
+        lines.append(f"  {kind}: {count}")
+    lines.append(f"{'':6}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}")
+    for name in ("ttfb", "ttfa"):
+        p = summary[name]
+        lines.append(f"{name:<6}{ms(p['p50'])}{ms(p['p95'])}{ms(p['p99'])}")
+    lines.append(
+        f"underruns: {summary['underruns']} in {summary['sessions_with_underruns']} sessions "
+        f"({summary['stall_seconds']:.2f}s stalled)"
+    )
+    if summary["wall_seconds"]:
+        lines.append(
+            f"audio: {summary['audio_seconds']:.1f}s in {summary['wall_seconds']:.1f}s "
+            f"({summary['audio_seconds'] / summary['wall_seconds']:.1f}x real time)"
+        )
+    return "\n".join(lines)
+
+
+@asynccontextmanager
+async def fake_server(chunk_delay: float = 0.02) -> AsyncIterator[str]:
+    """Run the server in-process with only a FakeEngine, yielding its URL."""
+    import uvicorn
+
+    from ..engines.base import ModelOptions
+    from ..engines.fake import FakeEngine
+    from ..engines.registry import ENGINE_NAMES, get_registry
+    from ..server.main import create_app
+
+    engine = FakeEngine(chunk_delay=chunk_delay)
+    get_registry().register(engine)
+    app = create_app(ModelOptions(preload=False, disabled=set(ENGINE_NAMES)))
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    try:
+        while not server.started:
+            if task.done():
+                task.result()
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
+        get_registry().unregister(engine.name)
+
+
+async def main(config: LoadTestConfig, fake: bool = False, json_path: str | None = None) -> dict:
+    if fake:
+        async with fake_server() as url:
+            config.server_url = url
+            config.model_id = "fake"
+            config.voice_id = "test_voice"
+            return await main(config, json_path=json_path)
+
+    start = time.perf_counter()
+    results = await run_load_test(config)
+    summary = summarize(results, time.perf_counter() - start)
+    print(format_summary(summary))
+    if json_path:
+        data = {"config": asdict(config), "summary": summary, "sessions": [asdict(r) for r in results]}
+        with open(json_path, "w") as f:
+            json.dump(data, f, indent=2)
+    return summary
@@ -1,100 +1,206 @@
 from __future__ import annotations
 
-import queue
 import threading
+from typing import Any
 
 import numpy as np
-import sounddevice as sd
 
 from ..engines.base import SAMPLE_RATE
 
 
+class RingBuffer:
+    """Preallocated FIFO of int16 samples. Not thread-safe on its own.
+
+    Writes must fit in the free space; ``grow`` moves the contents into a
+    larger buffer, which the caller allocates so it can do so outside its
+    lock.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._buf = np.zeros(capacity, dtype=np.int16)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+
+    def write(self, data: np.ndarray) -> None:
+        n = len(data)
+        if self._size + n > len(self._buf):
+            raise ValueError(f"{n} samples do not fit in the ring buffer")
+        end = (self._start + self._size) % len(self._buf)
+        first = min(n, len(self._buf) - end)
+        self._buf[end : end + first] = data[:first]
+        self._buf[: n - first] = data[first:]
+        self._size += n
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Move up to ``len(out)`` samples into out and return how many."""
+        n = min(len(out), self._size)
+        first = min(n, len(self._buf) - self._start)
+        out[:first] = self._buf[self._start : self._start + first]
+        out[first:n] = self._buf[: n - first]
+        self._start = (self._start + n) % len(self._buf)
+        self._size -= n
+        return n
+
+    def grow(self, buf: np.ndarray) -> None:
+        """Move the contents to the start of buf and use it from now on."""
+        if len(buf) < self._size:
+            raise ValueError("New ring buffer is smaller than its contents")
+        size = self._size
+        self.read_into(buf[:size])
+        self._buf = buf
+        self._start = 0
+        self._size = size
+
+
 class AudioPlayer:
-    """Streams int16 PCM chunks to the default audio output device."""
+    """Streams int16 PCM chunks to the default audio output device.
+
+    The sound card pulls audio from a ring buffer in a callback, so playback
+    does not depend on when chunks arrive. Each utterance starts once
+    ``preroll_ms`` of audio is buffered; if the buffer runs dry before the
+    utterance is complete, that counts as an underrun and playback pauses
+    until the buffer refills. Every underrun raises the pre-roll target by
+    half of ``preroll_ms``, up to ``max_preroll_ms``, so a jittery network
+    ends up with a deeper buffer.
+    """
 
-    def __init__(self, sample_rate: int = SAMPLE_RATE) -> None:
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        preroll_ms: float = 200,
+        max_preroll_ms: float = 1000,
+        blocksize_ms: float = 20,
+        buffer_seconds: float = 30,
+    ) -> None:
         self.sample_rate = sample_rate
-        self._queue: queue.Queue[np.ndarray | None] = queue.Queue()
-        self._stream: sd.OutputStream | None = None
-        self._thread: threading.Thread | None = None
-        self._stop = threading.Event()
-        self._done = threading.Event()
+        self._preroll_step = int(sample_rate * preroll_ms / 1000)
+        self._max_preroll = max(self._preroll_step, int(sample_rate * max_preroll_ms / 1000))
+        self._blocksize = max(1, int(sample_rate * blocksize_ms / 1000))
+        self._ring = RingBuffer(int(sample_rate * buffer_seconds))
+        self._stream = None
         self._lock = threading.Lock()
+        self._drained = threading.Event()
+        self._drained.set()
+        self._preroll = self._preroll_step
+        self._buffering = True
+        self._eof = False
+        self.underruns = 0
+        self.device_underflows = 0
 
     def start(self) -> None:
+        """Open the output stream, if needed, and begin a new utterance."""
         with self._lock:
-            # Clean up any existing stream first
-            self._cleanup_locked()
-            self._stop.clear()
-            self._done.clear()
-            # Drain any leftover items
-            while not self._queue.empty():
-                try:
-                    self._queue.get_nowait()
-                except queue.Empty:
-                    break
-            self._stream = sd.OutputStream(
-                samplerate=self.sample_rate,
-                channels=1,
-                dtype="int16",
-                blocksize=2400,  # 100ms at 24kHz
-            )
-            self._stream.start()
-            self._thread = threading.Thread(target=self._playback_loop, daemon=True)
-            self._thread.start()
-
-    def _playback_loop(self) -> None:
-        try:
-            while not self._stop.is_set():
-                try:
-                    chunk = self._queue.get(timeout=0.1)
-                except queue.Empty:
-                    continue
-                if chunk is None:
-                    break
-                with self._lock:
-                    if self._stream is not None and not self._stop.is_set():
-                        self._stream.write(chunk.reshape(-1, 1))
-        finally:
-            self._done.set()
+            self._ring.clear()
+            self._buffering = True
+            self._eof = False
+            self._drained.clear()
+            if self._stream is not None:
+                return
+        import sounddevice as sd
+
+        # Some host APIs run the callback, which takes the lock, from
+        # within start(), so the stream is opened without holding it.
+        stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="int16",
+            blocksize=self._blocksize,
+            callback=self._callback,
+        )
+        stream.start()
+        with self._lock:
+            self._stream = stream
+
+    def _callback(self, outdata: np.ndarray, frames: int, time: Any, status: Any) -> None:
+        if status and status.output_underflow:
+            self.device_underflows += 1
+        out = outdata[:, 0]
+        with self._lock:
+            if self._buffering and (len(self._ring) >= self._preroll or self._eof):
+                self._buffering = False
+            n = 0 if self._buffering else self._ring.read_into(out)
+            if n < frames and not self._buffering:
+                if self._eof:
+                    self._drained.set()
+                else:
+                    self.underruns += 1
+                    self._buffering = True
+                    self._preroll = min(self._preroll + self._preroll_step, self._max_preroll)
+        out[n:] = 0
 
     def play_chunk(self, audio: np.ndarray) -> None:
-        if not self._stop.is_set():
-            self._queue.put(audio)
+        while True:
+            with self._lock:
+                if self._eof:
+                    return
+                needed = len(self._ring) + len(audio)
+                if needed <= self._ring.capacity:
+                    self._ring.write(audio)
+                    return
+                capacity = self._ring.capacity
+            # Allocate outside the lock, which the callback takes every block;
+            # only the copy and swap happen while holding it.
+            buf = np.empty(max(needed, 2 * capacity), dtype=np.int16)
+            with self._lock:
+                if self._ring.capacity == capacity:
+                    self._ring.grow(buf)
 
     def drain(self) -> None:
         """Wait for all queued audio to finish playing."""
-        self._queue.put(None)
-        self._done.wait(timeout=60)
+        with self._lock:
+            self._eof = True
+            if self._stream is None:
+                self._drained.set()
+            buffered = len(self._ring) / self.sample_rate
+        self._drained.wait(timeout=buffered + 5)
 
     def interrupt(self) -> None:
         """Stop playback immediately and discard queued audio."""
-        self._stop.set()
-        # Drain the queue so the thread can exit
-        while True:
-            try:
-                self._queue.get_nowait()
-            except queue.Empty:
-                break
-        # Put a sentinel to unblock the thread if it's waiting on get()
-        self._queue.put(None)
-        self._done.wait(timeout=2)
         with self._lock:
-            self._cleanup_locked()
+            self._ring.clear()
+            self._eof = True
+            self._drained.set()
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            # abort() also drops what the device has already buffered.
+            _close(stream, abort=True)
 
     def stop(self) -> None:
         """Stop playback gracefully after all queued audio is played."""
         self.drain()
         with self._lock:
-            self._cleanup_locked()
-
-    def _cleanup_locked(self) -> None:
-        """Close stream and thread. Must be called with self._lock held."""
-        if self._stream is not None:
-            try:
-                self._stream.stop()
-                self._stream.close()
-            except Exception:
-                pass
-            self._stream = None
-        self._thread = None
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            _close(stream)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            buffered = len(self._ring)
+            capacity = self._ring.capacity
+            preroll = self._preroll
+        return {
+            "buffered_ms": round(buffered * 1000 / self.sample_rate),
+            "fill": round(buffered / capacity, 3),
+            "preroll_ms": round(preroll * 1000 / self.sample_rate),
+            "underruns": self.underruns,
+            "device_underflows": self.device_underflows,
+        }
+
+
+def _close(stream: Any, abort: bool = False) -> None:
+    try:
+        stream.abort() if abort else stream.stop()
+        stream.close()
+    except Exception:
+        pass
@@ -0,0 +1,300 @@
+"""Offline rendering of text segments to WAV files, behind ``local-tts render``.
+
+Each segment is streamed straight to its own WAV file, so memory stays
+bounded however long the input is. Finished files are only ever renamed into
+place, which makes a run resumable: segments whose WAV already exists and
+was rendered from the same text and settings are skipped.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+
+import httpx
+
+from ..audio import PCM_RATES, wav_header
+from ..engines.base import SAMPLE_RATE
+from .http import TTSHTTPClient
+
+WAV_HEADER_BYTES = 44
+
+_SEGMENT_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@dataclass
+class Segment:
+    id: str
+    text: str
+    # Per-segment overrides of the command line defaults.
+    voice_id: str | None = None
+    model_id: str | None = None
+    speed: float | None = None
+
+
+@dataclass
+class RenderSummary:
+    segments: int
+    rendered: int = 0
+    skipped: int = 0
+    failed: list[str] = field(default_factory=list)
+    audio_seconds: float = 0.0
+
+
+def load_segments(path: str) -> list[Segment]:
+    """Read segments from a JSONL file or, for any other file, one per line.
+
+    JSONL lines hold ``text`` and optionally ``id``, ``voice_id``,
+    ``model_id`` and ``speed``. Segments without an id are numbered by
+    position. Raises ValueError for malformed input.
+    """
+    segments = []
+    with open(path, encoding="utf-8") as f:
+        lines = [(n, line.strip()) for n, line in enumerate(f, 1) if line.strip()]
+    for i, (lineno, line) in enumerate(lines):
+        default_id = f"{i + 1:04d}"
+        if not path.endswith(".jsonl"):
+            segments.append(Segment(id=default_id, text=line))
+            continue
+        try:
+            data = json.loads(line)
+            segment = Segment(
+                id=str(data.get("id", default_id)),
+                text=data["text"],
+                voice_id=data.get("voice_id"),
+                model_id=data.get("model_id"),
+                speed=data.get("speed"),
+            )
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"{path}:{lineno}: invalid segment: {e}") from None
+        segments.append(segment)
+
+    seen = set()
+    for segment in segments:
+        if not _SEGMENT_ID.match(segment.id):
+            raise ValueError(
+                f"Invalid segment id {segment.id!r}: use letters, digits, '.', '-' or '_'"
+            )
+        if segment.id in seen:
+            raise ValueError(f"Duplicate segment id {segment.id!r}")
+        seen.add(segment.id)
+    return segments
+
+
+def segment_key(
+    segment: Segment, voice_id: str, model_id: str, speed: float, sample_rate: int
+) -> str:
+    """Hash of everything that determines a segment's audio."""
+    data = [
+        segment.text,
+        segment.voice_id or voice_id,
+        segment.model_id or model_id,
+        segment.speed or speed,
+        sample_rate,
+    ]
+    return hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+
+def _read_key(path: str) -> str | None:
+    try:
+        with open(path, encoding="ascii") as f:
+            return f.read().strip()
+    except (OSError, ValueError):
+        return None
+
+
+def _write_key(path: str, key: str) -> None:
+    with open(path + ".part", "w", encoding="ascii") as f:
+        f.write(key + "\n")
+    os.replace(path + ".part", path)
+
+
+def wav_sample_rate(path: str) -> int | None:
+    """Sample rate of a WAV file written by render, or None if there is none."""
+    try:
+        with open(path, "rb") as f:
+            header = f.read(WAV_HEADER_BYTES)
+    except OSError:
+        return None
+    if len(header) < WAV_HEADER_BYTES or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    return int.from_bytes(header[24:28], "little")
+
+
+class _WavWriter:
+    """Writes 16-bit PCM to a WAV file as it arrives, fixing up sizes on close."""
+
+    def __init__(self, path: str, sample_rate: int) -> None:
+        self.sample_rate = sample_rate
+        self.data_size = 0
+        self._file = open(path, "wb")
+        self._file.write(wav_header(sample_rate, 0))
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self.data_size += len(data)
+
+    def close(self) -> None:
+        self._file.seek(0)
+        self._file.write(wav_header(self.sample_rate, self.data_size))
+        self._file.close()
+
+
+async def render_segment(
+    client: TTSHTTPClient,
+    segment: Segment,
+    path: str,
+    sample_rate: int = SAMPLE_RATE,
+    speed: float = 1.0,
+    retries: int = 3,
+) -> float:
+    """Render one segment to path, retrying while the server is overloaded.
+
+    Returns the duration of the audio in seconds.
+    """
+    tmp = path + ".part"
+    for attempt in range(retries + 1):
+        writer = _WavWriter(tmp, sample_rate)
+        try:
+            async for chunk in client.synthesize(
+                segment.text,
+                segment.speed or speed,
+                voice_id=segment.voice_id,
+                model_id=segment.model_id,
+                sample_rate=sample_rate,
+            ):
+                writer.write(chunk.tobytes())
+            writer.close()
+        except BaseException as e:
+            writer.close()
+            os.unlink(tmp)
+            busy = isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 503
+            if not busy or attempt == retries:
+                raise
+            await asyncio.sleep(2**attempt)
+            continue
+        os.replace(tmp, path)
+        return writer.data_size / 2 / sample_rate
+    raise AssertionError("unreachable")
+
+
+def concatenate(paths: list[str], out: str, sample_rate: int) -> None:
+    """Join WAV files written by render into one, copying block by block."""
+    writer = _WavWriter(out + ".part", sample_rate)
+    try:
+        for path in paths:
+            with open(path, "rb") as f:
+                f.seek(WAV_HEADER_BYTES)
+                while block := f.read(1024 * 1024):
+                    writer.write(block)
+    finally:
+        writer.close()
+    os.replace(out + ".part", out)
+
+
+async def render(
+    segments: list[Segment],
+    out_dir: str,
+    client: TTSHTTPClient,
+    *,
+    sample_rate: int = SAMPLE_RATE,
+    speed: float = 1.0,
+    concurrency: int = 4,
+    retries: int = 3,
+    force: bool = False,
+    concat: str | None = None,
+) -> RenderSummary:
+    """Render every segment to ``out_dir/<id>.wav``, ``concurrency`` at a time.
+
+    Next to each WAV, ``<id>.wav.sha256`` holds the segment_key it was
+    rendered with. Segments whose WAV exists with a matching key are
+    skipped unless ``force`` is set. With ``concat``, the segments are also
+    joined in order into that file once all of them have been rendered.
+    """
+    if sample_rate not in PCM_RATES:
+        raise ValueError(f"Unsupported sample rate: {sample_rate}")
+    os.makedirs(out_dir, exist_ok=True)
+    summary = RenderSummary(segments=len(segments))
+    paths = [os.path.join(out_dir, f"{segment.id}.wav") for segment in segments]
+
+    todo = []
+    for segment, path in zip(segments, paths):
+        key = segment_key(segment, client.voice_id, client.model_id, speed, sample_rate)
+        if (
+            not force
+            and wav_sample_rate(path) == sample_rate
+            and _read_key(path + ".sha256") == key
+        ):
+            summary.skipped += 1
+        else:
+            todo.append((segment, path, key))
+    if summary.skipped:
+        print(f"Skipping {summary.skipped} segment(s) already rendered", file=sys.stderr)
+
+    queue = iter(todo)
+
+    async def worker() -> None:
+        for segment, path, key in queue:
+            try:
+                # The key goes away before the WAV changes and comes back
+                # after it, so an interrupted run never leaves a WAV behind
+                # with a key it does not match.
+                if os.path.exists(path + ".sha256"):
+                    os.unlink(path + ".sha256")
+                seconds = await render_segment(client, segment, path, sample_rate, speed, retries)
+                _write_key(path + ".sha256", key)
+            except Exception as e:
+                summary.failed.append(segment.id)
+                print(f"{segment.id}: failed: {e}", file=sys.stderr)
+                continue
+            summary.rendered += 1
+            summary.audio_seconds += seconds
+            done = summary.rendered + len(summary.failed)
+            print(f"{segment.id}: {seconds:.1f}s ({done}/{len(todo)})", file=sys.stderr)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    if concat and not summary.failed:
+        concatenate(paths, concat, sample_rate)
+    return summary
+
+
+async def main(
+    input_path: str,
+    out_dir: str | None,
+    server_url: str,
+    voice_id: str,
+    model_id: str,
+    *,
+    speed: float = 1.0,
+    sample_rate: int = SAMPLE_RATE,
+    concurrency: int = 4,
+    retries: int = 3,
+    force: bool = False,
+    concat: str | None = None,
+) -> RenderSummary:
+    segments = load_segments(input_path)
+    out_dir = out_dir or os.path.splitext(input_path)[0]
+    async with TTSHTTPClient(server_url, voice_id, model_id) as client:
+        summary = await render(
+            segments,
+            out_dir,
+            client,
+            sample_rate=sample_rate,
+            speed=speed,
+            concurrency=concurrency,
+            retries=retries,
+            force=force,
+            concat=concat,
+        )
+    print(
+        f"Rendered {summary.rendered}, skipped {summary.skipped}, failed {len(summary.failed)} "
+        f"of {summary.segments} segment(s) ({summary.audio_seconds:.1f}s of new audio) in {out_dir}"
+    )
+    if concat and not summary.failed:
+        print(f"Wrote {concat}")
+    return summary
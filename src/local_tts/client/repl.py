@@ -7,14 +7,22 @@ from .http import TTSHTTPClient
 from .player import AudioPlayer
 
 
-async def run_repl(server_url: str, voice_id: str, model_id: str, speed: float) -> None:
-    client = TTSHTTPClient(server_url, voice_id, model_id)
-    player = AudioPlayer()
+async def run_repl(
+    server_url: str,
+    voice_id: str,
+    model_id: str,
+    speed: float,
+    http2: bool = False,
+    lookahead: int = 2,
+    preroll_ms: float = 200,
+) -> None:
+    client = TTSHTTPClient(server_url, voice_id, model_id, http2=http2)
+    player = AudioPlayer(preroll_ms=preroll_ms)
 
     print(f"Server: {server_url}")
     print(f"Model: {model_id}, Voice: {voice_id}")
     print("Type text and press Enter to synthesize.")
-    print("Commands: /quit  /interrupt\n")
+    print("Commands: /quit  /interrupt  /stats\n")
 
     loop = asyncio.get_running_loop()
     stdin_reader = asyncio.StreamReader()
@@ -43,11 +51,14 @@ async def run_repl(server_url: str, voice_id: str, model_id: str, speed: float)
                 break
             if cmd == "/interrupt":
                 continue
+            if cmd == "/stats":
+                _print_stats(player)
+                continue
             if not text.strip():
                 continue
 
             quit_requested, pending_read = await _synthesize_with_interrupt(
-                client, player, text, speed, stdin_reader
+                client, player, text, speed, lookahead, stdin_reader
             )
             if quit_requested:
                 break
@@ -58,6 +69,12 @@ async def run_repl(server_url: str, voice_id: str, model_id: str, speed: float)
         if pending_read is not None and not pending_read.done():
             pending_read.cancel()
         transport.close()
+        player.interrupt()
+        await client.aclose()
+
+
+def _print_stats(player: AudioPlayer) -> None:
+    print(", ".join(f"{k}: {v}" for k, v in player.stats().items()))
 
 
 async def _synthesize_with_interrupt(
@@ -65,33 +82,36 @@ async def _synthesize_with_interrupt(
     player: AudioPlayer,
     text: str,
     speed: float,
+    lookahead: int,
     stdin_reader: asyncio.StreamReader,
 ) -> tuple[bool, asyncio.Task[bytes] | None]:
     """Run synthesis with interrupt support.
 
-    Returns (quit_requested, pending_readline_task).
+    Cancelling the synthesis task also cancels any sentences being
+    prefetched. Returns (quit_requested, pending_readline_task).
     """
     player.start()
-    loop = asyncio.get_running_loop()
 
-    def _stream_to_player() -> None:
+    async def _play() -> None:
         try:
-            for chunk in client.synthesize(text, speed=speed):
+            async for chunk in client.synthesize_sentences(text, speed, lookahead):
                 player.play_chunk(chunk)
         except Exception as e:
             print(f"Error: {e}", file=sys.stderr)
+        # Wait in a thread, so /interrupt is still read while the rest plays.
+        await asyncio.to_thread(player.drain)
 
-    synth_task = asyncio.ensure_future(loop.run_in_executor(None, _stream_to_player))
+    play_task = asyncio.create_task(_play())
     pending_read: asyncio.Task[bytes] | None = None
 
-    while not synth_task.done():
+    while not play_task.done():
         if pending_read is None:
             sys.stdout.write("> ")
             sys.stdout.flush()
             pending_read = asyncio.ensure_future(stdin_reader.readline())
 
         done, _ = await asyncio.wait(
-            {synth_task, pending_read},
+            {play_task, pending_read},
             return_when=asyncio.FIRST_COMPLETED,
         )
 
@@ -99,38 +119,50 @@ async def _synthesize_with_interrupt(
             line = pending_read.result()
             pending_read = None
             if not line:  # EOF
-                synth_task.cancel()
+                play_task.cancel()
                 player.interrupt()
                 return True, None
             cmd = line.decode().rstrip("\n").strip().lower()
             if cmd == "/interrupt":
-                synth_task.cancel()
+                play_task.cancel()
                 player.interrupt()
                 print("Interrupted.")
                 return False, None
             if cmd == "/quit":
-                synth_task.cancel()
+                play_task.cancel()
                 player.interrupt()
                 return True, None
+            if cmd == "/stats":
+                _print_stats(player)
             # Other input during synthesis is ignored
 
     try:
-        await synth_task
+        await play_task
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
 
+    # Everything has played by now; this only closes the stream.
     player.stop()
     return False, pending_read
 
 
-async def run_once(server_url: str, voice_id: str, model_id: str, speed: float, text: str) -> None:
-    client = TTSHTTPClient(server_url, voice_id, model_id)
-    player = AudioPlayer()
+async def run_once(
+    server_url: str,
+    voice_id: str,
+    model_id: str,
+    speed: float,
+    text: str,
+    http2: bool = False,
+    lookahead: int = 2,
+    preroll_ms: float = 200,
+) -> None:
+    player = AudioPlayer(preroll_ms=preroll_ms)
 
     player.start()
     try:
-        for chunk in client.synthesize(text, speed=speed):
-            player.play_chunk(chunk)
-        player.drain()
+        async with TTSHTTPClient(server_url, voice_id, model_id, http2=http2) as client:
+            async for chunk in client.synthesize_sentences(text, speed, lookahead):
+                player.play_chunk(chunk)
+        await asyncio.to_thread(player.drain)
     finally:
         player.stop()
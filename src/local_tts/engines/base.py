@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import threading
 from dataclasses import dataclass, field
-from typing import AsyncIterator, Protocol
+from typing import AsyncIterator, Callable, Iterator, Protocol, TypeVar
 
 import numpy as np
 
 
 SAMPLE_RATE = 24000
 
+DEFAULT_WARMUP_TEXT = "Hello! This is a short sentence to warm up the model."
+
+# Number of chunks a worker thread may run ahead of the consumer before it
+# blocks (see iterate_in_thread).
+STREAM_QUEUE_SIZE = 4
+
+T = TypeVar("T")
+
 
 @dataclass
 class VoiceInfo:
@@ -17,15 +28,101 @@ class VoiceInfo:
     gender: str
 
 
+@dataclass
+class KokoroOptions:
+    # Collect sentences from concurrent requests for up to this long and run
+    # them through the model as one batch. 0 disables batching.
+    batch_window_ms: float = 0.0
+    max_batch_size: int = 8
+    # Sentences whose phonemes are memoized. 0 disables the G2P cache.
+    g2p_cache_size: int = 4096
+    # Model chunks G2P may run ahead of acoustic inference in its own
+    # thread. 0 runs both stages sequentially.
+    g2p_lookahead: int = 2
+    # Load every listed voice's style vectors at warmup instead of on first
+    # use.
+    preload_voices: bool = True
+
+
 @dataclass
 class KittenOptions:
     model_size: str = "micro"
 
 
+@dataclass
+class PocketOptions:
+    # Computed voice states are saved here and memory-mapped on later loads.
+    # Empty keeps them in memory only.
+    voice_dir: str = os.path.join(os.path.expanduser("~"), ".cache", "local-tts", "pocket-voices")
+    # Voice states kept in memory.
+    voice_cache_size: int = 32
+
+
+@dataclass
+class SchedulerOptions:
+    workers: int = 1
+    max_queue: int = 16
+    queue_timeout: float = 30.0
+
+
+@dataclass
+class CacheOptions:
+    # Memory budget for cached synthesized audio. 0 disables the cache.
+    max_bytes: int = 64 * 1024 * 1024
+    # "utterance" caches whole requests, "sentence" caches each sentence.
+    granularity: str = "utterance"
+
+
+@dataclass
+class ProcessOptions:
+    # Host each engine in its own worker process instead of the server's.
+    enabled: bool = False
+    # Shared-memory ring used to return PCM, per concurrent request.
+    ring_bytes: int = 4 * 1024 * 1024
+
+
+@dataclass
+class ReplicaOptions:
+    # Instances per engine name, e.g. {"kokoro": 4}; unlisted engines get one.
+    counts: dict[str, int] = field(default_factory=dict)
+    # torch intra-op threads per replica. 0 keeps torch's default, or the
+    # number of pinned cores with cpu_affinity.
+    torch_threads: int = 0
+    # Pin each replica's worker process to its own set of cores.
+    cpu_affinity: bool = False
+
+
+@dataclass
+class WarmupOptions:
+    # Synthesized with each warmup voice when an engine loads, so the first
+    # request doesn't pay for lazy voice loads, allocator growth and kernel
+    # selection. Empty only loads the model.
+    texts: list[str] = field(default_factory=lambda: [DEFAULT_WARMUP_TEXT])
+    # Voices to warm up per engine name; unlisted engines warm their first.
+    voices: dict[str, list[str]] = field(default_factory=dict)
+    # torch.compile the Kokoro and Pocket models. Compilation happens during
+    # warmup inference.
+    compile: bool = False
+    # Compiled artifacts are cached here, so restarts don't compile again.
+    cache_dir: str = os.path.join(os.path.expanduser("~"), ".cache", "local-tts", "compile")
+
+    def voices_for(self, engine: TTSEngine) -> list[str]:
+        return self.voices.get(engine.name) or [engine.list_voices()[0].id]
+
+
 @dataclass
 class ModelOptions:
+    kokoro: KokoroOptions = field(default_factory=KokoroOptions)
     kitten: KittenOptions = field(default_factory=KittenOptions)
+    pocket: PocketOptions = field(default_factory=PocketOptions)
+    scheduler: SchedulerOptions = field(default_factory=SchedulerOptions)
+    cache: CacheOptions = field(default_factory=CacheOptions)
+    process: ProcessOptions = field(default_factory=ProcessOptions)
+    replicas: ReplicaOptions = field(default_factory=ReplicaOptions)
+    warmup: WarmupOptions = field(default_factory=WarmupOptions)
     preload: bool = True
+    # Start serving right away while models load; see /health/ready.
+    background_load: bool = False
     disabled: set[str] = field(default_factory=set)
 
 
@@ -45,7 +142,81 @@ class TTSEngine(Protocol):
         ...
 
 
+_scratch = threading.local()
+# Largest scratch buffer a thread keeps (10 s of audio); longer chunks get a
+# buffer of their own, so one long sentence doesn't pin its size forever.
+SCRATCH_MAX_SAMPLES = 10 * SAMPLE_RATE
+
+
 def float32_to_int16(audio: np.ndarray) -> np.ndarray:
-    """Convert float32 audio [-1, 1] to int16 PCM."""
-    audio = np.clip(audio, -1.0, 1.0)
-    return (audio * 32767).astype(np.int16)
+    """Convert float32 audio [-1, 1] to int16 PCM.
+
+    Scaling and clipping run in place in a per-thread scratch buffer, so the
+    returned array is the only allocation for chunks of up to
+    SCRATCH_MAX_SAMPLES.
+    """
+    n = audio.size
+    buf = getattr(_scratch, "buf", None)
+    if n > SCRATCH_MAX_SAMPLES:
+        buf = np.empty(n, np.float32)
+    elif buf is None or len(buf) < n:
+        size = max(n, 2 * len(buf) if buf is not None else 0)
+        buf = _scratch.buf = np.empty(min(size, SCRATCH_MAX_SAMPLES), np.float32)
+    work = buf[:n].reshape(audio.shape)
+    np.multiply(audio, 32767, out=work)
+    np.clip(work, -32767, 32767, out=work)
+    return work.astype(np.int16)
+
+
+_END = object()
+
+
+async def iterate_in_thread(
+    func: Callable[..., Iterator[T]],
+    *args,
+    executor=None,
+    maxsize: int = STREAM_QUEUE_SIZE,
+) -> AsyncIterator[T]:
+    """Run a blocking generator in a worker thread, yielding items as produced.
+
+    Items are handed over through a bounded queue, so a slow consumer stalls
+    the producer instead of letting audio pile up in memory. If the consumer
+    stops early the generator is closed and the worker thread exits.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize)
+    cancelled = threading.Event()
+
+    def _put(item) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def _produce() -> None:
+        try:
+            gen = func(*args)
+            try:
+                for item in gen:
+                    if cancelled.is_set():
+                        break
+                    _put(item)
+            finally:
+                gen.close()
+        finally:
+            if not cancelled.is_set():
+                _put(_END)
+
+    future = loop.run_in_executor(executor, _produce)
+    try:
+        while (item := await queue.get()) is not _END:
+            yield item
+        # Re-raises any exception from the producer.
+        await future
+    finally:
+        if not future.done():
+            cancelled.set()
+            # Unblock a producer waiting on a full queue.
+            while not queue.empty():
+                queue.get_nowait()
+            try:
+                await future
+            except Exception:
+                pass
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+I = TypeVar("I")
+O = TypeVar("O")
+
+
+class MicroBatcher(Generic[I, O]):
+    """Coalesces blocking calls from concurrent worker threads into batches.
+
+    ``submit`` blocks the calling thread until its item has been processed.
+    A dedicated thread collects items for up to ``window`` seconds after the
+    first one arrives (or until ``max_batch_size`` are pending) and passes
+    them to ``run_batch`` in one call, which must return one result per item
+    in the same order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[list[I]], list[O]],
+        window: float = 0.01,
+        max_batch_size: int = 8,
+    ) -> None:
+        self.name = name
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._run_batch = run_batch
+        self._queue: queue.SimpleQueue[tuple[I, Future[O]] | None] = queue.SimpleQueue()
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: I) -> O:
+        fut: Future[O] = Future()
+        self._queue.put((item, fut))
+        return fut.result()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+            "max_batch_size": self._largest,
+        }
+
+    def _collect(self, first: tuple[I, Future[O]]) -> list[tuple[I, Future[O]]]:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                # Finish this batch, then stop.
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _loop(self) -> None:
+        while (first := self._queue.get()) is not None:
+            batch = self._collect(first)
+            try:
+                results = self._run_batch([item for item, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
+            self._batches += 1
+            self._items += len(batch)
+            self._largest = max(self._largest, len(batch))
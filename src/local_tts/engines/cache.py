@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Generic, Hashable, TypeVar
+
+import numpy as np
+
+from ..metrics import CACHE_BYTES, CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES, get_metrics
+from .base import STREAM_QUEUE_SIZE, TTSEngine
+from .text import split_sentences
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe LRU mapping bounded by entry count, with hit/miss counters."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: collections.OrderedDict[K, V] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    model_id: str
+    variant: str
+    voice_id: str
+    speed: float
+    text: str
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    read: bool = True
+    write: bool = True
+
+    @classmethod
+    def from_header(cls, value: str | None) -> CachePolicy:
+        """Build a policy from a ``Cache-Control`` request header.
+
+        ``no-cache`` forces fresh synthesis (the result is still stored),
+        ``no-store`` keeps the result out of the cache.
+        """
+        if not value:
+            return cls()
+        directives = {d.strip().lower() for d in value.split(",")}
+        return cls(read="no-cache" not in directives, write="no-store" not in directives)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def make_key(engine: TTSEngine, text: str, voice_id: str, speed: float) -> CacheKey:
+    return CacheKey(
+        model_id=engine.name,
+        variant=getattr(engine, "variant", ""),
+        voice_id=voice_id,
+        speed=round(speed, 3),
+        text=normalize_text(text),
+    )
+
+
+GRANULARITIES = ("utterance", "sentence")
+
+
+def _owned(chunk: np.ndarray) -> np.ndarray:
+    # Some engines yield views that are only valid until the next chunk
+    # (see ProcessEngine); anything kept around must own its memory.
+    return chunk if chunk.flags.owndata else chunk.copy()
+
+
+class AudioCache:
+    """In-memory LRU cache of synthesized int16 chunks, bounded by total bytes.
+
+    With ``granularity="sentence"`` requests are split into sentences which
+    are cached individually, so utterances sharing most of their sentences
+    only synthesize the ones that differ.
+    """
+
+    def __init__(self, max_bytes: int = 0, granularity: str = "utterance") -> None:
+        if granularity not in GRANULARITIES:
+            raise ValueError(
+                f"Unknown cache granularity: {granularity!r}. "
+                f"Available: {', '.join(GRANULARITIES)}"
+            )
+        self.max_bytes = max_bytes
+        self.granularity = granularity
+        self._entries: collections.OrderedDict[CacheKey, tuple[np.ndarray, ...]] = (
+            collections.OrderedDict()
+        )
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> tuple[np.ndarray, ...] | None:
+        chunks = self._entries.get(key)
+        if chunks is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return chunks
+
+    def put(self, key: CacheKey, chunks: list[np.ndarray]) -> None:
+        size = sum(c.nbytes for c in chunks)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= sum(c.nbytes for c in old)
+        for c in chunks:
+            c.flags.writeable = False
+        self._entries[key] = tuple(chunks)
+        self._bytes += size
+        self._evict()
+
+    def resize(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def discard_voice(self, model_id: str, voice_id: str) -> None:
+        """Drop every entry of a voice, e.g. after it was replaced."""
+        for key in [k for k in self._entries if k.model_id == model_id and k.voice_id == voice_id]:
+            chunks = self._entries.pop(key)
+            self._bytes -= sum(c.nbytes for c in chunks)
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, chunks = self._entries.popitem(last=False)
+            self._bytes -= sum(c.nbytes for c in chunks)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    async def stream(
+        self,
+        engine: TTSEngine,
+        text: str,
+        voice_id: str,
+        speed: float = 1.0,
+        policy: CachePolicy = CachePolicy(),
+    ) -> AsyncIterator[np.ndarray]:
+        """Like ``engine.generate_audio_stream``, served from the cache when possible.
+
+        A result is only stored once the engine has produced it completely.
+        """
+        if not self.enabled:
+            async for chunk in engine.generate_audio_stream(text, voice_id, speed):
+                yield chunk
+            return
+
+        if self.granularity == "sentence":
+            sentences = split_sentences(text)
+            if len(sentences) > 1:
+                async for chunk in self._stream_sentences(
+                    engine, sentences, voice_id, speed, policy
+                ):
+                    yield chunk
+                return
+
+        async for chunk in self._stream_one(engine, text, voice_id, speed, policy):
+            yield chunk
+
+    async def _stream_one(
+        self,
+        engine: TTSEngine,
+        text: str,
+        voice_id: str,
+        speed: float,
+        policy: CachePolicy,
+    ) -> AsyncIterator[np.ndarray]:
+        key = make_key(engine, text, voice_id, speed)
+        if policy.read:
+            cached = self.get(key)
+            if cached is not None:
+                for chunk in cached:
+                    yield chunk
+                return
+
+        collected: list[np.ndarray] | None = [] if policy.write else None
+        size = 0
+        async for chunk in engine.generate_audio_stream(text, voice_id, speed):
+            if collected is not None:
+                size += chunk.nbytes
+                if size <= self.max_bytes:
+                    collected.append(_owned(chunk))
+                else:
+                    # The result can no longer fit; stop collecting.
+                    collected = None
+            yield chunk
+        if collected is not None:
+            self.put(key, collected)
+
+    async def _stream_sentences(
+        self,
+        engine: TTSEngine,
+        sentences: list[str],
+        voice_id: str,
+        speed: float,
+        policy: CachePolicy,
+    ) -> AsyncIterator[np.ndarray]:
+        """Serve cached sentences right away while the misses are synthesized.
+
+        Misses are synthesized one after another in a background task, each
+        into its own queue, and everything is yielded in sentence order. The
+        queues are bounded, so the task runs at most ``STREAM_QUEUE_SIZE``
+        chunks ahead of the consumer rather than buffering the utterance.
+        """
+        cached = [
+            self.get(make_key(engine, sentence, voice_id, speed)) if policy.read else None
+            for sentence in sentences
+        ]
+        misses = [i for i, chunks in enumerate(cached) if chunks is None]
+        pending: dict[int, asyncio.Queue] = {i: asyncio.Queue(STREAM_QUEUE_SIZE) for i in misses}
+        miss_policy = CachePolicy(read=False, write=policy.write)
+
+        async def synthesize_misses() -> None:
+            for i in misses:
+                try:
+                    async for chunk in self._stream_one(
+                        engine, sentences[i], voice_id, speed, miss_policy
+                    ):
+                        await pending[i].put(_owned(chunk))
+                except Exception as e:
+                    await pending[i].put(e)
+                    return
+                await pending[i].put(None)
+
+        task = asyncio.create_task(synthesize_misses()) if misses else None
+        try:
+            for i, chunks in enumerate(cached):
+                if chunks is not None:
+                    for chunk in chunks:
+                        yield chunk
+                    continue
+                while (item := await pending[i].get()) is not None:
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+
+_cache = AudioCache()
+
+
+def _collect_metrics() -> None:
+    stats = _cache.stats()
+    CACHE_HITS.set(stats["hits"])
+    CACHE_MISSES.set(stats["misses"])
+    CACHE_EVICTIONS.set(stats["evictions"])
+    CACHE_BYTES.set(stats["bytes"])
+
+
+get_metrics().add_collector(_collect_metrics)
+
+
+def get_audio_cache() -> AudioCache:
+    return _cache
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator
+
+import numpy as np
+
+from .base import SAMPLE_RATE, VoiceInfo, float32_to_int16
+
+
+class FakeEngine:
+    """A deterministic fake TTS engine, for tests and for benchmarking the harness."""
+
+    def __init__(
+        self,
+        engine_name: str = "fake",
+        num_chunks: int = 3,
+        samples_per_chunk: int = 2400,
+        chunk_delay: float = 0.0,
+    ):
+        self._name = engine_name
+        self._num_chunks = num_chunks
+        self._samples_per_chunk = samples_per_chunk
+        # Simulated inference time per chunk.
+        self._chunk_delay = chunk_delay
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def list_voices(self) -> list[VoiceInfo]:
+        return [
+            VoiceInfo(id="test_voice", name="Test Voice", language="en", gender="female"),
+            VoiceInfo(id="test_voice2", name="Test Voice 2", language="en", gender="male"),
+        ]
+
+    def warmup(self) -> None:
+        pass
+
+    async def generate_audio_stream(
+        self,
+        text: str,
+        voice_id: str,
+        speed: float = 1.0,
+    ) -> AsyncIterator[np.ndarray]:
+        for i in range(self._num_chunks):
+            if self._chunk_delay:
+                await asyncio.sleep(self._chunk_delay)
+            # Generate a sine wave chunk so the audio is deterministic
+            t = np.linspace(
+                i * self._samples_per_chunk / SAMPLE_RATE,
+                (i + 1) * self._samples_per_chunk / SAMPLE_RATE,
+                self._samples_per_chunk,
+                endpoint=False,
+            )
+            wave = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+            yield float32_to_int16(wave)
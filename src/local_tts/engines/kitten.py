@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-import asyncio
 import logging
-from typing import AsyncIterator
+from typing import AsyncIterator, Iterator
 
 import numpy as np
 
-from .base import VoiceInfo, float32_to_int16
+from .base import VoiceInfo, WarmupOptions, float32_to_int16
+from .scheduler import InferenceScheduler
+from .text import split_sentences
+from .warmup import run_warmup
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +32,12 @@ KITTEN_VOICES = [
 
 
 class KittenEngine:
-    def __init__(self, model_size: str = "micro") -> None:
+    def __init__(
+        self,
+        model_size: str = "micro",
+        scheduler: InferenceScheduler | None = None,
+        warmup: WarmupOptions | None = None,
+    ) -> None:
         if model_size not in KITTEN_MODEL_SIZES:
             raise ValueError(
                 f"Unknown KittenTTS model size: {model_size!r}. "
@@ -39,11 +46,20 @@ class KittenEngine:
         self._model_size = model_size
         self._model_name = KITTEN_MODEL_SIZES[model_size]
         self._model = None
+        # ONNX, so WarmupOptions.compile doesn't apply.
+        self._warmup = warmup or WarmupOptions()
+        # None in an engine worker process, which runs _generate_sync on its
+        # own threads; otherwise a default one is built on first use.
+        self.scheduler = scheduler
 
     @property
     def name(self) -> str:
         return "kitten"
 
+    @property
+    def variant(self) -> str:
+        return self._model_size
+
     def list_voices(self) -> list[VoiceInfo]:
         return list(KITTEN_VOICES)
 
@@ -56,16 +72,20 @@ class KittenEngine:
         self._model = KittenTTS(self._model_name)
         logger.info("KittenTTS model loaded")
 
-    def _generate_sync(self, text: str, voice_id: str, speed: float) -> list[np.ndarray]:
+    def _generate_sync(self, text: str, voice_id: str, speed: float) -> Iterator[np.ndarray]:
         self._ensure_model()
         # KittenTTS expects capitalized voice names
         voice_name = voice_id.capitalize()
-        audio = self._model.generate(text, voice=voice_name, speed=speed)
-        audio = np.asarray(audio, dtype=np.float32)
-        return [float32_to_int16(audio)]
+        # KittenTTS has no streaming API, so generate sentence by sentence
+        # to get the first audio out early.
+        for sentence in split_sentences(text):
+            audio = self._model.generate(sentence, voice=voice_name, speed=speed)
+            audio = np.asarray(audio, dtype=np.float32)
+            yield float32_to_int16(audio)
 
     def warmup(self) -> None:
         self._ensure_model()
+        run_warmup(self._generate_sync, self._warmup.voices_for(self), self._warmup.texts)
 
     async def generate_audio_stream(
         self,
@@ -73,9 +93,7 @@ class KittenEngine:
         voice_id: str,
         speed: float = 1.0,
     ) -> AsyncIterator[np.ndarray]:
-        loop = asyncio.get_running_loop()
-        chunks = await loop.run_in_executor(
-            None, self._generate_sync, text, voice_id, speed
-        )
-        for chunk in chunks:
+        if self.scheduler is None:
+            self.scheduler = InferenceScheduler(self.name)
+        async for chunk in self.scheduler.stream(self._generate_sync, text, voice_id, speed):
             yield chunk
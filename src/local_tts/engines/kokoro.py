@@ -1,12 +1,28 @@
 from __future__ import annotations
 
-import asyncio
 import logging
-from typing import AsyncIterator
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator
 
 import numpy as np
 
-from .base import SAMPLE_RATE, TTSEngine, VoiceInfo, float32_to_int16
+from .base import (
+    SAMPLE_RATE,
+    KokoroOptions,
+    TTSEngine,
+    VoiceInfo,
+    WarmupOptions,
+    float32_to_int16,
+)
+from .batching import MicroBatcher
+from .cache import LRUCache
+from .text import split_sentences
+from .scheduler import InferenceScheduler
+from .warmup import compile_modules, run_warmup
 
 logger = logging.getLogger(__name__)
 
@@ -43,9 +59,143 @@ KOKORO_VOICES = [
 ]
 
 
+KOKORO_REPO_ID = "hexgrad/Kokoro-82M"
+# KPipeline's default split_pattern
+KOKORO_SPLIT_PATTERN = r"\n+"
+# KModel submodules compiled with WarmupOptions.compile: the ALBERT text
+# encoder and the vocoder, which dominate inference time.
+KOKORO_COMPILE_MODULES = ("bert", "decoder")
+# Voice packs (or blends, e.g. "af_heart,af_bella") kept on the model's
+# device. Large enough for every listed voice.
+KOKORO_VOICE_PACK_CACHE_SIZE = 64
+
+
+def voice_lang_code(voice_id: str) -> str:
+    """Kokoro language code for a voice, e.g. "b" (British English) for bf_emma."""
+    return voice_id[:1].lower() or "a"
+
+_G2P_END = object()
+
+
+@dataclass
+class _BatchItem:
+    phonemes: str
+    ref_s: Any  # torch.FloatTensor, style vector of shape [1, 256]
+    speed: float
+
+
+@dataclass
+class _FrontEnd:
+    """Text front-end outputs for one sequence, ready for decoding."""
+
+    duration: Any  # [n] predicted frames per token, before rounding
+    d: Any  # [n, d_hid + style_dim] duration predictor features
+    t_en: Any  # [hidden_dim, n] text encoder output
+    ref_s: Any  # [1, 256] style vector
+
+
+def _front_end_batch(model, items: list[_BatchItem]) -> list[_FrontEnd]:
+    """Run the text front-end of a KModel on several sequences as one padded batch.
+
+    KModel.forward_with_tokens assumes a batch of one; this is its first
+    half (PL-BERT, duration predictor and text encoder) with padding and
+    masks, returning each sequence's outputs unpadded.
+    """
+    import torch
+    from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
+
+    device = model.device
+    ids = [
+        [0, *(i for i in map(model.vocab.get, item.phonemes) if i is not None), 0]
+        for item in items
+    ]
+    lengths = torch.tensor([len(seq) for seq in ids], dtype=torch.long)
+    max_len = int(lengths.max())
+    input_ids = torch.zeros((len(ids), max_len), dtype=torch.long)
+    for row, seq in enumerate(ids):
+        input_ids[row, : len(seq)] = torch.tensor(seq, dtype=torch.long)
+    input_ids = input_ids.to(device)
+    text_mask = (torch.arange(max_len).unsqueeze(0) + 1 > lengths.unsqueeze(1)).to(device)
+    ref_s = torch.cat([item.ref_s for item in items]).to(device)
+    speed = torch.tensor([item.speed for item in items], device=device).unsqueeze(1)
+    s = ref_s[:, 128:]
+
+    with torch.no_grad():
+        bert_dur = model.bert(input_ids, attention_mask=(~text_mask).int())
+        d_en = model.bert_encoder(bert_dur).transpose(-1, -2)
+        d = model.predictor.text_encoder(d_en, s, lengths, text_mask)
+        x = pack_padded_sequence(d, lengths, batch_first=True, enforce_sorted=False)
+        x, _ = model.predictor.lstm(x)
+        x, _ = pad_packed_sequence(x, batch_first=True, total_length=max_len)
+        duration = torch.sigmoid(model.predictor.duration_proj(x)).sum(axis=-1) / speed
+        t_en = model.text_encoder(input_ids, lengths, text_mask)
+
+    return [
+        _FrontEnd(
+            duration=duration[row, :n],
+            d=d[row, :n],
+            t_en=t_en[row, :, :n],
+            ref_s=ref_s[row : row + 1],
+        )
+        for row, n in enumerate(lengths.tolist())
+    ]
+
+
+def _decode(model, front: _FrontEnd) -> np.ndarray:
+    """The second half of KModel.forward_with_tokens for one sequence.
+
+    Alignment, F0/noise prediction and the vocoder produce a different
+    length per sequence and dominate inference time, so they run on the
+    requesting worker thread, concurrently with other requests.
+    """
+    import torch
+
+    device = model.device
+    n = front.duration.shape[0]
+    s = front.ref_s[:, 128:]
+    with torch.no_grad():
+        pred_dur = torch.round(front.duration).clamp(min=1).long()
+        indices = torch.repeat_interleave(torch.arange(n, device=device), pred_dur)
+        aln = torch.zeros((n, indices.shape[0]), device=device)
+        aln[indices, torch.arange(indices.shape[0], device=device)] = 1
+        aln = aln.unsqueeze(0)
+        en = front.d.unsqueeze(0).transpose(-1, -2) @ aln
+        f0, noise = model.predictor.F0Ntrain(en, s)
+        asr = front.t_en.unsqueeze(0) @ aln
+        audio = model.decoder(asr, f0, noise, front.ref_s[:, :128]).squeeze()
+    return audio.cpu().numpy()
+
+
 class KokoroEngine:
-    def __init__(self) -> None:
-        self._pipeline = None
+    def __init__(
+        self,
+        options: KokoroOptions | None = None,
+        scheduler: InferenceScheduler | None = None,
+        warmup: WarmupOptions | None = None,
+        workers: int | None = None,
+    ) -> None:
+        self._options = options or KokoroOptions()
+        self._warmup = warmup or WarmupOptions()
+        self._model = None
+        # lang_code -> G2P-only KPipeline, created on first use; all share
+        # self._model for inference.
+        self._pipelines: dict[str, Any] = {}
+        self._voice_packs: LRUCache[str, Any] = LRUCache(KOKORO_VOICE_PACK_CACHE_SIZE)
+        self._batcher: MicroBatcher[_BatchItem, _FrontEnd] | None = None
+        # (lang_code, sentence) -> phoneme strings, one per model chunk
+        self._g2p_cache: LRUCache[tuple[str, str], tuple[str, ...]] = LRUCache(
+            self._options.g2p_cache_size
+        )
+        self._load_lock = threading.Lock()
+        # None in an engine worker process, which runs _generate_sync on its
+        # own ``workers`` threads; otherwise a default one is built on first use.
+        self.scheduler = scheduler
+        self._workers = workers or (scheduler.workers if scheduler is not None else 1)
+        # One G2P thread per inference worker, so a request's G2P stage never
+        # waits behind another request's.
+        self._g2p_executor = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="kokoro-g2p"
+        )
 
     @property
     def name(self) -> str:
@@ -55,27 +205,156 @@ class KokoroEngine:
         return list(KOKORO_VOICES)
 
     def _ensure_pipeline(self):
-        if self._pipeline is not None:
-            return
+        with self._load_lock:
+            if self._model is not None:
+                return
+            import torch
+            from kokoro import KModel
+
+            logger.info("Loading Kokoro pipeline...")
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            self._model = KModel(repo_id=KOKORO_REPO_ID).to(device).eval()
+            if self._warmup.compile:
+                compile_modules(self._model, KOKORO_COMPILE_MODULES, self._warmup.cache_dir)
+            if self._options.batch_window_ms > 0 and self._workers < 2:
+                logger.warning("Kokoro batching needs more than one worker; not batching")
+            elif self._options.batch_window_ms > 0:
+                self._batcher = MicroBatcher(
+                    self.name,
+                    lambda items: _front_end_batch(self._model, items),
+                    window=self._options.batch_window_ms / 1000,
+                    max_batch_size=self._options.max_batch_size,
+                )
+            logger.info("Kokoro pipeline loaded")
+
+    def _get_pipeline(self, lang_code: str):
+        """The G2P-only pipeline for a language, created on first use.
+
+        Inference goes through self._infer (so it can be batched across
+        requests) with the one shared model, so a language only costs its
+        G2P resources.
+        """
+        pipeline = self._pipelines.get(lang_code)
+        if pipeline is None:
+            with self._load_lock:
+                pipeline = self._pipelines.get(lang_code)
+                if pipeline is None:
+                    from kokoro import KPipeline
+
+                    logger.info("Loading Kokoro G2P for language %r", lang_code)
+                    pipeline = KPipeline(lang_code=lang_code, repo_id=KOKORO_REPO_ID, model=False)
+                    self._pipelines[lang_code] = pipeline
+        return pipeline
+
+    def _voice_pack(self, voice_id: str):
+        """The voice's style vectors, loaded once and kept on the model's device."""
+        pack = self._voice_packs.get(voice_id)
+        if pack is None:
+            pipeline = self._get_pipeline(voice_lang_code(voice_id))
+            pack = pipeline.load_voice(voice_id).to(self._model.device)
+            # KPipeline keeps its own CPU copy; ours is the one that is used.
+            getattr(pipeline, "voices", {}).pop(voice_id, None)
+            self._voice_packs.put(voice_id, pack)
+        return pack
+
+    def preload_voices(self) -> None:
+        """Load the pack of every listed voice, so no request waits on one."""
+        for voice in KOKORO_VOICES:
+            try:
+                self._voice_pack(voice.id)
+            except Exception as e:
+                logger.warning("Could not preload Kokoro voice %s: %s", voice.id, e)
+
+    def _infer(self, phonemes: str, voice_id: str, speed: float) -> np.ndarray:
         from kokoro import KPipeline
 
-        logger.info("Loading Kokoro pipeline...")
-        self._pipeline = KPipeline(lang_code="a")
-        logger.info("Kokoro pipeline loaded")
+        pack = self._voice_pack(voice_id)
+        if self._batcher is not None:
+            ref_s = pack[len(phonemes) - 1]
+            front = self._batcher.submit(_BatchItem(phonemes, ref_s, speed))
+            return _decode(self._model, front)
+        output = KPipeline.infer(self._model, phonemes, pack, speed)
+        return output.audio.cpu().numpy()
+
+    def _phonemize(self, text: str, lang_code: str = "a") -> Iterator[str]:
+        """Yield the phoneme string of each model chunk, memoizing G2P per sentence."""
+        pipeline = self._get_pipeline(lang_code)
+        # Split the way KPipeline does, then into sentences, so G2P can run
+        # ahead of inference within a paragraph and repeated sentences hit
+        # the cache.
+        segments = (
+            sentence
+            for paragraph in re.split(KOKORO_SPLIT_PATTERN, text.strip())
+            for sentence in split_sentences(paragraph)
+        )
+        for segment in segments:
+            key = (lang_code, segment)
+            phonemes = self._g2p_cache.get(key)
+            if phonemes is None:
+                phonemes = tuple(r.phonemes for r in pipeline(segment) if r.phonemes)
+                self._g2p_cache.put(key, phonemes)
+            yield from phonemes
+
+    def _phonemize_ahead(self, text: str, lang_code: str = "a") -> Iterator[str]:
+        """Run G2P in its own thread, up to ``g2p_lookahead`` chunks ahead.
+
+        This overlaps text processing of upcoming chunks with acoustic
+        inference of the current one.
+        """
+        handoff: queue.Queue = queue.Queue(self._options.g2p_lookahead)
+        stop = threading.Event()
 
-    def _generate_sync(self, text: str, voice_id: str, speed: float) -> list[np.ndarray]:
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    handoff.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce() -> None:
+            try:
+                for phonemes in self._phonemize(text, lang_code):
+                    if not put(phonemes):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(_G2P_END)
+
+        self._g2p_executor.submit(produce)
+        try:
+            while (item := handoff.get()) is not _G2P_END:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    def _generate_sync(self, text: str, voice_id: str, speed: float) -> Iterator[np.ndarray]:
         self._ensure_pipeline()
-        chunks = []
-        for _graphemes, _phonemes, audio in self._pipeline(
-            text, voice=voice_id, speed=speed
-        ):
-            # Kokoro yields torch.Tensor float32 — convert to numpy first
-            audio_np = audio.cpu().numpy() if hasattr(audio, "numpy") else np.asarray(audio)
-            chunks.append(float32_to_int16(audio_np))
-        return chunks
+        lang_code = voice_lang_code(voice_id)
+        if self._options.g2p_lookahead > 0:
+            phonemized = self._phonemize_ahead(text, lang_code)
+        else:
+            phonemized = self._phonemize(text, lang_code)
+        for phonemes in phonemized:
+            yield float32_to_int16(self._infer(phonemes, voice_id, speed))
 
     def warmup(self) -> None:
         self._ensure_pipeline()
+        if self._options.preload_voices:
+            self.preload_voices()
+        run_warmup(self._generate_sync, self._warmup.voices_for(self), self._warmup.texts)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "batching": self._batcher.stats() if self._batcher else None,
+            "g2p_cache": self._g2p_cache.stats(),
+            "languages": sorted(self._pipelines),
+            "voice_packs": self._voice_packs.stats(),
+        }
 
     async def generate_audio_stream(
         self,
@@ -83,9 +362,7 @@ class KokoroEngine:
         voice_id: str,
         speed: float = 1.0,
     ) -> AsyncIterator[np.ndarray]:
-        loop = asyncio.get_running_loop()
-        chunks = await loop.run_in_executor(
-            None, self._generate_sync, text, voice_id, speed
-        )
-        for chunk in chunks:
+        if self.scheduler is None:
+            self.scheduler = InferenceScheduler(self.name)
+        async for chunk in self.scheduler.stream(self._generate_sync, text, voice_id, speed):
             yield chunk
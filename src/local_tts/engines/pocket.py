@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-import asyncio
 import logging
-from typing import AsyncIterator
+import os
+import re
+import tempfile
+from importlib import metadata
+from typing import Any, AsyncIterator, Iterator
 
 import numpy as np
 
-from .base import TTSEngine, VoiceInfo, float32_to_int16
+from .base import PocketOptions, TTSEngine, VoiceInfo, WarmupOptions, float32_to_int16
+from .scheduler import InferenceScheduler
+from .voice_store import VoiceStateStore
+from .warmup import compile_modules, run_warmup
 
 logger = logging.getLogger(__name__)
 
@@ -21,18 +27,49 @@ POCKET_VOICES = [
     VoiceInfo(id="azelma", name="Azelma", language="en", gender="female"),
 ]
 
+_VOICE_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# TTSModel submodules compiled with WarmupOptions.compile: the
+# autoregressive flow LM and the Mimi codec decoder.
+POCKET_COMPILE_MODULES = ("flow_lm", "mimi")
+
+
+def _model_version() -> str:
+    try:
+        return "pocket-tts-" + metadata.version("pocket-tts")
+    except metadata.PackageNotFoundError:
+        return "pocket-tts-unknown"
+
+
+def _custom_voice(name: str) -> VoiceInfo:
+    return VoiceInfo(id=name, name=name, language="en", gender="unknown")
+
 
 class PocketEngine:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        options: PocketOptions | None = None,
+        scheduler: InferenceScheduler | None = None,
+        warmup: WarmupOptions | None = None,
+    ) -> None:
+        options = options or PocketOptions()
         self._model = None
-        self._voice_states: dict[str, object] = {}
+        self._warmup = warmup or WarmupOptions()
+        # States depend on the model weights, so each release gets its own
+        # directory.
+        root = os.path.join(options.voice_dir, _model_version()) if options.voice_dir else None
+        self._voice_states = VoiceStateStore(root, options.voice_cache_size)
+        self._custom_voices = self._voice_states.keys("custom")
+        # None in an engine worker process, which runs _generate_sync on its
+        # own threads; otherwise a default one is built on first use.
+        self.scheduler = scheduler
 
     @property
     def name(self) -> str:
         return "pocket"
 
     def list_voices(self) -> list[VoiceInfo]:
-        return list(POCKET_VOICES)
+        return list(POCKET_VOICES) + [_custom_voice(name) for name in self._custom_voices]
 
     def _ensure_model(self):
         if self._model is not None:
@@ -40,27 +77,71 @@ class PocketEngine:
         from pocket_tts import TTSModel
 
         logger.info("Loading Pocket TTS model...")
-        self._model = TTSModel.load_model()
+        model = TTSModel.load_model()
+        if self._warmup.compile:
+            compile_modules(model, POCKET_COMPILE_MODULES, self._warmup.cache_dir)
+        self._model = model
         logger.info("Pocket TTS model loaded")
 
     def _get_voice_state(self, voice_id: str):
-        if voice_id not in self._voice_states:
+        def compute():
             self._ensure_model()
-            self._voice_states[voice_id] = self._model.get_state_for_audio_prompt(voice_id)
-        return self._voice_states[voice_id]
+            return self._model.get_state_for_audio_prompt(voice_id)
+
+        if any(v.id == voice_id for v in POCKET_VOICES):
+            return self._voice_states.get(f"builtin/{voice_id}", compute)
+        if _VOICE_NAME.match(voice_id):
+            try:
+                return self._voice_states.get(f"custom/{voice_id}")
+            except KeyError:
+                pass
+        # Anything else is an audio prompt path or URL, which may change
+        # behind our back, so it is only cached in memory.
+        return self._voice_states.get(f"prompt/{voice_id}", compute, persist=False)
+
+    def add_voice(self, name: str, audio: bytes) -> VoiceInfo:
+        """Register a voice from an audio prompt (e.g. a WAV file).
 
-    def _generate_sync(self, text: str, voice_id: str, speed: float) -> list[np.ndarray]:
+        The voice state is computed once and stored, replacing any custom
+        voice with the same name.
+        """
+        if not _VOICE_NAME.match(name):
+            raise ValueError(
+                f"Invalid voice name: {name!r}. Use up to 64 letters, digits, '-' or '_'"
+            )
+        if any(v.id == name for v in POCKET_VOICES):
+            raise ValueError(f"Voice name {name!r} is taken by a built-in voice")
+        self._ensure_model()
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            try:
+                state = self._model.get_state_for_audio_prompt(path)
+            except Exception as e:
+                raise ValueError(f"Could not use audio as a voice prompt: {e}") from e
+        finally:
+            os.unlink(path)
+        self._voice_states.put(f"custom/{name}", state)
+        if name not in self._custom_voices:
+            self._custom_voices.append(name)
+        logger.info("Added Pocket TTS voice %s", name)
+        return _custom_voice(name)
+
+    def _generate_sync(self, text: str, voice_id: str, speed: float) -> Iterator[np.ndarray]:
         self._ensure_model()
         voice_state = self._get_voice_state(voice_id)
-        chunks = []
         for audio_tensor in self._model.generate_audio_stream(voice_state, text):
             audio_np = audio_tensor.cpu().numpy()
             # Pocket TTS outputs float audio, convert to int16
-            chunks.append(float32_to_int16(audio_np))
-        return chunks
+            yield float32_to_int16(audio_np)
 
     def warmup(self) -> None:
         self._ensure_model()
+        run_warmup(self._generate_sync, self._warmup.voices_for(self), self._warmup.texts)
+
+    def stats(self) -> dict[str, Any]:
+        return {"voice_states": self._voice_states.stats()}
 
     async def generate_audio_stream(
         self,
@@ -68,9 +149,7 @@ class PocketEngine:
         voice_id: str,
         speed: float = 1.0,
     ) -> AsyncIterator[np.ndarray]:
-        loop = asyncio.get_running_loop()
-        chunks = await loop.run_in_executor(
-            None, self._generate_sync, text, voice_id, speed
-        )
-        for chunk in chunks:
+        if self.scheduler is None:
+            self.scheduler = InferenceScheduler(self.name)
+        async for chunk in self.scheduler.stream(self._generate_sync, text, voice_id, speed):
             yield chunk
@@ -0,0 +1,475 @@
+"""Hosting an engine in a dedicated worker process.
+
+The engine's model, Python pre/post-processing and inference threads all
+live in a child process, so none of it competes with the server's event
+loop for the GIL. Requests and control messages travel over a pipe; PCM
+comes back through a shared-memory ring buffer, one ring per worker, and is
+handed to the consumer as read-only ``np.ndarray`` views into it.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import pickle
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, AsyncIterator, Callable
+
+import numpy as np
+
+from .base import TTSEngine, VoiceInfo
+from .scheduler import InferenceScheduler
+
+logger = logging.getLogger(__name__)
+
+# How long to wait for a child to report in after it was started, and to
+# exit after being asked to.
+START_TIMEOUT = 120.0
+STOP_TIMEOUT = 10.0
+STATS_TIMEOUT = 1.0
+
+
+class EngineProcessError(RuntimeError):
+    """The worker process hosting an engine failed or exited."""
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # The parent owns the segment; keep the child's resource tracker from
+    # unlinking it (or warning about a leak) when the child exits.
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    from multiprocessing import resource_tracker
+
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+# -- Child process ------------------------------------------------------------
+
+
+class _RingWriter:
+    """Producer side of one worker's ring in the shared segment.
+
+    Positions are absolute byte counts; the parent returns space by sending
+    the end position of each chunk it is done with. A chunk never wraps:
+    if it does not fit before the end of the ring, the remainder is skipped.
+    """
+
+    def __init__(self, buf: memoryview, base: int, size: int) -> None:
+        self._buf = buf
+        self._base = base
+        self._size = size
+        self._head = 0
+        self._tail = 0
+        self._cond = threading.Condition()
+        self.cancelled = False
+
+    def release(self, end: int) -> None:
+        with self._cond:
+            self._tail = max(self._tail, end)
+            self._cond.notify()
+
+    def cancel(self) -> None:
+        with self._cond:
+            self.cancelled = True
+            self._cond.notify()
+
+    def write(self, data: np.ndarray) -> tuple[int, int] | None:
+        """Copy data into the ring, blocking for space.
+
+        Returns ``(offset, end)``, or None if the caller must send data some
+        other way: when it is larger than the ring (this returns once the
+        parent has released everything, so at most one oversized chunk is
+        ever in flight), or when it only fits by wrapping while earlier
+        chunks are still in use. Also returns None once cancelled.
+        """
+        n = data.nbytes
+        with self._cond:
+            while True:
+                if self.cancelled:
+                    return None
+                used = self._head - self._tail
+                if used == 0:
+                    # Nothing in use: start over at the beginning of the ring.
+                    self._head = self._tail = -(-self._head // self._size) * self._size
+                pos = self._head % self._size
+                pad = self._size - pos if self._size - pos < n else 0
+                if n > self._size:
+                    if used == 0:
+                        return None
+                elif pad + n > self._size:
+                    return None
+                elif self._size - used >= pad + n:
+                    break
+                self._cond.wait()
+        offset = self._base + (0 if pad else pos)
+        self._buf[offset:offset + n] = data.view(np.uint8).reshape(-1)
+        self._head += pad + n
+        return offset, self._head
+
+
+def _worker_main(
+    conn,
+    factory: Callable[..., Any],
+    factory_args: tuple,
+    shm_name: str,
+    slots: int,
+    slot_bytes: int,
+) -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    shm = _attach(shm_name)
+    engine = factory(*factory_args)
+    send_lock = threading.Lock()
+    executor = ThreadPoolExecutor(max_workers=slots, thread_name_prefix=f"proc-{engine.name}")
+    requests: dict[int, _RingWriter] = {}
+
+    def send(msg) -> None:
+        with send_lock:
+            conn.send(msg)
+
+    def generate(rid: int, writer: _RingWriter, text: str, voice_id: str, speed: float) -> None:
+        try:
+            gen = engine._generate_sync(text, voice_id, speed)
+            try:
+                for chunk in gen:
+                    chunk = np.ascontiguousarray(chunk, dtype=np.int16)
+                    placed = writer.write(chunk)
+                    if writer.cancelled:
+                        break
+                    if placed is None:
+                        send(("data", rid, chunk))
+                    else:
+                        send(("chunk", rid, placed[0], chunk.nbytes, placed[1]))
+            finally:
+                gen.close()
+        except Exception as e:
+            try:
+                pickle.dumps(e)
+            except Exception:
+                e = EngineProcessError(f"{type(e).__name__}: {e}")
+            send(("error", rid, e))
+        else:
+            send(("end", rid))
+        finally:
+            requests.pop(rid, None)
+
+    def call(rid: int, method: str, args: tuple) -> None:
+        try:
+            if method == "warmup":
+                engine.warmup()
+                result = None
+            elif method == "add_voice":
+                result = engine.add_voice(*args)
+            else:
+                result = engine.stats() if hasattr(engine, "stats") else {}
+        except Exception as e:
+            # ValueErrors and the like reach the caller as they are.
+            try:
+                pickle.dumps(e)
+            except Exception:
+                e = EngineProcessError(f"{type(e).__name__}: {e}")
+            send(("error", rid, e))
+        else:
+            send(("result", rid, result))
+
+    send(("ready", engine.name, getattr(engine, "variant", ""), engine.list_voices()))
+    try:
+        while (msg := conn.recv()) is not None:
+            kind, rid = msg[0], msg[1]
+            if kind == "generate":
+                slot, text, voice_id, speed = msg[2:]
+                writer = _RingWriter(shm.buf, slot * slot_bytes, slot_bytes)
+                requests[rid] = writer
+                executor.submit(generate, rid, writer, text, voice_id, speed)
+            elif kind == "release":
+                if (writer := requests.get(rid)) is not None:
+                    writer.release(msg[2])
+            elif kind == "cancel":
+                if (writer := requests.get(rid)) is not None:
+                    writer.cancel()
+            elif kind == "call":
+                method, args = msg[2], msg[3]
+                # Stats are cheap; warmup and adding voices may take a while.
+                if method == "stats":
+                    call(rid, method, args)
+                else:
+                    threading.Thread(target=call, args=(rid, method, args), daemon=True).start()
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for writer in list(requests.values()):
+            writer.cancel()
+        executor.shutdown(wait=True)
+        shm.close()
+
+
+# -- Parent process -----------------------------------------------------------
+
+
+class ProcessEngine:
+    """A TTSEngine whose inference runs in a dedicated worker process.
+
+    ``factory(*factory_args)`` is called in the child to build the real
+    engine, so both must be picklable (e.g. a module-level function). Up to
+    ``workers`` requests run concurrently, each with its own ring of
+    ``ring_bytes`` in shared memory.
+
+    Chunks yielded by ``generate_audio_stream`` are views into the ring and
+    are only valid until the next chunk is requested; copy them to keep them.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[..., TTSEngine],
+        factory_args: tuple = (),
+        *,
+        name: str,
+        scheduler: InferenceScheduler | None = None,
+        ring_bytes: int = 4 * 1024 * 1024,
+    ) -> None:
+        self.scheduler = scheduler or InferenceScheduler(name)
+        self._name = name
+        self._ring_bytes = ring_bytes
+        slots = self.scheduler.workers
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * ring_bytes)
+        self._free_slots = list(range(slots))
+        self._slot_waiters: list[asyncio.Future[None]] = []
+        self._ids = itertools.count()
+        self._handlers: dict[int, Callable[[tuple], None]] = {}
+        self._send_lock = threading.Lock()
+        self._closed = False
+        # Set once the child reports in (or exits); see wait_ready.
+        self._ready = threading.Event()
+        self._start_error: Exception | None = None
+        self._variant = ""
+        self._voices: list[VoiceInfo] = []
+
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, factory, factory_args, self._shm.name, slots, ring_bytes),
+            name=f"tts-{name}",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+
+        # The child builds its engine while the server starts up; callers
+        # that need it wait in wait_ready.
+        self._reader = threading.Thread(target=self._read_loop, name=f"proc-{name}-reader", daemon=True)
+        self._reader.start()
+        logger.info("Started engine process for %s (pid %d)", name, self._process.pid)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def variant(self) -> str:
+        self.wait_ready()
+        return self._variant
+
+    @property
+    def pid(self) -> int | None:
+        return self._process.pid
+
+    def wait_ready(self) -> None:
+        """Block until the child has built its engine.
+
+        Raises EngineProcessError if it does not within START_TIMEOUT or
+        exits first, stopping the process.
+        """
+        if not self._ready.wait(START_TIMEOUT):
+            self.close()
+            raise EngineProcessError(f"Engine process for {self._name!r} did not start")
+        if self._start_error is not None:
+            raise self._start_error
+
+    def list_voices(self) -> list[VoiceInfo]:
+        self.wait_ready()
+        return list(self._voices)
+
+    def _send(self, msg) -> None:
+        if self._closed:
+            raise EngineProcessError(f"Engine process for {self._name!r} is not running")
+        with self._send_lock:
+            self._conn.send(msg)
+
+    def _read_loop(self) -> None:
+        try:
+            while True:
+                msg = self._conn.recv()
+                if msg[0] == "ready":
+                    self._on_ready(msg)
+                    continue
+                handler = self._handlers.get(msg[1])
+                if handler is not None:
+                    handler(msg)
+        except (EOFError, OSError):
+            pass
+        if not self._closed:
+            logger.error("Engine process for %s exited unexpectedly", self._name)
+        self._closed = True
+        if not self._ready.is_set():
+            self._start_error = EngineProcessError(
+                f"Engine process for {self._name!r} exited during startup"
+            )
+            self._ready.set()
+        error = EngineProcessError(f"Engine process for {self._name!r} exited")
+        for rid, handler in list(self._handlers.items()):
+            handler(("error", rid, error))
+
+    def _on_ready(self, msg: tuple) -> None:
+        _, child_name, self._variant, self._voices = msg
+        if child_name != self._name:
+            self._start_error = ValueError(
+                f"Engine process built {child_name!r}, expected {self._name!r}"
+            )
+        else:
+            logger.info("Engine process for %s is ready", self._name)
+        self._ready.set()
+
+    def _call(self, method: str, *args: Any, timeout: float | None = None) -> Any:
+        rid = next(self._ids)
+        fut: Future = Future()
+
+        def handle(msg: tuple) -> None:
+            self._handlers.pop(rid, None)
+            if msg[0] == "error":
+                fut.set_exception(msg[2])
+            else:
+                fut.set_result(msg[2])
+
+        self._handlers[rid] = handle
+        self._send(("call", rid, method, args))
+        return fut.result(timeout)
+
+    def warmup(self) -> None:
+        self.wait_ready()
+        self._call("warmup")
+
+    def add_voice(self, name: str, audio: bytes) -> VoiceInfo:
+        self.wait_ready()
+        info = self._call("add_voice", name, audio)
+        self._voices = [v for v in self._voices if v.id != info.id] + [info]
+        return info
+
+    def stats(self) -> dict[str, Any]:
+        result: dict[str, Any] = {"pid": self._process.pid, "alive": self._process.is_alive()}
+        if not self._ready.is_set():
+            result["starting"] = True
+        elif not self._closed:
+            try:
+                result.update(self._call("stats", timeout=STATS_TIMEOUT))
+            except Exception:
+                logger.warning("Could not get stats from engine process %s", self._name)
+        return result
+
+    async def _acquire_slot(self) -> int:
+        while not self._free_slots:
+            fut = asyncio.get_running_loop().create_future()
+            self._slot_waiters.append(fut)
+            try:
+                await fut
+            finally:
+                if fut in self._slot_waiters:
+                    self._slot_waiters.remove(fut)
+        return self._free_slots.pop()
+
+    def _release_slot(self, slot: int) -> None:
+        self._free_slots.append(slot)
+        while self._slot_waiters:
+            fut = self._slot_waiters.pop(0)
+            if not fut.done():
+                fut.set_result(None)
+                break
+
+    async def generate_audio_stream(
+        self,
+        text: str,
+        voice_id: str,
+        speed: float = 1.0,
+    ) -> AsyncIterator[np.ndarray]:
+        if not self._ready.is_set():
+            await asyncio.to_thread(self.wait_ready)
+        async with self.scheduler.slot():
+            # A cancelled request holds on to its ring until the child
+            # acknowledges, so this may briefly wait even with a free worker.
+            slot = await self._acquire_slot()
+            rid = next(self._ids)
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue[tuple] = asyncio.Queue()
+
+            def handle(msg: tuple) -> None:
+                if msg[0] in ("end", "error"):
+                    self._handlers.pop(rid, None)
+                    loop.call_soon_threadsafe(self._release_slot, slot)
+                loop.call_soon_threadsafe(queue.put_nowait, msg)
+
+            self._handlers[rid] = handle
+            try:
+                self._send(("generate", rid, slot, text, voice_id, speed))
+            except BaseException:
+                self._handlers.pop(rid, None)
+                self._release_slot(slot)
+                raise
+
+            finished = False
+            try:
+                while True:
+                    msg = await queue.get()
+                    kind = msg[0]
+                    if kind == "chunk":
+                        _, _, offset, nbytes, end = msg
+                        chunk = np.ndarray(
+                            (nbytes // 2,), dtype=np.int16, buffer=self._shm.buf, offset=offset
+                        )
+                        chunk.flags.writeable = False
+                        yield chunk
+                        self._send(("release", rid, end))
+                    elif kind == "data":
+                        yield msg[2]
+                    elif kind == "end":
+                        finished = True
+                        return
+                    else:
+                        finished = True
+                        raise msg[2]
+            finally:
+                if not finished and not self._closed:
+                    self._send(("cancel", rid))
+
+    def close(self) -> None:
+        """Stop the worker process and free the shared memory."""
+        if not self._closed:
+            self._closed = True
+            try:
+                with self._send_lock:
+                    self._conn.send(None)
+            except (OSError, ValueError):
+                pass
+        self._process.join(STOP_TIMEOUT)
+        if self._process.is_alive():
+            logger.warning("Engine process for %s did not exit, terminating", self._name)
+            self._process.terminate()
+            self._process.join()
+        self._conn.close()
+        try:
+            self._shm.close()
+        except BufferError:
+            # A consumer still holds a chunk view; the mapping goes away
+            # with the last one, and unlinking below still frees the name.
+            logger.warning("Chunks from engine process %s are still in use", self._name)
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
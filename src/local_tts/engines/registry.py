@@ -1,20 +1,145 @@
 from __future__ import annotations
 
+import asyncio
+import concurrent.futures
 import logging
+import threading
+import time
 from typing import Any
 
-from .base import ModelOptions, TTSEngine
+from ..metrics import (
+    G2P_CACHE_HITS,
+    G2P_CACHE_MISSES,
+    REPLICA_DISPATCHED,
+    REPLICA_IN_FLIGHT,
+    REPLICA_QUEUE_DEPTH,
+    SCHEDULER_IN_FLIGHT,
+    SCHEDULER_QUEUE_DEPTH,
+    SCHEDULER_REJECTED,
+    SCHEDULER_TIMEOUTS,
+    get_metrics,
+)
+from .base import ModelOptions, TTSEngine, VoiceInfo
+from .cache import get_audio_cache
+from .replicas import ReplicaSet, configure_replica, plan_cpus
+from .scheduler import EngineBusyError, InferenceScheduler
 
 logger = logging.getLogger(__name__)
 
 
+class EngineLoadError(EngineBusyError):
+    """The engine failed to load; the next request retries loading it."""
+
+
 class EngineRegistry:
     def __init__(self) -> None:
         self._engines: dict[str, TTSEngine] = {}
+        self._loads: dict[str, concurrent.futures.Future[None]] = {}
+        self._load_seconds: dict[str, float] = {}
+        # name -> ids of the engine's listed voices, see voice_ids
+        self._voice_ids: dict[str, frozenset[str]] = {}
+        self._lock = threading.Lock()
 
     def register(self, engine: TTSEngine) -> None:
         logger.info("Registering TTS engine: %s", engine.name)
         self._engines[engine.name] = engine
+        self._voice_ids.pop(engine.name, None)
+        with self._lock:
+            self._loads.pop(engine.name, None)
+
+    def unregister(self, name: str) -> None:
+        self._engines.pop(name, None)
+        self._voice_ids.pop(name, None)
+        with self._lock:
+            self._loads.pop(name, None)
+
+    def load(self, name: str) -> concurrent.futures.Future[None]:
+        """Start warming up an engine in a background thread.
+
+        Returns the load future; while a load is in progress or has
+        succeeded, every call returns the same one. A failed load is
+        retried by the next call.
+        """
+        engine = self.get(name)
+        with self._lock:
+            fut = self._loads.get(name)
+            if fut is not None and not (fut.done() and fut.exception() is not None):
+                return fut
+            fut = concurrent.futures.Future()
+            # A running future cannot be cancelled by one of its waiters.
+            fut.set_running_or_notify_cancel()
+            self._loads[name] = fut
+
+        def run() -> None:
+            start = time.monotonic()
+            try:
+                engine.warmup()
+            except Exception as e:
+                logger.exception("Failed to load engine %s", name)
+                fut.set_exception(EngineLoadError(f"Engine {name!r} failed to load: {e}"))
+            else:
+                self._load_seconds[name] = time.monotonic() - start
+                logger.info("Loaded engine %s in %.1fs", name, self._load_seconds[name])
+                fut.set_result(None)
+
+        threading.Thread(target=run, name=f"load-{name}", daemon=True).start()
+        return fut
+
+    def load_all(self) -> list[concurrent.futures.Future[None]]:
+        """Start loading every registered engine, all in parallel."""
+        return [self.load(name) for name in self._engines]
+
+    async def ensure_loaded(self, name: str) -> None:
+        """Wait until an engine is loaded, starting the load if needed.
+
+        Raises EngineLoadError if loading fails.
+        """
+        if name not in self._engines:
+            return
+        fut = self._loads.get(name)
+        if fut is None or not fut.done() or fut.exception() is not None:
+            fut = self.load(name)
+        if not fut.done():
+            await asyncio.wrap_future(fut)
+        fut.result()
+
+    async def voice_ids(self, name: str) -> frozenset[str]:
+        """Ids of an engine's listed voices, remembered until one is added.
+
+        Only the first call goes to a thread: an engine process that is
+        still starting only knows its voices once it reports in.
+        """
+        ids = self._voice_ids.get(name)
+        if ids is None:
+            voices = await asyncio.to_thread(self.get(name).list_voices)
+            ids = self._voice_ids[name] = frozenset(v.id for v in voices)
+        return ids
+
+    async def add_voice(self, name: str, voice_name: str, audio: bytes) -> VoiceInfo:
+        """Register a voice from an audio prompt on an engine's replicas.
+
+        The prompt runs through each replica's scheduler like any other
+        inference. Audio cached for an earlier voice of the same name is
+        dropped.
+        """
+        engine = self.get(name)
+        replicas = engine.replicas if isinstance(engine, ReplicaSet) else [engine]
+        voices = await asyncio.gather(
+            *(r.scheduler.run(r.add_voice, voice_name, audio) for r in replicas)
+        )
+        get_audio_cache().discard_voice(engine.name, voice_name)
+        self._voice_ids.pop(name, None)
+        return voices[0]
+
+    def load_state(self, name: str) -> dict[str, Any]:
+        fut = self._loads.get(name)
+        if fut is None:
+            return {"state": "unloaded"}
+        if not fut.done():
+            return {"state": "loading"}
+        if fut.exception() is not None:
+            return {"state": "failed", "error": str(fut.exception())}
+        return {"state": "ready", "load_seconds": self._load_seconds.get(name)}
 
     def get(self, name: str) -> TTSEngine:
         if name not in self._engines:
@@ -32,43 +157,179 @@ class EngineRegistry:
     def engine_names(self) -> list[str]:
         return list(self._engines.keys())
 
+    def close(self) -> None:
+        """Release engine resources, such as worker processes."""
+        for engine in self._engines.values():
+            if hasattr(engine, "close"):
+                engine.close()
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-engine runtime stats (queue depth, wait times, batching, ...)."""
+        result: dict[str, dict[str, Any]] = {}
+        for name, engine in self._engines.items():
+            entry: dict[str, Any] = {}
+            if hasattr(engine, "scheduler"):
+                entry.update(engine.scheduler.stats())
+            if hasattr(engine, "stats"):
+                entry.update(engine.stats())
+            result[name] = entry
+        return result
+
+    def collect_metrics(self) -> None:
+        """Copy the engines' scheduler, replica and G2P cache counters into the metrics."""
+        for name, engine in self._engines.items():
+            scheduler = getattr(engine, "scheduler", None)
+            if scheduler is not None:
+                _set_scheduler_metrics(name, [scheduler.stats()])
+            if not hasattr(engine, "stats"):
+                continue
+            stats = engine.stats()
+            replicas = stats.get("replicas", [])
+            if replicas and scheduler is None:
+                # A replica set has no scheduler of its own: report the sum.
+                _set_scheduler_metrics(name, replicas)
+            for i, entry in enumerate(replicas):
+                labels = (name, str(i))
+                REPLICA_QUEUE_DEPTH.set(entry["queue_depth"], *labels)
+                REPLICA_IN_FLIGHT.set(entry["in_flight"], *labels)
+                REPLICA_DISPATCHED.set(entry["dispatched"], *labels)
+            g2p = [
+                entry["g2p_cache"]
+                for entry in stats.get("replicas", [stats])
+                if entry.get("g2p_cache")
+            ]
+            if g2p:
+                G2P_CACHE_HITS.set(sum(c["hits"] for c in g2p), name)
+                G2P_CACHE_MISSES.set(sum(c["misses"] for c in g2p), name)
+
+
+def _set_scheduler_metrics(name: str, stats: list[dict[str, Any]]) -> None:
+    SCHEDULER_QUEUE_DEPTH.set(sum(s["queue_depth"] for s in stats), name)
+    SCHEDULER_IN_FLIGHT.set(sum(s["in_flight"] for s in stats), name)
+    SCHEDULER_REJECTED.set(sum(s["rejected"] for s in stats), name)
+    SCHEDULER_TIMEOUTS.set(sum(s["timeouts"] for s in stats), name)
+
 
 _registry = EngineRegistry()
+get_metrics().add_collector(_registry.collect_metrics)
 
 
 def get_registry() -> EngineRegistry:
     return _registry
 
 
+ENGINE_NAMES = ("kokoro", "pocket", "kitten")
+
+
+def create_engine(
+    name: str,
+    model_options: ModelOptions,
+    scheduler: InferenceScheduler | None = None,
+    threads: int = 0,
+    cpus: list[int] | None = None,
+    hosted: bool = False,
+) -> TTSEngine:
+    """Build one engine in this process from the model options.
+
+    ``threads`` and ``cpus`` configure the whole process (see
+    configure_replica), so they are only passed in engine worker processes.
+    A ``hosted`` engine is built for such a process, which runs
+    ``_generate_sync`` on its own threads, so it gets no scheduler.
+    """
+    if threads or cpus:
+        configure_replica(threads, cpus)
+    if not hosted:
+        scheduler = scheduler or InferenceScheduler.from_options(name, model_options.scheduler)
+    if name == "kokoro":
+        from .kokoro import KokoroEngine
+
+        return KokoroEngine(
+            options=model_options.kokoro,
+            scheduler=scheduler,
+            warmup=model_options.warmup,
+            workers=model_options.scheduler.workers,
+        )
+    if name == "pocket":
+        from .pocket import PocketEngine
+
+        return PocketEngine(
+            options=model_options.pocket, scheduler=scheduler, warmup=model_options.warmup
+        )
+    if name == "kitten":
+        from .kitten import KittenEngine
+
+        return KittenEngine(
+            model_size=model_options.kitten.model_size,
+            scheduler=scheduler,
+            warmup=model_options.warmup,
+        )
+    raise ValueError(f"Unknown engine: {name!r}. Available: {', '.join(ENGINE_NAMES)}")
+
+
 def initialize_engines(model_options: ModelOptions | None = None) -> None:
     if model_options is None:
         model_options = ModelOptions()
 
-    disabled = model_options.disabled
+    cache = get_audio_cache()
+    cache.granularity = model_options.cache.granularity
+    cache.resize(model_options.cache.max_bytes)
 
-    from .kitten import KittenEngine
-    from .kokoro import KokoroEngine
-    from .pocket import PocketEngine
+    replica_options = model_options.replicas
+    unknown = set(replica_options.counts) - set(ENGINE_NAMES)
+    if unknown:
+        raise ValueError(
+            f"Unknown engine in replica counts: {', '.join(sorted(unknown))}. "
+            f"Available: {', '.join(ENGINE_NAMES)}"
+        )
+    names = [name for name in ENGINE_NAMES if name not in model_options.disabled]
+    counts = {name: max(1, replica_options.counts.get(name, 1)) for name in names}
 
-    engines = []
+    in_process = not model_options.process.enabled
+    cpu_sets = None
+    if replica_options.cpu_affinity:
+        if in_process:
+            logger.warning("CPU affinity needs engine processes; ignoring it")
+        else:
+            cpu_sets = iter(plan_cpus(sum(counts.values())))
+    if in_process and replica_options.torch_threads:
+        # One process: all replicas share torch's thread pool.
+        configure_replica(replica_options.torch_threads)
 
-    if "kokoro" not in disabled:
-        kokoro = KokoroEngine()
-        _registry.register(kokoro)
-        engines.append(kokoro)
+    engines = []
+    for name in names:
+        replicas = []
+        for i in range(counts[name]):
+            label = name if counts[name] == 1 else f"{name}-{i}"
+            scheduler = InferenceScheduler.from_options(label, model_options.scheduler)
+            if in_process:
+                replicas.append(create_engine(name, model_options, scheduler))
+                continue
 
-    if "pocket" not in disabled:
-        pocket = PocketEngine()
-        _registry.register(pocket)
-        engines.append(pocket)
+            from .process import ProcessEngine
 
-    if "kitten" not in disabled:
-        kitten = KittenEngine(model_size=model_options.kitten.model_size)
-        _registry.register(kitten)
-        engines.append(kitten)
+            cpus = next(cpu_sets) if cpu_sets is not None else None
+            threads = replica_options.torch_threads or (len(cpus) if cpus else 0)
+            if cpus:
+                logger.info("Pinning %s to CPUs %s with %d threads", label, cpus, threads)
+            replicas.append(
+                ProcessEngine(
+                    create_engine,
+                    (name, model_options, None, threads, cpus, True),
+                    name=name,
+                    scheduler=scheduler,
+                    ring_bytes=model_options.process.ring_bytes,
+                )
+            )
+        engine = replicas[0] if len(replicas) == 1 else ReplicaSet(replicas)
+        _registry.register(engine)
+        engines.append(engine)
 
     if model_options.preload and engines:
+        futures = _registry.load_all()
+        if model_options.background_load:
+            logger.info("Loading models in the background")
+            return
         logger.info("Preloading models (this may take a while on first run)...")
-        for engine in engines:
-            engine.warmup()
+        for fut in futures:
+            fut.result()
         logger.info("All models preloaded")
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Sequence
+
+import numpy as np
+
+from .base import TTSEngine, VoiceInfo
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_cpus(replicas: int, cpus: Sequence[int] | None = None) -> list[list[int]]:
+    """Split the available cores into one disjoint, contiguous set per replica.
+
+    Leftover cores go to the first replicas. With more replicas than cores,
+    cores are shared round-robin.
+    """
+    cpus = list(cpus if cpus is not None else available_cpus())
+    if replicas >= len(cpus):
+        return [[cpus[i % len(cpus)]] for i in range(replicas)]
+    size, extra = divmod(len(cpus), replicas)
+    plan, start = [], 0
+    for i in range(replicas):
+        end = start + size + (1 if i < extra else 0)
+        plan.append(cpus[start:end])
+        start = end
+    return plan
+
+
+def configure_replica(threads: int = 0, cpus: Sequence[int] | None = None) -> None:
+    """Apply a replica's CPU affinity and torch intra-op thread count.
+
+    Both are process-wide, so this is only meaningful in a process that
+    hosts a single replica.
+    """
+    if cpus:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+        else:
+            logger.warning("CPU affinity is not supported on this platform")
+    if threads > 0:
+        import torch
+
+        torch.set_num_threads(threads)
+
+
+class ReplicaSet:
+    """Several instances of one engine behind a single name.
+
+    Each request goes to the replica with the fewest requests running or
+    queued on its scheduler, with ties going to the one that was picked
+    least often.
+    """
+
+    def __init__(self, replicas: Sequence[TTSEngine]) -> None:
+        if not replicas:
+            raise ValueError("A replica set needs at least one replica")
+        self.replicas = list(replicas)
+        self._dispatched = [0] * len(self.replicas)
+
+    @property
+    def name(self) -> str:
+        return self.replicas[0].name
+
+    @property
+    def variant(self) -> str:
+        return getattr(self.replicas[0], "variant", "")
+
+    def list_voices(self) -> list[VoiceInfo]:
+        return self.replicas[0].list_voices()
+
+    def _load(self, i: int) -> tuple[int, int]:
+        scheduler = self.replicas[i].scheduler
+        return scheduler.in_flight + scheduler.queue_depth, self._dispatched[i]
+
+    def pick(self) -> int:
+        """Index of the least-loaded replica."""
+        return min(range(len(self.replicas)), key=self._load)
+
+    def warmup(self) -> None:
+        with ThreadPoolExecutor(max_workers=len(self.replicas)) as pool:
+            for future in [pool.submit(r.warmup) for r in self.replicas]:
+                future.result()
+
+    def add_voice(self, name: str, audio: bytes) -> VoiceInfo:
+        """Add a voice to every replica, so any of them can serve it."""
+        with ThreadPoolExecutor(max_workers=len(self.replicas)) as pool:
+            futures = [pool.submit(r.add_voice, name, audio) for r in self.replicas]
+            return [future.result() for future in futures][0]
+
+    def close(self) -> None:
+        for replica in self.replicas:
+            if hasattr(replica, "close"):
+                replica.close()
+
+    def stats(self) -> dict[str, Any]:
+        replicas = []
+        for replica, dispatched in zip(self.replicas, self._dispatched):
+            entry: dict[str, Any] = {"dispatched": dispatched}
+            entry.update(replica.scheduler.stats())
+            if hasattr(replica, "stats"):
+                entry.update(replica.stats())
+            replicas.append(entry)
+        return {
+            "replicas": replicas,
+            "in_flight": sum(r["in_flight"] for r in replicas),
+            "queue_depth": sum(r["queue_depth"] for r in replicas),
+        }
+
+    async def generate_audio_stream(
+        self,
+        text: str,
+        voice_id: str,
+        speed: float = 1.0,
+    ) -> AsyncIterator[np.ndarray]:
+        i = self.pick()
+        self._dispatched[i] += 1
+        async for chunk in self.replicas[i].generate_audio_stream(text, voice_id, speed):
+            yield chunk
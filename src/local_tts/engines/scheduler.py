@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+
+from ..metrics import QUEUE_WAIT_SECONDS
+from .base import SchedulerOptions, iterate_in_thread
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class EngineBusyError(RuntimeError):
+    """The engine cannot take the request right now; the client may retry."""
+
+
+class QueueFullError(EngineBusyError):
+    pass
+
+
+class QueueTimeoutError(EngineBusyError):
+    pass
+
+
+class InferenceScheduler:
+    """Runs an engine's blocking inference on a fixed pool of worker threads.
+
+    At most ``workers`` requests run at once. Further requests wait in a FIFO
+    queue of at most ``max_queue`` entries; they are rejected with
+    QueueFullError when it is full, and with QueueTimeoutError if they do not
+    get a worker within ``queue_timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        workers: int = 1,
+        max_queue: int = 16,
+        queue_timeout: float = 30.0,
+    ) -> None:
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"tts-{name}")
+        self._waiters: collections.deque[asyncio.Future[None]] = collections.deque()
+        self._in_flight = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @classmethod
+    def from_options(cls, name: str, options: SchedulerOptions) -> InferenceScheduler:
+        return cls(
+            name,
+            workers=options.workers,
+            max_queue=options.max_queue,
+            queue_timeout=options.queue_timeout,
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "timeouts": self._timeouts,
+            "wait_seconds_avg": self._total_wait / self._admitted if self._admitted else 0.0,
+            "wait_seconds_max": self._max_wait,
+        }
+
+    async def _acquire(self) -> float:
+        """Wait for a free worker and return the time spent queued."""
+        if self._in_flight < self.workers and not self._waiters:
+            self._in_flight += 1
+            self._admitted += 1
+            return 0.0
+
+        if len(self._waiters) >= self.max_queue:
+            self._rejected += 1
+            raise QueueFullError(
+                f"Engine {self.name!r} is busy: {len(self._waiters)} requests already queued"
+            )
+
+        start = time.monotonic()
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(fut, self.queue_timeout)
+        except BaseException as e:
+            if fut.done() and not fut.cancelled():
+                # A worker was handed to us just as we gave up; pass it on.
+                self._release()
+            elif fut in self._waiters:
+                self._waiters.remove(fut)
+            if isinstance(e, asyncio.TimeoutError):
+                self._timeouts += 1
+                raise QueueTimeoutError(
+                    f"Engine {self.name!r} is busy: no worker available "
+                    f"after {self.queue_timeout:.1f}s"
+                ) from None
+            raise
+
+        waited = time.monotonic() - start
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        return waited
+
+    def _release(self) -> None:
+        # Hand the worker straight to the oldest waiter, if any.
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the workers for the duration of the block."""
+        waited = await self._acquire()
+        QUEUE_WAIT_SECONDS.observe(waited, self.name)
+        if waited > 1.0:
+            logger.info("Request for %s waited %.2fs for a worker", self.name, waited)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def stream(self, func: Callable[..., Iterator[T]], *args) -> AsyncIterator[T]:
+        """Run a blocking generator on one of the workers, yielding its items."""
+        async with self.slot():
+            async for item in iterate_in_thread(func, *args, executor=self._executor):
+                yield item
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Run a blocking call on one of the workers."""
+        async with self.slot():
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
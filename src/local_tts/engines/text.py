@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import re
+
+# A sentence runs up to terminal punctuation (plus any closing quotes or
+# brackets) followed by whitespace, a blank line, or the end of the text.
+_SENTENCE = re.compile(r"\S.*?(?:[.!?…]+[\"'”’)\]]*(?=\s|$)|(?=\n\s*\n)|$)", re.S)
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split text into sentences, dropping empty fragments."""
+    return [m.group().strip() for m in _SENTENCE.finditer(text)]
+
+
+# The end of a sentence that is known to be complete: terminal punctuation
+# already followed by whitespace, or a blank line.
+_BOUNDARY = re.compile(r"[.!?…]+[\"'”’)\]]*\s|\n\s*\n")
+
+
+def last_sentence_end(text: str) -> int:
+    """Return the index just past the last complete sentence in text, or 0.
+
+    Unlike split_sentences, punctuation at the very end of the text does not
+    count, since more text may still follow (e.g. "3." of "3.14").
+    """
+    end = 0
+    for m in _BOUNDARY.finditer(text):
+        end = m.end()
+    return end
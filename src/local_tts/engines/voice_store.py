@@ -0,0 +1,128 @@
+"""On-disk store for computed voice states, e.g. Pocket TTS audio prompts."""
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Callable
+
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def _torch_save(state: Any, path: str) -> None:
+    import torch
+
+    torch.save(state, path)
+
+
+def _torch_load(path: str) -> Any:
+    import torch
+
+    return torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+
+
+class VoiceStateStore:
+    """Voice states in a bounded in-memory LRU, backed by files under ``root``.
+
+    Files are memory-mapped when loaded, so after a restart a voice costs a
+    page-in instead of a forward pass. Keys are relative paths such as
+    ``builtin/alba``. Without a ``root`` nothing is persisted, and states
+    added with ``put`` are pinned in memory instead.
+    """
+
+    def __init__(
+        self,
+        root: str | None,
+        max_entries: int,
+        save: Callable[[Any, str], None] = _torch_save,
+        load: Callable[[str], Any] = _torch_load,
+    ) -> None:
+        self.root = root
+        self._save = save
+        self._load = load
+        self._memory: LRUCache[str, Any] = LRUCache(max_entries)
+        self._pinned: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.loaded = 0
+        self.computed = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key + ".pt")
+
+    def _write(self, key: str, state: Any) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a crash never leaves a truncated file behind.
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            self._save(state, tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _cached(self, key: str) -> Any | None:
+        state = self._pinned.get(key)
+        return state if state is not None else self._memory.get(key)
+
+    def get(
+        self,
+        key: str,
+        compute: Callable[[], Any] | None = None,
+        persist: bool = True,
+    ) -> Any:
+        """Return the state for key from memory, disk or ``compute``.
+
+        Computed states are written to disk when ``persist`` is set. Raises
+        KeyError if the state is nowhere to be found and there is no
+        ``compute``.
+        """
+        state = self._cached(key)
+        if state is not None:
+            return state
+        with self._lock:
+            state = self._cached(key)
+            if state is not None:
+                return state
+            if self.root and persist and os.path.exists(self._path(key)):
+                state = self._load(self._path(key))
+                self.loaded += 1
+            elif compute is not None:
+                state = compute()
+                self.computed += 1
+                if self.root and persist:
+                    self._write(key, state)
+            else:
+                raise KeyError(key)
+            self._memory.put(key, state)
+        return state
+
+    def put(self, key: str, state: Any) -> None:
+        """Store a state, replacing any previous one for key."""
+        with self._lock:
+            if self.root:
+                self._write(key, state)
+                self._memory.put(key, state)
+            else:
+                self._pinned[key] = state
+
+    def keys(self, prefix: str) -> list[str]:
+        """Names of the states stored under ``prefix/``."""
+        names = {key.split("/", 1)[1] for key in self._pinned if key.startswith(prefix + "/")}
+        if self.root:
+            directory = os.path.join(self.root, prefix)
+            if os.path.isdir(directory):
+                names.update(f[:-3] for f in os.listdir(directory) if f.endswith(".pt"))
+        return sorted(names)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._memory.stats(),
+            "pinned": len(self._pinned),
+            "loaded": self.loaded,
+            "computed": self.computed,
+        }
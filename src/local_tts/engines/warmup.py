@@ -0,0 +1,59 @@
+"""Warmup inference and optional graph compilation for engines."""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import Any, Callable, Iterator, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def run_warmup(
+    generate: Callable[[str, str, float], Iterator[np.ndarray]],
+    voices: Sequence[str],
+    texts: Sequence[str],
+) -> None:
+    """Synthesize every warmup text with every voice, discarding the audio."""
+    if not texts:
+        return
+    start = time.monotonic()
+    for voice_id in voices:
+        for text in texts:
+            for _ in generate(text, voice_id, 1.0):
+                pass
+    logger.info(
+        "Warmed up %d voice(s) in %.1fs", len(voices), time.monotonic() - start
+    )
+
+
+def enable_compile_cache(cache_dir: str) -> None:
+    """Keep torch's compilation caches in cache_dir, so restarts reuse them."""
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.join(cache_dir, "inductor"))
+    os.environ.setdefault("TRITON_CACHE_DIR", os.path.join(cache_dir, "triton"))
+    try:
+        import torch._inductor.config as inductor_config
+    except ImportError:
+        return
+    inductor_config.fx_graph_cache = True
+
+
+def compile_modules(model: Any, names: Sequence[str], cache_dir: str) -> None:
+    """Replace the named submodules of model with torch.compile'd ones.
+
+    Shapes vary with text length, so modules are compiled for dynamic
+    shapes. Compilation itself runs on first use, i.e. during warmup.
+    """
+    import torch
+
+    enable_compile_cache(cache_dir)
+    for name in names:
+        module = getattr(model, name, None)
+        if not isinstance(module, torch.nn.Module):
+            logger.warning("Cannot compile %s.%s: no such module", type(model).__name__, name)
+            continue
+        setattr(model, name, torch.compile(module, dynamic=True))
+        logger.info("Compiling %s.%s", type(model).__name__, name)
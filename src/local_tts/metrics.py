@@ -0,0 +1,284 @@
+"""Minimal Prometheus-style metrics, rendered in the text exposition format.
+
+Only what the server needs: labelled histograms and gauges, cheap enough to
+update for every audio chunk.
+"""
+from __future__ import annotations
+
+import abc
+import bisect
+import logging
+import math
+import threading
+from typing import Callable, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(v) for v in labels)
+
+    @abc.abstractmethod
+    def _samples(self) -> list[str]:
+        """Sample lines in the text exposition format."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return "\n".join(lines) + "\n"
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Counter(Gauge):
+    type = "counter"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        raise TypeError("Counters can only increase")
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (+Inf last), sum, count.
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+            counts, totals = series
+            counts[i] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return int(series[1][1]) if series else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, (list(c), list(t))) for k, (c, t) in self._series.items())
+        lines = []
+        for key, (counts, (total, count)) in items:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {int(count)}")
+        return lines
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        """Call ``collect`` before each render, to copy in state counted elsewhere."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception:
+                logger.exception("Metrics collector failed")
+        return "".join(m.render() for m in self._metrics.values())
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    return _metrics
+
+
+SYNTHESIS_LABELS = ("model_id", "voice", "transport")
+
+TIME_TO_FIRST_CHUNK = _metrics.register(
+    Histogram(
+        "tts_time_to_first_chunk_seconds",
+        "Time from request to the first audio chunk.",
+        SYNTHESIS_LABELS,
+    )
+)
+SYNTHESIS_SECONDS = _metrics.register(
+    Histogram(
+        "tts_synthesis_seconds",
+        "Time from request to the last audio chunk.",
+        SYNTHESIS_LABELS,
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    )
+)
+REAL_TIME_FACTOR = _metrics.register(
+    Histogram(
+        "tts_real_time_factor",
+        "Synthesis time divided by the duration of the audio produced.",
+        SYNTHESIS_LABELS,
+        buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 5),
+    )
+)
+CHUNK_BYTES = _metrics.register(
+    Histogram(
+        "tts_chunk_bytes",
+        "Size of each synthesized 24 kHz PCM chunk.",
+        SYNTHESIS_LABELS,
+        buckets=tuple(1024 * 2**i for i in range(11)),
+    )
+)
+QUEUE_WAIT_SECONDS = _metrics.register(
+    Histogram(
+        "tts_queue_wait_seconds",
+        "Time requests waited for an inference worker.",
+        ("engine",),
+    )
+)
+SCHEDULER_QUEUE_DEPTH = _metrics.register(
+    Gauge("tts_scheduler_queue_depth", "Requests waiting for an inference worker.", ("engine",))
+)
+SCHEDULER_IN_FLIGHT = _metrics.register(
+    Gauge("tts_scheduler_in_flight", "Requests running on an inference worker.", ("engine",))
+)
+SCHEDULER_REJECTED = _metrics.register(
+    Counter(
+        "tts_scheduler_rejected_total",
+        "Requests rejected because the engine's queue was full.",
+        ("engine",),
+    )
+)
+SCHEDULER_TIMEOUTS = _metrics.register(
+    Counter(
+        "tts_scheduler_timeouts_total",
+        "Requests that gave up waiting for an inference worker.",
+        ("engine",),
+    )
+)
+CACHE_HITS = _metrics.register(
+    Counter("tts_audio_cache_hits_total", "Audio cache lookups that found the audio.")
+)
+CACHE_MISSES = _metrics.register(
+    Counter("tts_audio_cache_misses_total", "Audio cache lookups that had to synthesize.")
+)
+CACHE_EVICTIONS = _metrics.register(
+    Counter("tts_audio_cache_evictions_total", "Entries evicted from the audio cache.")
+)
+CACHE_BYTES = _metrics.register(
+    Gauge("tts_audio_cache_bytes", "Audio held in the audio cache.")
+)
+REPLICA_LABELS = ("engine", "replica")
+
+REPLICA_QUEUE_DEPTH = _metrics.register(
+    Gauge("tts_replica_queue_depth", "Requests waiting for a replica's workers.", REPLICA_LABELS)
+)
+REPLICA_IN_FLIGHT = _metrics.register(
+    Gauge("tts_replica_in_flight", "Requests running on a replica.", REPLICA_LABELS)
+)
+REPLICA_DISPATCHED = _metrics.register(
+    Counter("tts_replica_dispatched_total", "Requests sent to a replica.", REPLICA_LABELS)
+)
+G2P_CACHE_HITS = _metrics.register(
+    Counter("tts_g2p_cache_hits_total", "Sentences whose phonemes were memoized.", ("engine",))
+)
+G2P_CACHE_MISSES = _metrics.register(
+    Counter("tts_g2p_cache_misses_total", "Sentences that went through G2P.", ("engine",))
+)
+REQUESTS = _metrics.register(
+    Counter(
+        "tts_requests_total",
+        "Synthesis requests by outcome (ok, rejected, error or cancelled).",
+        (*SYNTHESIS_LABELS, "outcome"),
+    )
+)
+IN_FLIGHT = _metrics.register(
+    Gauge("tts_requests_in_flight", "Synthesis requests being served.", SYNTHESIS_LABELS)
+)
+OPEN_WEBSOCKETS = _metrics.register(
+    Gauge("tts_websockets_open", "Open stream-input WebSocket connections.", ("model_id", "voice"))
+)
@@ -9,8 +9,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from ..engines.base import ModelOptions
-from ..engines.registry import initialize_engines
-from .mcp import NormalizeMountPath, create_mcp_app
+from ..engines.registry import get_registry, initialize_engines
+from .mcp import NormalizeMountPath, create_mcp_app, speech_output_lifespan
 from .routes import router
 from .websocket import ws_router
 
@@ -24,8 +24,11 @@ def create_app(model_options: ModelOptions | None = None) -> FastAPI:
     async def lifespan(app: FastAPI):
         initialize_engines(app.state.model_options)
         logger.info("TTS engines initialized")
-        async with mcp_app.lifespan(app):
-            yield
+        try:
+            async with mcp_app.lifespan(app), speech_output_lifespan():
+                yield
+        finally:
+            get_registry().close()
 
     app = FastAPI(
         title="Local TTS Server",
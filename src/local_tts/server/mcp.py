@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import contextvars
 import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 from urllib.parse import parse_qs
 
 import numpy as np
@@ -10,6 +13,7 @@ from starlette.types import ASGIApp, Receive, Scope, Send
 
 from ..engines.base import SAMPLE_RATE
 from ..engines.registry import get_registry
+from .synthesis import synthesize
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +29,71 @@ _mcp_voice: contextvars.ContextVar[str | None] = contextvars.ContextVar("mcp_voi
 mcp = FastMCP("local-tts")
 
 
+class SpeechOutput:
+    """The server's audio output, shared by all MCP tool calls.
+
+    One player, and so one device stream, lives for the whole server
+    lifetime. Utterances are played one at a time, in the order the calls
+    arrived; each starts playing with its first chunk.
+    """
+
+    def __init__(self, player: Any = None) -> None:
+        if player is None:
+            from ..client.player import AudioPlayer
+
+            player = AudioPlayer(sample_rate=SAMPLE_RATE)
+        self.player = player
+        self._lock = asyncio.Lock()
+
+    async def play(self, chunks: AsyncIterator[np.ndarray]) -> int:
+        """Play chunks as they arrive and wait until they have been heard.
+
+        Returns the number of samples played. If the call fails or is
+        cancelled, playback stops at once.
+        """
+        samples = 0
+        async with self._lock:
+            self.player.start()
+            try:
+                async for chunk in chunks:
+                    self.player.play_chunk(chunk)
+                    samples += len(chunk)
+                await asyncio.to_thread(self.player.drain)
+            except BaseException:
+                self.player.interrupt()
+                raise
+        return samples
+
+    def close(self) -> None:
+        self.player.interrupt()
+
+
+_speech_output: SpeechOutput | None = None
+
+
+def get_speech_output() -> SpeechOutput:
+    global _speech_output
+    if _speech_output is None:
+        _speech_output = SpeechOutput()
+    return _speech_output
+
+
+@asynccontextmanager
+async def speech_output_lifespan() -> AsyncIterator[None]:
+    """Own the shared audio output for the lifetime of the server.
+
+    The device stream itself is only opened by the first tool call.
+    """
+    global _speech_output
+    _speech_output = SpeechOutput()
+    try:
+        yield
+    finally:
+        if _speech_output is not None:
+            _speech_output.close()
+            _speech_output = None
+
+
 @mcp.tool()
 async def text_to_speech(
     text: str,
@@ -36,31 +105,17 @@ async def text_to_speech(
         text: The text to synthesize.
         speed: Speech speed multiplier (0.25 - 4.0).
     """
-    from ..client.player import AudioPlayer
-
     model = _mcp_model.get()
     voice = _mcp_voice.get() or DEFAULT_VOICES.get(model, "af_heart")
     engine = get_registry().get(model)
 
-    chunks: list[np.ndarray] = []
-    async for chunk in engine.generate_audio_stream(text, voice, speed):
-        chunks.append(chunk)
-
-    if not chunks:
+    samples = await get_speech_output().play(
+        synthesize(engine, text, voice, speed, transport="mcp")
+    )
+    if not samples:
         return f"No audio generated for: {text!r}"
 
-    player = AudioPlayer(sample_rate=SAMPLE_RATE)
-    player.start()
-    try:
-        for chunk in chunks:
-            player.play_chunk(chunk)
-        player.drain()
-    finally:
-        player.stop()
-
-    total_samples = sum(len(c) for c in chunks)
-    duration = total_samples / SAMPLE_RATE
-
+    duration = samples / SAMPLE_RATE
     return f"Spoke {len(text)} chars in {duration:.1f}s using {model}/{voice}"
 
 
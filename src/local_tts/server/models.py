@@ -28,9 +28,14 @@ class ModelResponse(BaseModel):
     name: str
 
 
+class GenerationConfig(BaseModel):
+    chunk_length_schedule: list[int] | None = Field(default=None, min_length=1)
+
+
 class WSTextMessage(BaseModel):
     text: str
     voice_settings: VoiceSettings | None = None
+    generation_config: GenerationConfig | None = None
     try_trigger_generation: bool | None = None
     flush: bool | None = None
 
@@ -1,48 +1,82 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
+from ..audio import AudioOutput, parse_output_format
+from ..engines.cache import CachePolicy
 from ..engines.registry import get_registry
+from ..engines.scheduler import EngineBusyError
+from ..metrics import CONTENT_TYPE, get_metrics
 from .models import ModelResponse, TTSRequest, VoiceResponse
+from .synthesis import synthesize
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Voice prompts only need a few seconds of speech.
+MAX_VOICE_PROMPT_BYTES = 20 * 1024 * 1024
+
 
 @router.post("/v1/text-to-speech/{voice_id}/stream")
 async def stream_tts(
     voice_id: str,
     request: TTSRequest,
     output_format: str = Query(default="pcm_24000"),
+    frame_ms: float = Query(default=0),
+    cache_control: str | None = Header(default=None),
 ):
     registry = get_registry()
     try:
         engine = registry.get(request.model_id)
+        fmt = parse_output_format(output_format)
+        output = AudioOutput(fmt, frame_ms)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
     speed = request.voice_settings.speed if request.voice_settings else 1.0
 
+    stream = synthesize(
+        engine,
+        text=request.text,
+        voice_id=voice_id,
+        speed=speed,
+        policy=CachePolicy.from_header(cache_control),
+        transport="http",
+    )
+    # Wait for the first chunk before sending headers, so an overloaded
+    # engine can still be reported with a proper status code.
+    try:
+        first = await anext(stream)
+    except StopAsyncIteration:
+        first = None
+    except EngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
     async def audio_generator():
         try:
-            async for chunk in engine.generate_audio_stream(
-                text=request.text,
-                voice_id=voice_id,
-                speed=speed,
-            ):
-                yield chunk.tobytes()
+            if first is not None:
+                for frame in output.write(first):
+                    yield frame
+                async for chunk in stream:
+                    for frame in output.write(chunk):
+                        yield frame
+            for frame in output.close():
+                yield frame
         except Exception:
             logger.exception("Audio generation error")
             raise
+        finally:
+            await stream.aclose()
 
     return StreamingResponse(
         audio_generator(),
         media_type="application/octet-stream",
-        headers={"Content-Type": "audio/pcm;rate=24000;encoding=signed-int;bits=16"},
+        headers={"Content-Type": fmt.media_type},
     )
 
 
@@ -55,10 +89,41 @@ async def list_voices(model_id: str = Query(default="kokoro")):
         raise HTTPException(status_code=400, detail=str(e))
     return [
         VoiceResponse(voice_id=v.id, name=v.name, category=v.gender)
-        for v in engine.list_voices()
+        for v in await asyncio.to_thread(engine.list_voices)
     ]
 
 
+@router.post("/v1/voices/add")
+async def add_voice(
+    request: Request,
+    name: str = Query(),
+    model_id: str = Query(default="pocket"),
+):
+    """Register a voice from the audio prompt in the request body."""
+    registry = get_registry()
+    try:
+        engine = registry.get(model_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not hasattr(engine, "add_voice"):
+        raise HTTPException(
+            status_code=400, detail=f"Model {model_id!r} does not support adding voices"
+        )
+    audio = await request.body()
+    if not audio:
+        raise HTTPException(status_code=400, detail="Request body must contain the audio prompt")
+    if len(audio) > MAX_VOICE_PROMPT_BYTES:
+        raise HTTPException(status_code=413, detail="Audio prompt is too large")
+    try:
+        await registry.ensure_loaded(model_id)
+        voice = await registry.add_voice(model_id, name, audio)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except EngineBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return VoiceResponse(voice_id=voice.id, name=voice.name, category=voice.gender)
+
+
 @router.get("/v1/models")
 async def list_models():
     registry = get_registry()
@@ -66,3 +131,32 @@ async def list_models():
         ModelResponse(model_id=m["model_id"], name=m["name"])
         for m in registry.list_models()
     ]
+
+
+@router.get("/metrics")
+async def metrics():
+    # Collectors may ask engine worker processes for their stats, which
+    # blocks, so render off the event loop.
+    body = await asyncio.to_thread(get_metrics().render)
+    return Response(body, media_type=CONTENT_TYPE)
+
+
+@router.get("/health/live")
+async def health_live():
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def health_ready():
+    """200 once no engine is loading or failed to load, 503 until then.
+
+    Engines that were not preloaded count as ready; they load on first use.
+    """
+    registry = get_registry()
+    engines = {name: registry.load_state(name) for name in registry.engine_names}
+    states = {e["state"] for e in engines.values()}
+    status = "failed" if "failed" in states else "loading" if "loading" in states else "ready"
+    return JSONResponse(
+        {"status": status, "engines": engines},
+        status_code=200 if status == "ready" else 503,
+    )
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+from typing import AsyncIterator
+
+import numpy as np
+
+from ..engines.base import SAMPLE_RATE, TTSEngine
+from ..engines.cache import CachePolicy, get_audio_cache
+from ..engines.registry import get_registry
+from ..engines.scheduler import EngineBusyError
+from ..metrics import (
+    CHUNK_BYTES,
+    IN_FLIGHT,
+    REAL_TIME_FACTOR,
+    REQUESTS,
+    SYNTHESIS_SECONDS,
+    TIME_TO_FIRST_CHUNK,
+)
+
+
+async def voice_label(engine: TTSEngine, voice_id: str) -> str:
+    # Voices outside the engine's list (e.g. Pocket audio prompts) would give
+    # every request its own time series.
+    return voice_id if voice_id in await get_registry().voice_ids(engine.name) else "other"
+
+
+async def synthesize(
+    engine: TTSEngine,
+    text: str,
+    voice_id: str,
+    speed: float = 1.0,
+    policy: CachePolicy = CachePolicy(),
+    transport: str = "http",
+) -> AsyncIterator[np.ndarray]:
+    """Stream audio for text through the audio cache, recording metrics.
+
+    Every entry point (HTTP, WebSocket and MCP) synthesizes through here.
+    """
+    labels = (engine.name, await voice_label(engine, voice_id), transport)
+    IN_FLIGHT.inc(*labels)
+    start = time.perf_counter()
+    first = True
+    samples = 0
+    outcome = "cancelled"
+    try:
+        # Engines still loading (or not loaded yet) are waited for, not reloaded.
+        await get_registry().ensure_loaded(engine.name)
+        async for chunk in get_audio_cache().stream(
+            engine, text=text, voice_id=voice_id, speed=speed, policy=policy
+        ):
+            if first:
+                TIME_TO_FIRST_CHUNK.observe(time.perf_counter() - start, *labels)
+                first = False
+            CHUNK_BYTES.observe(chunk.nbytes, *labels)
+            samples += len(chunk)
+            yield chunk
+        outcome = "ok"
+    except EngineBusyError:
+        outcome = "rejected"
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        IN_FLIGHT.dec(*labels)
+        REQUESTS.inc(*labels, outcome)
+        if outcome == "ok":
+            elapsed = time.perf_counter() - start
+            SYNTHESIS_SECONDS.observe(elapsed, *labels)
+            if samples:
+                REAL_TIME_FACTOR.observe(elapsed * SAMPLE_RATE / samples, *labels)
@@ -1,18 +1,105 @@
 from __future__ import annotations
 
+import asyncio
 import base64
-import json
 import logging
 
 from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 
+from ..audio import AudioOutput, parse_output_format
+from ..engines.base import TTSEngine
+from ..engines.cache import CachePolicy
 from ..engines.registry import get_registry
+from ..engines.scheduler import EngineBusyError
+from ..engines.text import last_sentence_end
+from ..metrics import OPEN_WEBSOCKETS
 from .models import WSAudioMessage, WSTextMessage
+from .synthesis import synthesize, voice_label
 
 logger = logging.getLogger(__name__)
 
 ws_router = APIRouter()
 
+# ElevenLabs defaults: the first generation starts once 120 characters are
+# buffered, the next at 160 and so on, repeating the last value.
+DEFAULT_CHUNK_LENGTH_SCHEDULE = (120, 160, 250, 290)
+# try_trigger_generation only fires once at least this much text is buffered.
+MIN_TRIGGER_CHARS = 50
+
+
+class TextBuffer:
+    """Accumulates streamed text and decides when to start synthesizing it.
+
+    Text is released as soon as it contains a complete sentence, or once it
+    reaches the current ``chunk_length_schedule`` threshold, in which case it
+    is cut at the last word boundary.
+    """
+
+    def __init__(self, schedule: tuple[int, ...] | list[int] = DEFAULT_CHUNK_LENGTH_SCHEDULE) -> None:
+        self.schedule = tuple(schedule)
+        self.text = ""
+        self.generations = 0
+
+    def append(self, text: str) -> None:
+        self.text += text
+
+    def take(self, flush: bool = False, try_trigger: bool = False) -> str | None:
+        """Return the next piece of text to synthesize, if it is time to."""
+        if flush:
+            cut = len(self.text)
+        else:
+            threshold = self.schedule[min(self.generations, len(self.schedule) - 1)]
+            if try_trigger:
+                threshold = min(threshold, MIN_TRIGGER_CHARS)
+            cut = last_sentence_end(self.text)
+            if not cut and len(self.text) >= threshold:
+                cut = max(self.text.rfind(" "), self.text.rfind("\n")) + 1
+        chunk, self.text = self.text[:cut], self.text[cut:]
+        if not chunk.strip():
+            return None
+        self.generations += 1
+        return chunk.strip()
+
+
+async def _send_frames(websocket: WebSocket, frames: list[bytes], binary: bool) -> None:
+    """Send encoded audio as raw binary frames or base64 inside JSON."""
+    for data in frames:
+        if not data:
+            continue
+        if binary:
+            await websocket.send_bytes(data)
+            continue
+        audio_b64 = base64.b64encode(data).decode()
+        resp = WSAudioMessage(audio=audio_b64, isFinal=False)
+        await websocket.send_text(resp.model_dump_json())
+
+
+async def _send_audio(
+    websocket: WebSocket,
+    output: AudioOutput,
+    engine: TTSEngine,
+    text: str,
+    voice_id: str,
+    speed: float,
+    cache_policy: CachePolicy,
+    binary: bool = False,
+) -> None:
+    """Synthesize text and send it through the stream's output.
+
+    The output is shared by every generation of a BOS...EOS stream, so it
+    is not flushed here; with ``frame_ms`` a partial frame carries over to
+    the next generation.
+    """
+    async for chunk in synthesize(
+        engine,
+        text=text,
+        voice_id=voice_id,
+        speed=speed,
+        policy=cache_policy,
+        transport="ws",
+    ):
+        await _send_frames(websocket, output.write(chunk), binary)
+
 
 @ws_router.websocket("/v1/text-to-speech/{voice_id}/stream-input")
 async def websocket_tts(
@@ -20,19 +107,30 @@ async def websocket_tts(
     voice_id: str,
     model_id: str = Query(default="kokoro"),
     output_format: str = Query(default="pcm_24000"),
+    binary: bool = Query(default=False),
+    frame_ms: float = Query(default=0),
 ):
     await websocket.accept()
     registry = get_registry()
 
     try:
         engine = registry.get(model_id)
+        fmt = parse_output_format(output_format)
+        AudioOutput(fmt, frame_ms)  # fail early if the format is unavailable
     except ValueError as e:
         await websocket.close(code=1003, reason=str(e))
         return
 
-    try:
+    cache_policy = CachePolicy.from_header(websocket.headers.get("cache-control"))
+
+    # Text ready for synthesis is queued as (text, speed); None marks the end
+    # of a stream. A single sender works through the queue so audio stays in
+    # order while more text is being received.
+    jobs: asyncio.Queue[tuple[str, float] | None] = asyncio.Queue()
+
+    async def receive() -> None:
         speed = 1.0
-        accumulated_text: list[str] = []
+        buffer = TextBuffer()
 
         while True:
             raw = await websocket.receive_text()
@@ -40,51 +138,69 @@ async def websocket_tts(
 
             # BOS message
             if msg.text == " ":
-                accumulated_text = []
+                schedule = DEFAULT_CHUNK_LENGTH_SCHEDULE
+                if msg.generation_config and msg.generation_config.chunk_length_schedule:
+                    schedule = msg.generation_config.chunk_length_schedule
+                buffer = TextBuffer(schedule)
                 if msg.voice_settings:
                     speed = msg.voice_settings.speed
                 continue
 
-            # EOS message - generate audio for accumulated text
+            # EOS message - generate whatever is left, then finish
             if msg.text == "":
-                if accumulated_text:
-                    full_text = "".join(accumulated_text)
-                    async for chunk in engine.generate_audio_stream(
-                        text=full_text,
-                        voice_id=voice_id,
-                        speed=speed,
-                    ):
-                        audio_b64 = base64.b64encode(chunk.tobytes()).decode()
-                        resp = WSAudioMessage(audio=audio_b64, isFinal=False)
-                        await websocket.send_text(resp.model_dump_json())
-
-                # Send final message
-                final = WSAudioMessage(isFinal=True)
-                await websocket.send_text(final.model_dump_json())
-                accumulated_text = []
+                if text := buffer.take(flush=True):
+                    jobs.put_nowait((text, speed))
+                jobs.put_nowait(None)
+                buffer = TextBuffer(buffer.schedule)
                 continue
 
             # Regular text message
-            accumulated_text.append(msg.text)
-
-            # If flush requested, generate immediately
-            if msg.flush:
-                full_text = "".join(accumulated_text)
-                async for chunk in engine.generate_audio_stream(
-                    text=full_text,
-                    voice_id=voice_id,
-                    speed=speed,
-                ):
-                    audio_b64 = base64.b64encode(chunk.tobytes()).decode()
-                    resp = WSAudioMessage(audio=audio_b64, isFinal=False)
-                    await websocket.send_text(resp.model_dump_json())
-                accumulated_text = []
-
+            buffer.append(msg.text)
+            if text := buffer.take(
+                flush=bool(msg.flush), try_trigger=bool(msg.try_trigger_generation)
+            ):
+                jobs.put_nowait((text, speed))
+
+    async def send() -> None:
+        # One encoder per stream, so a WAV header is sent once and the MP3
+        # encoder and resampler keep their state across generations.
+        output: AudioOutput | None = None
+        while True:
+            job = await jobs.get()
+            if job is None:
+                if output is not None:
+                    await _send_frames(websocket, output.close(), binary)
+                    output = None
+                final = WSAudioMessage(isFinal=True)
+                await websocket.send_text(final.model_dump_json())
+                continue
+            text, speed = job
+            if output is None:
+                output = AudioOutput(fmt, frame_ms)
+            await _send_audio(
+                websocket, output, engine, text, voice_id, speed, cache_policy, binary
+            )
+
+    labels = (engine.name, await voice_label(engine, voice_id))
+    OPEN_WEBSOCKETS.inc(*labels)
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
+    except EngineBusyError as e:
+        logger.warning("Rejecting WebSocket synthesis: %s", e)
+        await websocket.close(code=1013, reason=str(e))
     except Exception:
         logger.exception("WebSocket error")
         try:
             await websocket.close(code=1011, reason="Internal error")
         except Exception:
             pass
+    finally:
+        OPEN_WEBSOCKETS.dec(*labels)
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
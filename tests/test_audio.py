@@ -1,7 +1,20 @@
 """Tests for audio conversion utilities."""
 
 import numpy as np
+import pytest
 
+from local_tts.audio import (
+    AudioOutput,
+    FrameChunker,
+    OutputFormat,
+    Resampler,
+    alaw_encode,
+    create_encoder,
+    frame_bytes,
+    parse_output_format,
+    ulaw_encode,
+    wav_header,
+)
 from local_tts.engines.base import float32_to_int16
 
 
@@ -46,3 +59,117 @@ def test_float32_to_int16_midrange():
     result = float32_to_int16(half)
     assert result[0] == 16383  # int(0.5 * 32767)
     assert result[1] == -16383
+
+
+# -- Output formats -----------------------------------------------------------
+
+def _tone(n: int, freq: float = 1000.0, rate: int = 24000) -> np.ndarray:
+    t = np.arange(n) / rate
+    return float32_to_int16((0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32))
+
+
+def test_float32_to_int16_reuses_scratch_safely():
+    rng = np.random.default_rng(0)
+    a = rng.uniform(-1.5, 1.5, 1000).astype(np.float32)
+    b = rng.uniform(-1.5, 1.5, 10).astype(np.float32)
+    original = a.copy()
+    ra, rb = float32_to_int16(a), float32_to_int16(b)
+    # Inputs are left alone and earlier results aren't overwritten.
+    np.testing.assert_array_equal(a, original)
+    np.testing.assert_array_equal(ra, (np.clip(a, -1, 1) * 32767).astype(np.int16))
+    np.testing.assert_array_equal(rb, (np.clip(b, -1, 1) * 32767).astype(np.int16))
+
+
+def test_float32_to_int16_caps_scratch():
+    from local_tts.engines import base
+
+    float32_to_int16(np.zeros(base.SCRATCH_MAX_SAMPLES - 1, dtype=np.float32))
+    pooled = base._scratch.buf
+    long = np.full(base.SCRATCH_MAX_SAMPLES + 1, 0.5, dtype=np.float32)
+    assert (float32_to_int16(long) == 16383).all()
+    # The oversized chunk got its own buffer; the pooled one is kept as is.
+    assert base._scratch.buf is pooled
+    assert len(pooled) <= base.SCRATCH_MAX_SAMPLES
+
+
+def test_parse_output_format():
+    assert parse_output_format("pcm_16000") == OutputFormat("pcm", 16000)
+    assert parse_output_format("ulaw_8000") == OutputFormat("ulaw", 8000)
+    assert parse_output_format("mp3_44100_128") == OutputFormat("mp3", 44100, 128)
+    for bad in ("pcm_12345", "ulaw_16000", "mp3_44100", "opus_48000_64", "flac"):
+        with pytest.raises(ValueError):
+            parse_output_format(bad)
+
+
+@pytest.mark.parametrize("rate", [8000, 16000, 22050, 44100])
+def test_resampler_is_chunk_invariant(rate):
+    audio = _tone(7200)
+    whole = Resampler(24000, rate)
+    expected = np.concatenate([whole.process(audio), whole.flush()])
+
+    chunked = Resampler(24000, rate)
+    parts = [chunked.process(audio[i:i + 997]) for i in range(0, len(audio), 997)]
+    result = np.concatenate(parts + [chunked.flush()])
+
+    np.testing.assert_array_equal(result, expected)
+    assert len(result) == -(-len(audio) * rate // 24000)
+
+
+def test_resampler_preserves_tone():
+    out = Resampler(24000, 16000)
+    result = np.concatenate([out.process(_tone(2400)), out.flush()])
+    expected = _tone(1600, rate=16000)
+    assert np.max(np.abs(result[100:-100].astype(int) - expected[100:-100])) < 64
+
+
+def test_g711_known_values():
+    pcm = np.array([0, 32767, -32768], dtype=np.int16)
+    assert ulaw_encode(pcm).tolist() == [0xFF, 0x80, 0x00]
+    assert alaw_encode(np.array([0, -1], dtype=np.int16)).tolist() == [0xD5, 0x55]
+
+
+def test_wav_header():
+    header = wav_header(16000, data_size=100)
+    assert len(header) == 44
+    assert header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+    assert int.from_bytes(header[4:8], "little") == 136
+    assert int.from_bytes(header[24:28], "little") == 16000
+
+
+def test_wav_encoder_writes_header_once():
+    encoder = create_encoder("wav_24000")
+    audio = _tone(100)
+    data = encoder.encode(audio) + encoder.encode(audio) + encoder.flush()
+    assert data[:4] == b"RIFF"
+    assert len(data) == 44 + 400
+
+
+def test_frame_chunker():
+    chunker = FrameChunker(4)
+    assert chunker.push(b"ab") == []
+    assert chunker.push(b"cdefghijk") == [b"abcd", b"efgh"]
+    assert chunker.push(b"") == []
+    assert chunker.push(b"lmnopq") == [b"ijkl", b"mnop"]
+    assert chunker.flush() == b"q"
+    assert chunker.flush() == b""
+
+
+def test_frame_bytes():
+    assert frame_bytes(parse_output_format("pcm_24000"), 20) == 960
+    assert frame_bytes(parse_output_format("ulaw_8000"), 20) == 160
+    assert frame_bytes(parse_output_format("mp3_44100_128"), 100) == 1600
+
+
+def test_audio_output_frames():
+    output = AudioOutput(parse_output_format("pcm_16000"), frame_ms=10)
+    frames = output.write(_tone(1000)) + output.write(_tone(2000)) + output.close()
+    assert all(len(f) == 320 for f in frames[:-1])
+    assert 0 < len(frames[-1]) <= 320
+    assert sum(len(f) for f in frames) == 2000 * 2
+
+    # Without framing, each encoded chunk goes out as is.
+    output = AudioOutput(parse_output_format("pcm_24000"))
+    assert [len(f) for f in output.write(_tone(100)) + output.close()] == [200]
+
+    with pytest.raises(ValueError, match="frame_ms"):
+        AudioOutput(parse_output_format("pcm_24000"), frame_ms=-1)
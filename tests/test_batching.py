@@ -0,0 +1,90 @@
+"""Tests for the cross-request micro-batcher."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from local_tts.engines.batching import MicroBatcher
+
+
+def test_micro_batcher_coalesces_concurrent_submits():
+    batches = []
+
+    def run_batch(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher("test", run_batch, window=0.2, max_batch_size=4)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(batcher.submit, [1, 2, 3, 4]))
+    finally:
+        batcher.close()
+
+    assert results == [2, 4, 6, 8]
+    assert len(batches) == 1
+    assert sorted(batches[0]) == [1, 2, 3, 4]
+    assert batcher.stats()["max_batch_size"] == 4
+
+
+def test_micro_batcher_respects_max_batch_size():
+    batches = []
+
+    def run_batch(items):
+        batches.append(len(items))
+        return items
+
+    batcher = MicroBatcher("test", run_batch, window=0.2, max_batch_size=2)
+    try:
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            assert sorted(pool.map(batcher.submit, range(5))) == list(range(5))
+    finally:
+        batcher.close()
+
+    assert max(batches) <= 2
+    assert sum(batches) == 5
+
+
+def test_micro_batcher_propagates_errors():
+    def run_batch(items):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher("test", run_batch, window=0)
+    try:
+        with pytest.raises(RuntimeError, match="model failed"):
+            batcher.submit(1)
+    finally:
+        batcher.close()
+
+
+def test_kokoro_front_end_batch_matches_unbatched():
+    torch = pytest.importorskip("torch")
+    kokoro = pytest.importorskip("kokoro")
+    from local_tts.engines.kokoro import KOKORO_REPO_ID, _BatchItem, _decode, _front_end_batch
+
+    try:
+        model = kokoro.KModel(repo_id=KOKORO_REPO_ID).eval()
+    except Exception as e:
+        pytest.skip(f"Kokoro weights not available: {e}")
+
+    torch.manual_seed(0)
+    items = [
+        _BatchItem("həlˈoʊ", torch.randn(1, 256), 1.0),
+        _BatchItem("ðə kwˈɪk bɹˈaʊn fˈɑks ʤˈʌmps", torch.randn(1, 256), 1.2),
+        _BatchItem("wˈʌn", torch.randn(1, 256), 0.8),
+    ]
+    batched = _front_end_batch(model, items)
+    for item, front in zip(items, batched):
+        (single,) = _front_end_batch(model, [item])
+        # Padding must not leak into the shorter sequences.
+        torch.testing.assert_close(front.duration, single.duration, atol=1e-4, rtol=1e-4)
+        torch.testing.assert_close(front.d, single.d, atol=1e-4, rtol=1e-4)
+        torch.testing.assert_close(front.t_en, single.t_en, atol=1e-4, rtol=1e-4)
+
+        # The tail matches KModel's own batch-of-one forward pass.
+        ids = [0, *(i for i in map(model.vocab.get, item.phonemes) if i is not None), 0]
+        input_ids = torch.tensor([ids], dtype=torch.long)
+        with torch.no_grad():
+            audio, pred_dur = model.forward_with_tokens(input_ids, item.ref_s, item.speed)
+        assert torch.equal(torch.round(front.duration).clamp(min=1).long(), pred_dur)
+        assert _decode(model, front).shape == audio.squeeze().shape
@@ -0,0 +1,91 @@
+"""Tests for the engine benchmark harness."""
+
+import io
+import json
+import sys
+import time
+
+import pytest
+
+from local_tts.__main__ import main
+from local_tts.bench import CORPUS, bench_engine, format_table, run_bench
+from local_tts.engines.fake import FakeEngine
+
+
+@pytest.mark.asyncio
+async def test_bench_engine_reports_every_corpus_text():
+    results = await bench_engine(FakeEngine(), runs=2)
+    assert [r.corpus for r in results] == list(CORPUS)
+    for r in results:
+        assert r.model == "fake"
+        assert r.runs == 2
+        # FakeEngine: 3 chunks * 2400 samples, regardless of text
+        assert r.audio_seconds == pytest.approx(0.3)
+        assert 0 < r.ttfc_seconds <= r.total_seconds
+        assert r.rtf == pytest.approx(r.total_seconds / r.audio_seconds)
+
+
+@pytest.mark.asyncio
+async def test_bench_engine_concurrency_reports_aggregate_throughput():
+    results = await bench_engine(FakeEngine(), runs=1, concurrency=3)
+    for r in results:
+        assert r.concurrency == 3
+        # Per-stream audio, but throughput counts all three streams.
+        assert r.audio_seconds == pytest.approx(0.3)
+        assert r.samples_per_second == pytest.approx(3 * 7200 / r.total_seconds)
+
+
+class PreloadingEngine(FakeEngine):
+    def __init__(self):
+        super().__init__("preloading")
+        self.voices_used = set()
+
+    def preload_voices(self):
+        time.sleep(0.05)
+
+    async def generate_audio_stream(self, text, voice_id, speed=1.0):
+        self.voices_used.add(voice_id)
+        async for chunk in super().generate_audio_stream(text, voice_id, speed):
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_bench_times_voice_preload_separately():
+    engine = PreloadingEngine()
+    (result, *_) = await run_bench([lambda: engine], {"preloading": "test_voice2"}, runs=1)
+    assert result.voice_load_seconds >= 0.05
+    assert result.load_seconds < result.voice_load_seconds
+    assert engine.voices_used == {"test_voice2"}
+
+
+@pytest.mark.asyncio
+async def test_run_bench_isolates_engines():
+    results = await run_bench([FakeEngine, FakeEngine], runs=1, isolate=True)
+    assert len(results) == 2 * len(CORPUS)
+    assert all(r.model == "fake" and r.peak_rss_mb for r in results)
+
+
+@pytest.mark.asyncio
+async def test_run_bench_prints_table():
+    out = io.StringIO()
+    results = await run_bench([FakeEngine, lambda: FakeEngine("fake2")], runs=1, out=out)
+    assert len(results) == 2 * len(CORPUS)
+    table = out.getvalue()
+    assert table == format_table(results) + "\n"
+    assert "fake2" in table
+
+
+def test_bench_cli_json(tmp_path, monkeypatch):
+    path = tmp_path / "bench.json"
+    monkeypatch.setattr(sys, "argv", ["local-tts", "bench", "--fake", "--runs", "1", "--json", str(path)])
+    main()
+    data = json.loads(path.read_text())
+    assert [r["corpus"] for r in data] == list(CORPUS)
+    assert {"load_seconds", "voice_load_seconds", "ttfc_seconds", "rtf", "samples_per_second", "peak_rss_mb"} <= set(data[0])
+
+
+def test_bench_cli_rejects_unknown_kitten_size(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["local-tts", "bench", "--models", "kitten", "--kitten-sizes", "micro,huge"])
+    with pytest.raises(SystemExit):
+        main()
+    assert "unknown KittenTTS model size: 'huge'" in capsys.readouterr().err
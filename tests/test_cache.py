@@ -0,0 +1,233 @@
+"""Tests for the synthesized audio cache."""
+
+import numpy as np
+import pytest
+
+from local_tts.engines.cache import AudioCache, CachePolicy, LRUCache, get_audio_cache, make_key
+
+from conftest import FakeEngine
+
+
+class CountingEngine(FakeEngine):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.texts = []
+
+    async def generate_audio_stream(self, text, voice_id, speed=1.0):
+        self.calls += 1
+        self.texts.append(text)
+        async for chunk in super().generate_audio_stream(text, voice_id, speed):
+            yield chunk
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+@pytest.fixture
+def audio_cache():
+    cache = get_audio_cache()
+    cache.resize(1024 * 1024)
+    yield cache
+    cache.resize(0)
+    cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_replays_chunks():
+    cache = AudioCache(max_bytes=1024 * 1024)
+    engine = CountingEngine(num_chunks=3)
+
+    first = await _collect(cache.stream(engine, "Hello  world", "test_voice"))
+    second = await _collect(cache.stream(engine, "Hello world", "test_voice"))
+
+    assert engine.calls == 1
+    assert len(second) == 3
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_key_includes_voice_and_speed():
+    cache = AudioCache(max_bytes=1024 * 1024)
+    engine = CountingEngine()
+
+    await _collect(cache.stream(engine, "hi", "test_voice"))
+    await _collect(cache.stream(engine, "hi", "test_voice2"))
+    await _collect(cache.stream(engine, "hi", "test_voice", speed=1.5))
+    assert engine.calls == 3
+    assert make_key(engine, "hi", "v", 1.0) != make_key(engine, "hi", "v", 1.5)
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    engine = FakeEngine(num_chunks=1, samples_per_chunk=100)  # 200 bytes per entry
+    cache = AudioCache(max_bytes=450)
+
+    await _collect(cache.stream(engine, "a", "test_voice"))
+    await _collect(cache.stream(engine, "b", "test_voice"))
+    await _collect(cache.stream(engine, "a", "test_voice"))  # refresh "a"
+    await _collect(cache.stream(engine, "c", "test_voice"))  # evicts "b"
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert cache.get(make_key(engine, "b", "test_voice", 1.0)) is None
+    assert cache.get(make_key(engine, "a", "test_voice", 1.0)) is not None
+
+
+@pytest.mark.asyncio
+async def test_cache_copies_borrowed_chunks():
+    class ReusingEngine(FakeEngine):
+        """Yields views into one buffer that is overwritten for every chunk."""
+
+        async def generate_audio_stream(self, text, voice_id, speed=1.0):
+            buf = np.zeros(200, dtype=np.int16)
+            for i in range(3):
+                buf[:] = i
+                yield buf[:100]
+
+    cache = AudioCache(max_bytes=1024 * 1024)
+    engine = ReusingEngine()
+    await _collect(cache.stream(engine, "hi", "test_voice"))
+    replay = await _collect(cache.stream(engine, "hi", "test_voice"))
+    assert [int(c[0]) for c in replay] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_cache_policy():
+    cache = AudioCache(max_bytes=1024 * 1024)
+    engine = CountingEngine()
+
+    await _collect(cache.stream(engine, "hi", "test_voice", policy=CachePolicy(write=False)))
+    assert len(cache) == 0
+    await _collect(cache.stream(engine, "hi", "test_voice"))
+    await _collect(cache.stream(engine, "hi", "test_voice", policy=CachePolicy(read=False)))
+    assert engine.calls == 3
+
+    assert CachePolicy.from_header("no-cache") == CachePolicy(read=False, write=True)
+    assert CachePolicy.from_header("no-store, max-age=0") == CachePolicy(read=True, write=False)
+
+
+@pytest.mark.asyncio
+async def test_sentence_cache_synthesizes_only_misses():
+    cache = AudioCache(max_bytes=1024 * 1024, granularity="sentence")
+    engine = CountingEngine(num_chunks=1)
+
+    first = await _collect(cache.stream(engine, "Hello there. Your order shipped. Bye!", "test_voice"))
+    assert engine.texts == ["Hello there.", "Your order shipped.", "Bye!"]
+    assert len(first) == 3
+
+    engine.texts.clear()
+    second = await _collect(cache.stream(engine, "Hello there. Your refund shipped. Bye!", "test_voice"))
+    assert engine.texts == ["Your refund shipped."]
+    assert len(second) == 3
+    np.testing.assert_array_equal(first[0], second[0])
+    np.testing.assert_array_equal(first[2], second[2])
+
+
+@pytest.mark.asyncio
+async def test_sentence_cache_propagates_errors():
+    class FailingEngine(CountingEngine):
+        async def generate_audio_stream(self, text, voice_id, speed=1.0):
+            if text.startswith("Fail"):
+                raise RuntimeError("synthesis failed")
+            async for chunk in super().generate_audio_stream(text, voice_id, speed):
+                yield chunk
+
+    cache = AudioCache(max_bytes=1024 * 1024, granularity="sentence")
+    engine = FailingEngine(num_chunks=1)
+    chunks = []
+    with pytest.raises(RuntimeError, match="synthesis failed"):
+        async for chunk in cache.stream(engine, "Hello. Fail here. Bye.", "test_voice"):
+            chunks.append(chunk)
+    assert len(chunks) == 1
+
+
+@pytest.mark.asyncio
+async def test_sentence_cache_bounds_read_ahead():
+    import asyncio
+
+    from local_tts.engines.base import STREAM_QUEUE_SIZE
+
+    class TrackingEngine(CountingEngine):
+        produced = 0
+
+        async def generate_audio_stream(self, text, voice_id, speed=1.0):
+            async for chunk in super().generate_audio_stream(text, voice_id, speed):
+                TrackingEngine.produced += 1
+                yield chunk
+
+    cache = AudioCache(max_bytes=1024 * 1024, granularity="sentence")
+    engine = TrackingEngine(num_chunks=4)
+    stream = cache.stream(engine, " ".join(f"Sentence {i}." for i in range(20)), "test_voice")
+    await anext(stream)
+    # A stalled consumer leaves the producer blocked on a full queue at most
+    # one sentence ahead, not with all 80 chunks synthesized.
+    await asyncio.sleep(0.05)
+    assert TrackingEngine.produced <= 2 * STREAM_QUEUE_SIZE
+    await stream.aclose()
+
+
+def test_cache_rejects_unknown_granularity():
+    with pytest.raises(ValueError, match="granularity"):
+        AudioCache(granularity="word")
+
+
+def test_stream_tts_uses_cache(client, audio_cache):
+    body = {"text": "One moment please", "model_id": "fake"}
+    r1 = client.post("/v1/text-to-speech/test_voice/stream", json=body)
+    r2 = client.post("/v1/text-to-speech/test_voice/stream", json=body)
+    assert r1.content == r2.content
+    assert audio_cache.hits == 1
+
+    r3 = client.post(
+        "/v1/text-to-speech/test_voice/stream",
+        json=body,
+        headers={"Cache-Control": "no-cache"},
+    )
+    assert r3.content == r1.content
+    assert audio_cache.hits == 1
+
+
+def test_cache_metrics(client, audio_cache):
+    import re
+
+    def metric(text, name):
+        return int(re.search(rf"^{name} (\d+)$", text, re.M).group(1))
+
+    before = client.get("/metrics").text
+    for _ in range(2):
+        client.post(
+            "/v1/text-to-speech/test_voice/stream",
+            json={"text": "metrics please", "model_id": "fake"},
+        )
+    after = client.get("/metrics").text
+    assert metric(after, "tts_audio_cache_misses_total") == metric(before, "tts_audio_cache_misses_total") + 1
+    assert metric(after, "tts_audio_cache_hits_total") == metric(before, "tts_audio_cache_hits_total") + 1
+    assert metric(after, "tts_audio_cache_bytes") == audio_cache.stats()["bytes"] > 0
+
+
+def test_lru_cache_bounded_by_entries():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "entries": 2,
+        "max_entries": 2,
+        "hits": 2,
+        "misses": 1,
+        "evictions": 1,
+    }
+
+
+def test_lru_cache_disabled():
+    cache = LRUCache(max_entries=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
@@ -0,0 +1,65 @@
+"""Tests for the HTTP client, run against an in-process fake server."""
+
+import httpx
+import numpy as np
+import pytest
+
+from local_tts.client.http import TTSHTTPClient
+from local_tts.client.loadtest import fake_server
+
+
+@pytest.mark.asyncio
+async def test_client_reuses_connection():
+    async with fake_server(chunk_delay=0.0) as url:
+        async with TTSHTTPClient(url, "test_voice", "fake") as client:
+            for _ in range(3):
+                chunks = [c async for c in client.synthesize("hello")]
+                assert sum(len(c) for c in chunks) == 7200
+                assert all(c.dtype == np.int16 for c in chunks)
+            # All three utterances went over one keep-alive connection.
+            assert len(client._client._transport._pool.connections) == 1
+
+
+@pytest.mark.asyncio
+async def test_client_raises_on_error_status():
+    async with fake_server(chunk_delay=0.0) as url:
+        async with TTSHTTPClient(url, "test_voice", "nonexistent") as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                [c async for c in client.synthesize("hello")]
+
+
+@pytest.mark.asyncio
+async def test_client_pipelines_sentences_in_order():
+    import asyncio
+
+    client = TTSHTTPClient("http://unused", "test_voice", "fake")
+    sentences = ["One.", "Two.", "Three.", "Four."]
+    started, finished = [], []
+    delay = {}
+
+    async def synthesize(text, speed=1.0):
+        n = sentences.index(text)
+        started.append(n)
+        await asyncio.sleep(delay[n])
+        finished.append(n)
+        yield np.array([n, n], dtype=np.int16)
+
+    client.synthesize = synthesize
+    # Later sentences finish first.
+    delay.update({n: (len(sentences) - n) * 0.01 for n in range(len(sentences))})
+    chunks = [c async for c in client.synthesize_sentences(" ".join(sentences), lookahead=2)]
+    assert [int(c[0]) for c in chunks] == [0, 1, 2, 3]
+    # The first sentence and two more were requested up front.
+    assert started[:3] == [0, 1, 2]
+
+    # Stopping early cancels the prefetches.
+    started.clear()
+    finished.clear()
+    delay.update({0: 0, 1: 0.05, 2: 0.05, 3: 0})
+    stream = client.synthesize_sentences(" ".join(sentences), lookahead=2)
+    await anext(stream)
+    await stream.aclose()
+    await asyncio.sleep(0.1)
+    assert started == [0, 1, 2]
+    assert finished == [0]
+    await client.aclose()
@@ -1,12 +1,13 @@
 """Tests for TTS engine abstraction and registry."""
 
 import asyncio
+import threading
 
 import numpy as np
 import pytest
 
-from local_tts.engines.base import SAMPLE_RATE, VoiceInfo
-from local_tts.engines.registry import EngineRegistry
+from local_tts.engines.base import SAMPLE_RATE, VoiceInfo, iterate_in_thread
+from local_tts.engines.registry import EngineLoadError, EngineRegistry
 
 from conftest import FakeEngine
 
@@ -71,3 +72,212 @@ def test_registry_list_models():
     ids = [m["model_id"] for m in models]
     assert "engine_a" in ids
     assert "engine_b" in ids
+
+
+class _SlowLoadEngine(FakeEngine):
+    def __init__(self, engine_name: str, fail: bool = False) -> None:
+        super().__init__(engine_name=engine_name)
+        self.release = threading.Event()
+        self.loads = 0
+        self.fail = fail
+
+    def warmup(self) -> None:
+        self.loads += 1
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("no weights")
+
+
+async def test_registry_loads_once_for_concurrent_requests():
+    registry = EngineRegistry()
+    engine = _SlowLoadEngine("slow")
+    registry.register(engine)
+    waiters = [asyncio.create_task(registry.ensure_loaded("slow")) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    assert registry.load_state("slow") == {"state": "loading"}
+    assert not any(w.done() for w in waiters)
+    engine.release.set()
+    await asyncio.gather(*waiters)
+    assert engine.loads == 1
+    assert registry.load_state("slow")["state"] == "ready"
+
+
+async def test_registry_loads_engines_in_parallel():
+    registry = EngineRegistry()
+    engines = [_SlowLoadEngine("a"), _SlowLoadEngine("b")]
+    for engine in engines:
+        registry.register(engine)
+    futures = registry.load_all()
+    await asyncio.sleep(0.05)
+    # Both warmups are running at the same time.
+    assert [e.loads for e in engines] == [1, 1]
+    for engine in engines:
+        engine.release.set()
+    for fut in futures:
+        fut.result(timeout=5)
+
+
+async def test_registry_retries_failed_load():
+    registry = EngineRegistry()
+    engine = _SlowLoadEngine("broken", fail=True)
+    engine.release.set()
+    registry.register(engine)
+    with pytest.raises(EngineLoadError, match="no weights"):
+        await registry.ensure_loaded("broken")
+    assert registry.load_state("broken")["state"] == "failed"
+    engine.fail = False
+    await registry.ensure_loaded("broken")
+    assert engine.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_thread_yields_before_producer_finishes():
+    release = threading.Event()
+
+    def produce():
+        yield 1
+        release.wait(timeout=5)
+        yield 2
+
+    stream = iterate_in_thread(produce)
+    assert await stream.__anext__() == 1
+    release.set()
+    assert [item async for item in stream] == [2]
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_thread_backpressure():
+    produced = []
+
+    def produce():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    stream = iterate_in_thread(produce, maxsize=2)
+    assert await stream.__anext__() == 0
+    await asyncio.sleep(0.05)
+    # One item consumed, two queued, one blocked on the full queue.
+    assert len(produced) <= 4
+    await stream.aclose()
+    assert len(produced) < 100
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_thread_propagates_errors():
+    def produce():
+        yield 1
+        raise RuntimeError("boom")
+
+    items = []
+    with pytest.raises(RuntimeError, match="boom"):
+        async for item in iterate_in_thread(produce):
+            items.append(item)
+    assert items == [1]
+
+
+class FakeKokoroPipeline:
+    """Stands in for a G2P-only KPipeline."""
+
+    lang_code = "a"
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+
+    def __call__(self, text):
+        from types import SimpleNamespace
+
+        self.calls.append(text)
+        if text == self.fail_on:
+            raise RuntimeError("g2p failed")
+        yield SimpleNamespace(phonemes=f"/{text}/")
+
+
+def test_kokoro_g2p_cache():
+    from local_tts.engines.base import KokoroOptions
+    from local_tts.engines.kokoro import KokoroEngine
+
+    engine = KokoroEngine(options=KokoroOptions(g2p_cache_size=8))
+    engine._pipelines["a"] = FakeKokoroPipeline()
+
+    assert list(engine._phonemize("Hello. Again.\nBye.")) == ["/Hello./", "/Again./", "/Bye./"]
+    assert list(engine._phonemize("Hello.")) == ["/Hello./"]
+    assert engine._pipelines["a"].calls == ["Hello.", "Again.", "Bye."]
+    assert engine.stats()["g2p_cache"]["hits"] == 1
+
+
+def test_kokoro_pipeline_per_language():
+    from local_tts.engines.kokoro import KokoroEngine, voice_lang_code
+
+    assert voice_lang_code("af_heart") == "a"
+    assert voice_lang_code("bm_george") == "b"
+
+    engine = KokoroEngine()
+    engine._pipelines["a"] = FakeKokoroPipeline()
+    british = engine._pipelines["b"] = FakeKokoroPipeline()
+    assert list(engine._phonemize("Hello.", "b")) == ["/Hello./"]
+    assert list(engine._phonemize("Hello.", "a")) == ["/Hello./"]
+    # G2P results are cached per language.
+    assert british.calls == ["Hello."]
+    assert engine._pipelines["a"].calls == ["Hello."]
+
+
+def test_kokoro_g2p_runs_ahead():
+    from local_tts.engines.base import KokoroOptions
+    from local_tts.engines.kokoro import KokoroEngine
+
+    engine = KokoroEngine(options=KokoroOptions(g2p_lookahead=2))
+    engine._pipelines["a"] = FakeKokoroPipeline()
+    text = " ".join(f"Sentence {i}." for i in range(10))
+    assert list(engine._phonemize_ahead(text)) == [f"/Sentence {i}./" for i in range(10)]
+
+    engine._pipelines["a"] = FakeKokoroPipeline(fail_on="Two.")
+    stream = engine._phonemize_ahead("One. Two. Three.")
+    assert next(stream) == "/One./"
+    with pytest.raises(RuntimeError, match="g2p failed"):
+        next(stream)
+
+
+class FakeKittenModel:
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, text, voice, speed):
+        self.calls.append((text, voice))
+        return np.zeros(240, dtype=np.float32)
+
+
+def test_warmup_synthesizes_each_text_with_each_voice():
+    from local_tts.engines.base import WarmupOptions
+    from local_tts.engines.kitten import KittenEngine
+
+    warmup = WarmupOptions(texts=["One.", "Two."], voices={"kitten": ["bella", "leo"]})
+    engine = KittenEngine(warmup=warmup)
+    engine._model = FakeKittenModel()
+    engine.warmup()
+    assert engine._model.calls == [
+        ("One.", "Bella"), ("Two.", "Bella"), ("One.", "Leo"), ("Two.", "Leo")
+    ]
+
+    engine = KittenEngine(warmup=WarmupOptions(texts=["One."]))
+    engine._model = FakeKittenModel()
+    engine.warmup()
+    assert engine._model.calls == [("One.", "Bella")]
+
+    engine = KittenEngine(warmup=WarmupOptions(texts=[]))
+    engine._model = FakeKittenModel()
+    engine.warmup()
+    assert engine._model.calls == []
+
+
+def test_hosted_engine_has_no_scheduler():
+    from local_tts.engines.base import ModelOptions, SchedulerOptions
+    from local_tts.engines.registry import create_engine
+
+    options = ModelOptions(scheduler=SchedulerOptions(workers=3))
+    engine = create_engine("kokoro", options, hosted=True)
+    assert engine.scheduler is None
+    # G2P is still sized for the worker process's threads.
+    assert engine._g2p_executor._max_workers == 3
+    assert create_engine("kokoro", options).scheduler.workers == 3
@@ -0,0 +1,61 @@
+"""Tests for the load generator, run against an in-process fake server."""
+
+import pytest
+
+from local_tts.client.loadtest import (
+    LoadTestConfig,
+    _Playback,
+    fake_server,
+    format_summary,
+    run_load_test,
+    summarize,
+)
+
+
+def test_playback_counts_underruns():
+    playback = _Playback()
+    playback.feed(0.0, 2400)  # plays until 0.1
+    playback.feed(0.05, 2400)  # arrives in time, plays until 0.2
+    playback.feed(0.5, 2400)  # 0.3s late
+    assert playback.underruns == 1
+    assert playback.stall == pytest.approx(0.3)
+    assert playback.samples == 7200
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transport,binary", [("http", False), ("ws", False), ("ws", True)])
+async def test_load_test_against_fake_server(transport, binary):
+    async with fake_server(chunk_delay=0.0) as url:
+        config = LoadTestConfig(
+            server_url=url,
+            transport=transport,
+            model_id="fake",
+            voice_id="test_voice",
+            sessions=6,
+            concurrency=3,
+            drip_rate=200,
+            binary=binary,
+            timeout=10,
+        )
+        results = await run_load_test(config)
+
+    assert all(r.ok for r in results), [r.error for r in results]
+    # FakeEngine: 3 chunks * 2400 samples for each generation; the
+    # WebSocket may split a dripped text into several generations.
+    for r in results:
+        assert r.audio_seconds / 0.3 == pytest.approx(round(r.audio_seconds / 0.3))
+        assert r.audio_seconds >= 0.3
+    summary = summarize(results, 1.0)
+    assert summary["errors"] == 0
+    assert summary["ttfa"]["p50"] is not None
+    assert "ttfa" in format_summary(summary)
+
+
+@pytest.mark.asyncio
+async def test_load_test_reports_errors():
+    async with fake_server() as url:
+        config = LoadTestConfig(server_url=url, model_id="nonexistent", sessions=2, timeout=10)
+        results = await run_load_test(config)
+    summary = summarize(results, 1.0)
+    assert summary["error_rate"] == 1.0
+    assert summary["error_kinds"] == {"HTTP 400": 2}
@@ -0,0 +1,77 @@
+"""Tests for the MCP tool's shared audio output."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from local_tts.server.mcp import SpeechOutput
+
+
+class RecordingPlayer:
+    def __init__(self):
+        self.events = []
+
+    def start(self):
+        self.events.append("start")
+
+    def play_chunk(self, audio):
+        self.events.append(int(audio[0]))
+
+    def drain(self):
+        self.events.append("drain")
+
+    def interrupt(self):
+        self.events.append("interrupt")
+
+
+async def _chunks(tag, n, gate=None):
+    for _ in range(n):
+        if gate is not None:
+            await gate.wait()
+        yield np.full(10, tag, dtype=np.int16)
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_speech_output_plays_while_streaming():
+    player = RecordingPlayer()
+    output = SpeechOutput(player)
+
+    async def chunks():
+        yield np.ones(10, dtype=np.int16)
+        # The first chunk is already playing before the rest exists.
+        assert player.events == ["start", 1]
+        yield np.ones(10, dtype=np.int16)
+
+    assert await output.play(chunks()) == 20
+    assert player.events == ["start", 1, 1, "drain"]
+
+
+@pytest.mark.asyncio
+async def test_speech_output_serializes_calls():
+    player = RecordingPlayer()
+    output = SpeechOutput(player)
+    gate = asyncio.Event()
+    first = asyncio.create_task(output.play(_chunks(1, 2, gate)))
+    second = asyncio.create_task(output.play(_chunks(2, 2)))
+    await asyncio.sleep(0.01)
+    gate.set()
+    assert await asyncio.gather(first, second) == [20, 20]
+    assert player.events == ["start", 1, 1, "drain", "start", 2, 2, "drain"]
+
+
+@pytest.mark.asyncio
+async def test_speech_output_interrupts_on_error():
+    player = RecordingPlayer()
+    output = SpeechOutput(player)
+
+    async def chunks():
+        yield np.ones(10, dtype=np.int16)
+        raise ValueError("engine failed")
+
+    with pytest.raises(ValueError):
+        await output.play(chunks())
+    assert player.events == ["start", 1, "interrupt"]
+    # The lock was released, so the next call still plays.
+    assert await output.play(_chunks(3, 1)) == 10
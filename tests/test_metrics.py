@@ -0,0 +1,148 @@
+"""Tests for the Prometheus metrics."""
+
+import json
+
+from local_tts.metrics import (
+    IN_FLIGHT,
+    OPEN_WEBSOCKETS,
+    REQUESTS,
+    TIME_TO_FIRST_CHUNK,
+    Counter,
+    Gauge,
+    Histogram,
+)
+
+
+def test_histogram_render():
+    h = Histogram("test_seconds", "A test.", ("model_id",), buckets=(0.1, 1))
+    h.observe(0.05, "a")
+    h.observe(0.1, "a")
+    h.observe(5, "a")
+    assert h.render().splitlines() == [
+        "# HELP test_seconds A test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{model_id="a",le="0.1"} 2',
+        'test_seconds_bucket{model_id="a",le="1"} 2',
+        'test_seconds_bucket{model_id="a",le="+Inf"} 3',
+        'test_seconds_sum{model_id="a"} 5.15',
+        'test_seconds_count{model_id="a"} 3',
+    ]
+
+
+def test_gauge_and_counter():
+    g = Gauge("test_open", "Open things.", ("voice",))
+    g.inc('say "hi"')
+    g.inc('say "hi"')
+    g.dec('say "hi"')
+    assert 'test_open{voice="say \\"hi\\""} 1' in g.render()
+
+    c = Counter("test_total", "Things.")
+    c.inc()
+    assert "test_total 1" in c.render()
+
+
+def test_http_synthesis_metrics(client):
+    labels = ("fake", "test_voice", "http")
+    before = TIME_TO_FIRST_CHUNK.count(*labels)
+    ok_before = REQUESTS.get(*labels, "ok")
+
+    r = client.post(
+        "/v1/text-to-speech/test_voice/stream",
+        json={"text": "hello", "model_id": "fake"},
+    )
+    assert r.status_code == 200
+
+    assert TIME_TO_FIRST_CHUNK.count(*labels) == before + 1
+    assert REQUESTS.get(*labels, "ok") == ok_before + 1
+    assert IN_FLIGHT.get(*labels) == 0
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert 'tts_real_time_factor_count{model_id="fake",voice="test_voice",transport="http"}' in r.text
+    assert 'tts_chunk_bytes_bucket{model_id="fake",voice="test_voice",transport="http",le="+Inf"}' in r.text
+
+
+def test_unknown_voice_label(client):
+    client.post(
+        "/v1/text-to-speech/some-audio-prompt.wav/stream",
+        json={"text": "hello", "model_id": "fake"},
+    )
+    assert REQUESTS.get("fake", "other", "http", "ok") >= 1
+
+
+async def test_voice_labels_are_cached_until_a_voice_is_added():
+    from local_tts.engines.base import VoiceInfo
+    from local_tts.engines.fake import FakeEngine
+    from local_tts.engines.registry import EngineRegistry
+    from local_tts.engines.scheduler import InferenceScheduler
+
+    class CountingEngine(FakeEngine):
+        def __init__(self):
+            super().__init__()
+            self.scheduler = InferenceScheduler("fake")
+            self.listed = 0
+            self.custom = []
+
+        def list_voices(self):
+            self.listed += 1
+            return super().list_voices() + self.custom
+
+        def add_voice(self, name, audio):
+            self.custom.append(VoiceInfo(id=name, name=name, language="en", gender="unknown"))
+            return self.custom[-1]
+
+    registry = EngineRegistry()
+    engine = CountingEngine()
+    registry.register(engine)
+    for _ in range(3):
+        assert "test_voice" in await registry.voice_ids("fake")
+    assert engine.listed == 1
+
+    await registry.add_voice("fake", "narrator", b"RIFF")
+    assert "narrator" in await registry.voice_ids("fake")
+    assert engine.listed == 2
+
+
+def test_websocket_metrics(client):
+    labels = ("fake", "test_voice", "ws")
+    ok_before = REQUESTS.get(*labels, "ok")
+    with client.websocket_connect(
+        "/v1/text-to-speech/test_voice/stream-input?model_id=fake"
+    ) as ws:
+        ws.send_text(json.dumps({"text": " "}))
+        ws.send_text(json.dumps({"text": "hello"}))
+        ws.send_text(json.dumps({"text": ""}))
+        while not json.loads(ws.receive_text())["isFinal"]:
+            pass
+        assert OPEN_WEBSOCKETS.get("fake", "test_voice") == 1
+
+    assert REQUESTS.get(*labels, "ok") == ok_before + 1
+
+
+def test_scheduler_metrics(client, fake_engine):
+    from local_tts.engines.scheduler import InferenceScheduler
+
+    fake_engine.scheduler = InferenceScheduler("fake")
+    r = client.get("/metrics")
+    assert 'tts_scheduler_queue_depth{engine="fake"} 0' in r.text
+    assert 'tts_scheduler_in_flight{engine="fake"} 0' in r.text
+    assert 'tts_scheduler_rejected_total{engine="fake"} 0' in r.text
+    assert 'tts_scheduler_timeouts_total{engine="fake"} 0' in r.text
+
+
+def test_metrics_collectors_run_on_render():
+    from local_tts.metrics import MetricsRegistry
+
+    metrics = MetricsRegistry()
+    g = metrics.register(Gauge("test_level", "A level."))
+    metrics.add_collector(lambda: g.set(7))
+    metrics.add_collector(lambda: 1 / 0)  # logged, does not break the scrape
+    assert "test_level 7" in metrics.render()
+
+
+def test_g2p_cache_metrics(client, fake_engine):
+    fake_engine.stats = lambda: {"g2p_cache": {"hits": 3, "misses": 2}}
+    r = client.get("/metrics")
+    assert 'tts_g2p_cache_hits_total{engine="fake"} 3' in r.text
+    assert 'tts_g2p_cache_misses_total{engine="fake"} 2' in r.text
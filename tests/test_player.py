@@ -0,0 +1,168 @@
+"""Tests for the client's ring buffer playback, driving the callback directly."""
+
+import asyncio
+import sys
+import threading
+import time
+import types
+
+import numpy as np
+import pytest
+
+from local_tts.client.player import AudioPlayer, RingBuffer
+from local_tts.client.repl import _synthesize_with_interrupt
+
+
+def test_ring_buffer_wraps_and_grows():
+    ring = RingBuffer(8)
+    out = np.zeros(8, dtype=np.int16)
+    ring.write(np.arange(6, dtype=np.int16))
+    assert ring.read_into(out[:4]) == 4
+    ring.write(np.arange(6, 12, dtype=np.int16))  # wraps around the end
+    assert len(ring) == 8
+    assert ring.read_into(out) == 8
+    assert out.tolist() == [4, 5, 6, 7, 8, 9, 10, 11]
+
+    ring.write(np.arange(5, dtype=np.int16))
+    with pytest.raises(ValueError):
+        ring.write(np.arange(5, 20, dtype=np.int16))  # more than fits
+    ring.grow(np.zeros(20, dtype=np.int16))
+    ring.write(np.arange(5, 20, dtype=np.int16))
+    assert ring.capacity == 20
+    out = np.zeros(32, dtype=np.int16)
+    assert ring.read_into(out) == 20
+    assert out[:20].tolist() == list(range(20))
+
+
+def _pull(player, frames):
+    out = np.full((frames, 1), -1, dtype=np.int16)
+    player._callback(out, frames, None, None)
+    return out[:, 0]
+
+
+def _player():
+    # 1 kHz keeps the arithmetic readable: 100 ms pre-roll is 100 samples.
+    player = AudioPlayer(sample_rate=1000, preroll_ms=100, max_preroll_ms=150)
+    player._drained.clear()
+    return player
+
+
+def test_player_prerolls_before_playing():
+    player = _player()
+    player.play_chunk(np.ones(60, dtype=np.int16))
+    assert not _pull(player, 20).any()  # still buffering
+    player.play_chunk(np.ones(60, dtype=np.int16))
+    assert _pull(player, 20).all()
+    assert player.stats()["buffered_ms"] == 100
+
+
+def test_player_underrun_pauses_and_raises_preroll():
+    player = _player()
+    player.play_chunk(np.ones(100, dtype=np.int16))
+    assert _pull(player, 100).all()
+    out = _pull(player, 20)
+    assert not out.any()
+    assert player.underruns == 1
+    assert player.stats()["preroll_ms"] == 150
+
+    # Waits for the larger pre-roll before resuming.
+    player.play_chunk(np.ones(100, dtype=np.int16))
+    assert not _pull(player, 20).any()
+    player.play_chunk(np.ones(50, dtype=np.int16))
+    assert _pull(player, 20).all()
+    assert player.underruns == 1
+
+
+def test_player_drain_plays_short_utterance():
+    player = _player()
+    player._stream = object()  # pretend a stream is open
+    player.play_chunk(np.ones(30, dtype=np.int16))
+    drained = threading.Thread(target=player.drain)
+    drained.start()
+    # Shorter than the pre-roll, but complete, so it plays out.
+    while not player._eof:
+        time.sleep(0.001)
+    out = _pull(player, 40)
+    assert out[:30].all() and not out[30:].any()
+    drained.join(timeout=5)
+    assert not drained.is_alive()
+    assert player.underruns == 0
+
+
+def test_player_start_with_synchronous_callback(monkeypatch):
+    class OutputStream:
+        def __init__(self, callback, **kwargs):
+            self.callback = callback
+
+        def start(self):
+            # Like host APIs that pull the first block from within start().
+            self.callback(np.zeros((20, 1), dtype=np.int16), 20, None, None)
+
+    monkeypatch.setitem(sys.modules, "sounddevice", types.SimpleNamespace(OutputStream=OutputStream))
+    player = _player()
+    started = threading.Thread(target=player.start, daemon=True)
+    started.start()
+    started.join(timeout=5)
+    assert not started.is_alive()
+    assert isinstance(player._stream, OutputStream)
+
+
+def test_player_interrupt_discards_audio():
+    player = _player()
+    player.play_chunk(np.ones(200, dtype=np.int16))
+    assert _pull(player, 20).all()
+    player.interrupt()
+    assert not _pull(player, 20).any()
+    player.play_chunk(np.ones(200, dtype=np.int16))
+    assert player.stats()["buffered_ms"] == 0
+
+
+def test_player_grows_for_long_utterances():
+    player = _player()
+    player.play_chunk(np.ones(20_000, dtype=np.int16))
+    player.play_chunk(np.full(20_000, 2, dtype=np.int16))  # past the 30 s buffer
+    assert player.stats()["buffered_ms"] == 40_000
+    out = _pull(player, 40_000)
+    assert (out[:20_000] == 1).all() and (out[20_000:] == 2).all()
+
+
+class BlockingPlayer:
+    """Plays nothing; drain blocks until interrupted, like a long utterance."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.chunks = 0
+
+    def start(self):
+        pass
+
+    def play_chunk(self, audio):
+        self.chunks += 1
+
+    def drain(self):
+        self.done.wait(timeout=5)
+
+    def interrupt(self):
+        self.done.set()
+
+    def stop(self):
+        pass
+
+
+class OneChunkClient:
+    async def synthesize_sentences(self, text, speed, lookahead):
+        yield np.ones(10, dtype=np.int16)
+
+
+async def test_interrupt_during_playback():
+    player = BlockingPlayer()
+    stdin = asyncio.StreamReader()
+    task = asyncio.create_task(
+        _synthesize_with_interrupt(OneChunkClient(), player, "Hi.", 1.0, 2, stdin)
+    )
+    while not player.chunks:
+        await asyncio.sleep(0.01)
+    # Synthesis is over and playback is draining; the loop still reads input.
+    stdin.feed_data(b"/interrupt\n")
+    assert await asyncio.wait_for(task, 2) == (False, None)
+    assert player.done.is_set()
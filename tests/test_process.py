@@ -0,0 +1,152 @@
+"""Tests for hosting an engine in a worker process."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from local_tts.engines.base import VoiceInfo
+from local_tts.engines.process import ProcessEngine, _RingWriter
+from local_tts.engines.scheduler import InferenceScheduler
+
+
+class SyncEngine:
+    """Minimal engine exposing the blocking generator the child calls."""
+
+    name = "sync"
+    variant = "v1"
+
+    def list_voices(self):
+        return [VoiceInfo(id="test_voice", name="Test Voice", language="en", gender="female")]
+
+    def warmup(self):
+        pass
+
+    def stats(self):
+        return {"loaded": True}
+
+    def _generate_sync(self, text, voice_id, speed):
+        if voice_id != "test_voice":
+            raise ValueError(f"Unknown voice: {voice_id}")
+        for i, word in enumerate(text.split()):
+            yield np.full(int(word), i, dtype=np.int16)
+
+
+def make_engine():
+    return SyncEngine()
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = ProcessEngine(
+        make_engine,
+        name="sync",
+        scheduler=InferenceScheduler("sync", workers=2),
+        ring_bytes=4096,
+    )
+    yield engine
+    engine.close()
+
+
+def test_ring_writer_rewinds_when_empty():
+    ring = bytearray(1000)
+    writer = _RingWriter(memoryview(ring), 0, 1000)
+    assert writer.write(np.ones(250, dtype=np.int16)) == (0, 500)
+    writer.release(500)
+    # 600 bytes fit neither before nor after offset 500, but the ring is
+    # empty, so the chunk starts over at offset 0 instead of waiting forever.
+    assert writer.write(np.full(300, 2, dtype=np.int16)) == (0, 1600)
+    assert bytes(ring[:600]) == np.full(300, 2, dtype=np.int16).tobytes()
+    # While it is in use, a chunk that would have to wrap goes over the pipe.
+    assert writer.write(np.ones(350, dtype=np.int16)) is None
+    writer.release(1600)
+    assert writer.write(np.ones(350, dtype=np.int16)) == (0, 2700)
+
+
+async def _collect(stream):
+    return [chunk.copy() async for chunk in stream]
+
+
+def test_process_engine_metadata(engine):
+    assert engine.variant == "v1"
+    assert [v.id for v in engine.list_voices()] == ["test_voice"]
+    engine.warmup()
+    assert engine.stats()["loaded"] is True
+
+
+async def test_process_engine_streams_through_ring(engine):
+    # 1500 samples (3000 bytes) fits in the 4096 byte ring but forces a wrap,
+    # and 5000 samples is too large for it and goes over the pipe instead.
+    chunks = await _collect(engine.generate_audio_stream("100 1500 1500 5000 7", "test_voice"))
+    assert [len(c) for c in chunks] == [100, 1500, 1500, 5000, 7]
+    for i, chunk in enumerate(chunks):
+        assert np.all(chunk == i)
+
+
+async def test_process_engine_views_are_read_only(engine):
+    async for chunk in engine.generate_audio_stream("10", "test_voice"):
+        assert not chunk.flags.writeable
+        assert not chunk.flags.owndata
+
+
+async def test_process_engine_propagates_errors(engine):
+    with pytest.raises(ValueError, match="Unknown voice"):
+        await _collect(engine.generate_audio_stream("10", "nope"))
+
+
+async def test_process_engine_early_exit_frees_ring(engine):
+    for _ in range(3):
+        stream = engine.generate_audio_stream("1000 1000 1000 1000 1000", "test_voice")
+        async for _ in stream:
+            break
+        await stream.aclose()
+    chunks = await _collect(engine.generate_audio_stream("1 2", "test_voice"))
+    assert [len(c) for c in chunks] == [1, 2]
+
+
+async def test_process_engine_concurrent_requests(engine):
+    a, b = await asyncio.gather(
+        _collect(engine.generate_audio_stream("800 800 800", "test_voice")),
+        _collect(engine.generate_audio_stream("300 300 300 300", "test_voice")),
+    )
+    assert [len(c) for c in a] == [800] * 3
+    assert [len(c) for c in b] == [300] * 4
+    assert np.all(b[3] == 3)
+
+
+def make_slow_engine():
+    import time
+
+    time.sleep(0.5)
+    return SyncEngine()
+
+
+def test_process_engine_starts_without_waiting():
+    engine = ProcessEngine(make_slow_engine, name="sync", ring_bytes=4096)
+    try:
+        # The constructor returns while the child is still building its engine.
+        assert engine.stats()["starting"] is True
+        engine.warmup()
+        assert engine.stats()["loaded"] is True
+        assert [v.id for v in engine.list_voices()] == ["test_voice"]
+    finally:
+        engine.close()
+
+
+def test_process_engine_reports_wrong_engine():
+    engine = ProcessEngine(make_engine, name="other", ring_bytes=4096)
+    try:
+        with pytest.raises(ValueError, match="expected 'other'"):
+            engine.warmup()
+    finally:
+        engine.close()
+
+
+async def test_process_engine_close_with_live_view():
+    engine = ProcessEngine(make_engine, name="sync", ring_bytes=4096)
+    kept = None
+    async for chunk in engine.generate_audio_stream("10", "test_voice"):
+        kept = chunk
+    # Still holding a view into shared memory must not break shutdown.
+    engine.close()
+    assert len(kept) == 10
@@ -0,0 +1,108 @@
+"""Tests for offline rendering, run against an in-process fake server."""
+
+import json
+import os
+import wave
+
+import pytest
+
+from local_tts.client.http import TTSHTTPClient
+from local_tts.client.loadtest import fake_server
+from local_tts.client.render import Segment, load_segments, render
+
+
+def _frames(path):
+    with wave.open(str(path)) as w:
+        assert w.getsampwidth() == 2
+        return w.getnframes(), w.getframerate()
+
+
+def test_load_segments_text(tmp_path):
+    path = tmp_path / "book.txt"
+    path.write_text("First line.\n\n  Second line.  \n")
+    segments = load_segments(str(path))
+    assert [(s.id, s.text) for s in segments] == [("0001", "First line."), ("0002", "Second line.")]
+
+
+def test_load_segments_jsonl(tmp_path):
+    path = tmp_path / "book.jsonl"
+    path.write_text(
+        json.dumps({"id": "intro", "text": "Hi.", "voice_id": "bf_emma", "speed": 1.2})
+        + "\n"
+        + json.dumps({"text": "Bye."})
+        + "\n"
+    )
+    segments = load_segments(str(path))
+    assert segments[0] == Segment("intro", "Hi.", voice_id="bf_emma", speed=1.2)
+    assert segments[1].id == "0002"
+
+    path.write_text(json.dumps({"id": "a", "text": "x"}) + "\n{not json\n")
+    with pytest.raises(ValueError, match=":2:"):
+        load_segments(str(path))
+    path.write_text(json.dumps({"id": "../x", "text": "x"}) + "\n")
+    with pytest.raises(ValueError, match="Invalid segment id"):
+        load_segments(str(path))
+    path.write_text(json.dumps({"id": "a", "text": "x"}) + "\n" + json.dumps({"id": "a", "text": "y"}))
+    with pytest.raises(ValueError, match="Duplicate"):
+        load_segments(str(path))
+
+
+@pytest.mark.asyncio
+async def test_render_resumes_and_concatenates(tmp_path):
+    segments = [Segment(f"s{i}", f"Segment {i}.") for i in range(5)]
+    out = tmp_path / "out"
+    concat = tmp_path / "all.wav"
+    async with fake_server(chunk_delay=0.0) as url:
+        async with TTSHTTPClient(url, "test_voice", "fake") as client:
+            summary = await render(segments, str(out), client, concurrency=2, concat=str(concat))
+            assert (summary.rendered, summary.skipped, summary.failed) == (5, 0, [])
+            for segment in segments:
+                assert _frames(out / f"{segment.id}.wav") == (7200, 24000)
+            assert _frames(concat) == (5 * 7200, 24000)
+            assert not [f for f in os.listdir(out) if f.endswith(".part")]
+
+            summary = await render(segments, str(out), client)
+            assert (summary.rendered, summary.skipped) == (0, 5)
+
+            # A different rate does not count as already rendered.
+            summary = await render(segments[:1], str(out), client, sample_rate=16000)
+            assert summary.rendered == 1
+            assert _frames(out / "s0.wav") == (4800, 16000)
+
+
+@pytest.mark.asyncio
+async def test_render_redoes_segments_whose_text_or_settings_changed(tmp_path):
+    def numbered(texts):
+        return [Segment(f"{i + 1:04d}", text) for i, text in enumerate(texts)]
+
+    async with fake_server(chunk_delay=0.0) as url:
+        async with TTSHTTPClient(url, "test_voice", "fake") as client:
+            await render(numbered(["A.", "B.", "C."]), str(tmp_path), client)
+
+            summary = await render(numbered(["A.", "B2.", "C."]), str(tmp_path), client)
+            assert (summary.rendered, summary.skipped) == (1, 2)
+
+            # A line inserted at the top shifts every later id.
+            segments = numbered(["New.", "A.", "B2.", "C."])
+            summary = await render(segments, str(tmp_path), client)
+            assert (summary.rendered, summary.skipped) == (4, 0)
+
+            summary = await render(segments, str(tmp_path), client, speed=1.5)
+            assert (summary.rendered, summary.skipped) == (4, 0)
+            segments[0].voice_id = "test_voice2"
+            summary = await render(segments, str(tmp_path), client, speed=1.5)
+            assert (summary.rendered, summary.skipped) == (1, 3)
+
+
+@pytest.mark.asyncio
+async def test_render_reports_failures(tmp_path):
+    segments = [Segment("ok", "Fine."), Segment("bad", "Broken.", model_id="nonexistent")]
+    concat = tmp_path / "all.wav"
+    async with fake_server(chunk_delay=0.0) as url:
+        async with TTSHTTPClient(url, "test_voice", "fake") as client:
+            summary = await render(segments, str(tmp_path), client, concat=str(concat))
+    assert summary.rendered == 1
+    assert summary.failed == ["bad"]
+    assert not (tmp_path / "bad.wav").exists()
+    assert not (tmp_path / "bad.wav.part").exists()
+    assert not concat.exists()
@@ -0,0 +1,101 @@
+"""Tests for running several replicas of an engine."""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from local_tts.engines.base import ModelOptions, ReplicaOptions
+from local_tts.engines.registry import initialize_engines
+from local_tts.engines.replicas import ReplicaSet, plan_cpus
+from local_tts.engines.scheduler import InferenceScheduler
+
+from conftest import FakeEngine
+
+
+class GatedEngine(FakeEngine):
+    """Runs on a real scheduler and blocks until released."""
+
+    def __init__(self, release: threading.Event):
+        super().__init__(num_chunks=1)
+        self.scheduler = InferenceScheduler("fake")
+        self.release = release
+        self.started = threading.Event()
+
+    def _generate_sync(self):
+        self.started.set()
+        self.release.wait(timeout=5)
+        yield np.zeros(10, dtype=np.int16)
+
+    async def generate_audio_stream(self, text, voice_id, speed=1.0):
+        async for chunk in self.scheduler.stream(self._generate_sync):
+            yield chunk
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+@pytest.mark.asyncio
+async def test_replica_set_dispatches_to_least_loaded():
+    release = threading.Event()
+    replicas = ReplicaSet([GatedEngine(release) for _ in range(3)])
+
+    tasks = [
+        asyncio.create_task(_collect(replicas.generate_audio_stream("hi", "test_voice")))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0.05)
+    assert all(r.scheduler.in_flight == 1 for r in replicas.replicas)
+    assert replicas.stats()["in_flight"] == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+    stats = replicas.stats()
+    assert [r["dispatched"] for r in stats["replicas"]] == [1, 1, 1]
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_replica_set_spreads_sequential_requests():
+    release = threading.Event()
+    release.set()
+    replicas = ReplicaSet([GatedEngine(release) for _ in range(2)])
+    for _ in range(4):
+        await _collect(replicas.generate_audio_stream("hi", "test_voice"))
+    assert [r["dispatched"] for r in replicas.stats()["replicas"]] == [2, 2]
+
+    from local_tts.engines.registry import EngineRegistry
+    from local_tts.metrics import REPLICA_DISPATCHED, SCHEDULER_IN_FLIGHT
+
+    registry = EngineRegistry()
+    registry.register(replicas)
+    registry.collect_metrics()
+    assert REPLICA_DISPATCHED.get("fake", "0") == 2
+    assert REPLICA_DISPATCHED.get("fake", "1") == 2
+    assert SCHEDULER_IN_FLIGHT.get("fake") == 0
+
+
+def test_replica_set_metadata():
+    replicas = ReplicaSet([FakeEngine(), FakeEngine()])
+    assert replicas.name == "fake"
+    assert [v.id for v in replicas.list_voices()] == ["test_voice", "test_voice2"]
+    with pytest.raises(ValueError):
+        ReplicaSet([])
+
+
+def test_plan_cpus():
+    assert plan_cpus(2, range(8)) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert plan_cpus(3, range(8)) == [[0, 1, 2], [3, 4, 5], [6, 7]]
+    assert plan_cpus(3, [0, 1]) == [[0], [1], [0]]
+
+
+def test_unknown_engine_in_replica_counts():
+    options = ModelOptions(
+        replicas=ReplicaOptions(counts={"nope": 2}),
+        preload=False,
+        disabled={"kokoro", "pocket", "kitten"},
+    )
+    with pytest.raises(ValueError, match="nope"):
+        initialize_engines(options)
@@ -0,0 +1,78 @@
+"""Tests for the per-engine inference scheduler."""
+
+import asyncio
+import threading
+
+import pytest
+
+from local_tts.engines.scheduler import InferenceScheduler, QueueFullError, QueueTimeoutError
+
+
+def _blocking_stream(started: threading.Event, release: threading.Event):
+    started.set()
+    release.wait(timeout=5)
+    yield b"done"
+
+
+async def _consume(scheduler, *args):
+    return [item async for item in scheduler.stream(_blocking_stream, *args)]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_limits_concurrency():
+    scheduler = InferenceScheduler("test", workers=1, max_queue=4)
+    started, release = threading.Event(), threading.Event()
+    first = asyncio.create_task(_consume(scheduler, started, release))
+    await asyncio.to_thread(started.wait, 5)
+
+    started2 = threading.Event()
+    second = asyncio.create_task(_consume(scheduler, started2, release))
+    await asyncio.sleep(0.05)
+    assert scheduler.in_flight == 1
+    assert scheduler.queue_depth == 1
+    assert not started2.is_set()
+
+    release.set()
+    assert await first == [b"done"]
+    assert await second == [b"done"]
+    assert scheduler.in_flight == 0
+    assert scheduler.queue_depth == 0
+    assert scheduler.stats()["admitted"] == 2
+
+
+@pytest.mark.asyncio
+async def test_scheduler_rejects_when_queue_full():
+    scheduler = InferenceScheduler("test", workers=1, max_queue=0)
+    started, release = threading.Event(), threading.Event()
+    first = asyncio.create_task(_consume(scheduler, started, release))
+    await asyncio.to_thread(started.wait, 5)
+
+    with pytest.raises(QueueFullError):
+        await _consume(scheduler, threading.Event(), release)
+    assert scheduler.stats()["rejected"] == 1
+
+    release.set()
+    await first
+
+
+@pytest.mark.asyncio
+async def test_scheduler_queue_timeout():
+    scheduler = InferenceScheduler("test", workers=1, max_queue=4, queue_timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+    first = asyncio.create_task(_consume(scheduler, started, release))
+    await asyncio.to_thread(started.wait, 5)
+
+    with pytest.raises(QueueTimeoutError):
+        await _consume(scheduler, threading.Event(), release)
+    assert scheduler.queue_depth == 0
+    assert scheduler.stats()["timeouts"] == 1
+
+    release.set()
+    await first
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_run():
+    scheduler = InferenceScheduler("test", workers=2)
+    assert await scheduler.run(sum, [1, 2, 3]) == 6
@@ -60,3 +60,80 @@ def test_stream_tts_with_speed(client):
     assert r.status_code == 200
     audio = np.frombuffer(r.content, dtype=np.int16)
     assert len(audio) == 7200
+
+
+def test_stream_tts_output_format(client):
+    r = client.post(
+        "/v1/text-to-speech/test_voice/stream?output_format=ulaw_8000",
+        json={"text": "hello", "model_id": "fake"},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("audio/PCMU")
+    # 7200 samples at 24 kHz -> 2400 one-byte samples at 8 kHz
+    assert len(r.content) == 2400
+
+    r = client.post(
+        "/v1/text-to-speech/test_voice/stream?output_format=pcm_16000",
+        json={"text": "hello", "model_id": "fake"},
+    )
+    assert r.status_code == 200
+    assert len(np.frombuffer(r.content, dtype=np.int16)) == 4800
+
+
+def test_stream_tts_unsupported_output_format(client):
+    r = client.post(
+        "/v1/text-to-speech/test_voice/stream?output_format=opus_48000_64",
+        json={"text": "hello", "model_id": "fake"},
+    )
+    assert r.status_code == 400
+
+
+def test_stream_tts_frame_ms(client):
+    r = client.post(
+        "/v1/text-to-speech/test_voice/stream?frame_ms=20",
+        json={"text": "hello", "model_id": "fake"},
+    )
+    assert r.status_code == 200
+    assert len(r.content) == 14400
+
+    r = client.post(
+        "/v1/text-to-speech/test_voice/stream?frame_ms=5000",
+        json={"text": "hello", "model_id": "fake"},
+    )
+    assert r.status_code == 400
+
+
+def test_health_live(client):
+    r = client.get("/health/live")
+    assert r.status_code == 200
+
+
+def test_health_ready(client, fake_engine):
+    from local_tts.engines.registry import get_registry
+
+    # Not preloaded: loads on first use, so the server is ready.
+    r = client.get("/health/ready")
+    assert r.status_code == 200
+    assert r.json()["engines"]["fake"]["state"] == "unloaded"
+
+    get_registry().load(fake_engine.name).result(timeout=5)
+    r = client.get("/health/ready")
+    assert r.status_code == 200
+    assert r.json()["status"] == "ready"
+    assert r.json()["engines"]["fake"]["state"] == "ready"
+
+
+def test_health_ready_while_loading(client, fake_engine):
+    import threading
+
+    from local_tts.engines.registry import get_registry
+
+    release = threading.Event()
+    fake_engine.warmup = lambda: release.wait(5)
+    fut = get_registry().load(fake_engine.name)
+    r = client.get("/health/ready")
+    assert r.status_code == 503
+    assert r.json()["engines"]["fake"]["state"] == "loading"
+    release.set()
+    fut.result(timeout=5)
+    assert client.get("/health/ready").status_code == 200
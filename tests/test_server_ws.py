@@ -5,6 +5,8 @@ import json
 
 import numpy as np
 
+from local_tts.server.websocket import TextBuffer
+
 
 def test_websocket_basic_flow(client):
     with client.websocket_connect(
@@ -109,3 +111,137 @@ def test_websocket_empty_eos_without_text(client):
         raw = ws.receive_text()
         msg = json.loads(raw)
         assert msg["isFinal"] is True
+
+
+def test_websocket_output_format(client):
+    with client.websocket_connect(
+        "/v1/text-to-speech/test_voice/stream-input?model_id=fake&output_format=ulaw_8000"
+    ) as ws:
+        ws.send_text(json.dumps({"text": " "}))
+        ws.send_text(json.dumps({"text": "hello world"}))
+        ws.send_text(json.dumps({"text": ""}))
+
+        total = 0
+        while True:
+            msg = json.loads(ws.receive_text())
+            if msg["isFinal"]:
+                break
+            total += len(base64.b64decode(msg["audio"]))
+
+        assert total == 2400
+
+
+def test_websocket_generates_on_sentence_boundary(client):
+    with client.websocket_connect(
+        "/v1/text-to-speech/test_voice/stream-input?model_id=fake"
+    ) as ws:
+        ws.send_text(json.dumps({"text": " "}))
+        ws.send_text(json.dumps({"text": "Hello "}))
+        ws.send_text(json.dumps({"text": "there. How"}))
+
+        # The first sentence is spoken before the stream ends.
+        for _ in range(3):
+            msg = json.loads(ws.receive_text())
+            assert not msg["isFinal"]
+            assert msg["audio"]
+
+        ws.send_text(json.dumps({"text": " are you?"}))
+        ws.send_text(json.dumps({"text": ""}))
+
+        chunks = 0
+        while not json.loads(ws.receive_text())["isFinal"]:
+            chunks += 1
+        assert chunks == 3
+
+
+def test_text_buffer_sentence_boundary():
+    buffer = TextBuffer()
+    buffer.append("It costs 3.")
+    assert buffer.take() is None
+    buffer.append("14 dollars. And")
+    assert buffer.take() == "It costs 3.14 dollars."
+    assert buffer.take(flush=True) == "And"
+    assert buffer.take(flush=True) is None
+
+
+def test_text_buffer_chunk_length_schedule():
+    buffer = TextBuffer([10, 20])
+    buffer.append("one two three")
+    assert buffer.take() == "one two"
+    assert buffer.text == "three"
+    buffer.append(" four five")
+    # Second threshold is 20 characters.
+    assert buffer.take() is None
+    buffer.append(" six seven eight")
+    assert buffer.take() == "three four five six seven"
+
+
+def test_text_buffer_try_trigger():
+    buffer = TextBuffer()
+    buffer.append("word " * 12)
+    assert buffer.take() is None
+    assert buffer.take(try_trigger=True) == ("word " * 12).strip()
+
+
+def test_websocket_binary_frames(client):
+    with client.websocket_connect(
+        "/v1/text-to-speech/test_voice/stream-input?model_id=fake&binary=true"
+    ) as ws:
+        ws.send_text(json.dumps({"text": " "}))
+        ws.send_text(json.dumps({"text": "hello world"}))
+        ws.send_text(json.dumps({"text": ""}))
+
+        chunks = []
+        while True:
+            msg = ws.receive()
+            if msg.get("text") is not None:
+                assert json.loads(msg["text"])["isFinal"] is True
+                break
+            chunks.append(np.frombuffer(msg["bytes"], dtype=np.int16))
+
+        assert len(chunks) == 3
+        assert sum(len(c) for c in chunks) == 7200
+
+
+def test_websocket_fixed_frames(client):
+    with client.websocket_connect(
+        "/v1/text-to-speech/test_voice/stream-input?model_id=fake&binary=true&frame_ms=40"
+    ) as ws:
+        ws.send_text(json.dumps({"text": " "}))
+        ws.send_text(json.dumps({"text": "hello world"}))
+        ws.send_text(json.dumps({"text": ""}))
+
+        sizes = []
+        while True:
+            msg = ws.receive()
+            if msg.get("text") is not None:
+                break
+            sizes.append(len(msg["bytes"]))
+
+        # 7200 samples in 960-sample (40 ms) frames, whatever the engine's chunking.
+        assert sizes == [1920] * 7 + [14400 - 7 * 1920]
+
+
+def test_websocket_wav_header_once_per_stream(client):
+    with client.websocket_connect(
+        "/v1/text-to-speech/test_voice/stream-input?model_id=fake&binary=true"
+        "&output_format=wav_24000"
+    ) as ws:
+        ws.send_text(json.dumps({"text": " "}))
+        ws.send_text(json.dumps({"text": "First sentence. "}))
+        ws.send_text(json.dumps({"text": "Second sentence. "}))
+        ws.send_text(json.dumps({"text": "Third one"}))
+        ws.send_text(json.dumps({"text": ""}))
+
+        data = b""
+        while True:
+            msg = ws.receive()
+            if msg.get("text") is not None:
+                assert json.loads(msg["text"])["isFinal"] is True
+                break
+            data += msg["bytes"]
+
+    # Three generations, one continuous WAV stream.
+    assert data.count(b"RIFF") == 1
+    assert data.startswith(b"RIFF")
+    assert len(data) == 44 + 3 * 14400
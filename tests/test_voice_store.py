@@ -0,0 +1,169 @@
+"""Tests for the on-disk voice state store and Pocket custom voices."""
+
+import pickle
+
+import pytest
+
+from local_tts.engines.base import PocketOptions
+from local_tts.engines.voice_store import VoiceStateStore
+
+
+def _pickle_save(state, path):
+    with open(path, "wb") as f:
+        pickle.dump(state, f)
+
+
+def _pickle_load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _store(root, max_entries=4):
+    return VoiceStateStore(root, max_entries, save=_pickle_save, load=_pickle_load)
+
+
+def test_store_persists_computed_states(tmp_path):
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return {"kv": [1, 2, 3]}
+
+    store = _store(str(tmp_path))
+    assert store.get("builtin/alba", compute) == {"kv": [1, 2, 3]}
+    assert store.get("builtin/alba", compute) == {"kv": [1, 2, 3]}
+    assert len(computed) == 1
+
+    # A fresh store (i.e. after a restart) loads from disk.
+    store = _store(str(tmp_path))
+    assert store.get("builtin/alba", compute) == {"kv": [1, 2, 3]}
+    assert len(computed) == 1
+    assert store.stats()["loaded"] == 1
+
+
+def test_store_memory_bound_and_unpersisted_keys(tmp_path):
+    store = _store(str(tmp_path), max_entries=1)
+    store.get("builtin/a", lambda: "a")
+    store.get("prompt/b", lambda: "b", persist=False)
+    assert store.stats()["evictions"] == 1
+    assert not (tmp_path / "prompt").exists()
+    # Evicted from memory, still on disk.
+    assert store.get("builtin/a") == "a"
+    with pytest.raises(KeyError):
+        store.get("custom/missing")
+
+
+def test_store_put_and_keys(tmp_path):
+    store = _store(str(tmp_path))
+    store.put("custom/narrator", "state")
+    assert store.keys("custom") == ["narrator"]
+    assert _store(str(tmp_path)).get("custom/narrator") == "state"
+
+    memory_only = _store(None, max_entries=1)
+    memory_only.put("custom/narrator", "state")
+    memory_only.get("builtin/a", lambda: "a")
+    memory_only.get("builtin/b", lambda: "b")
+    # Custom voices can't be recomputed, so they are never evicted.
+    assert memory_only.get("custom/narrator") == "state"
+    assert memory_only.keys("custom") == ["narrator"]
+
+
+class FakePocketModel:
+    def __init__(self):
+        self.prompts = []
+
+    def get_state_for_audio_prompt(self, prompt):
+        if not isinstance(prompt, str) or prompt.endswith(".wav"):
+            with open(prompt, "rb") as f:
+                data = f.read()
+            if data == b"garbage":
+                raise RuntimeError("not audio")
+            self.prompts.append(data)
+        else:
+            self.prompts.append(prompt)
+        return {"prompt": self.prompts[-1]}
+
+
+def _pocket(tmp_path):
+    from local_tts.engines.pocket import PocketEngine
+
+    engine = PocketEngine(options=PocketOptions(voice_dir=str(tmp_path)))
+    engine._voice_states._save = _pickle_save
+    engine._voice_states._load = _pickle_load
+    engine._model = FakePocketModel()
+    return engine
+
+
+def test_pocket_add_voice(tmp_path):
+    engine = _pocket(tmp_path)
+    voice = engine.add_voice("narrator", b"RIFF....")
+    assert voice.id == "narrator"
+    assert "narrator" in [v.id for v in engine.list_voices()]
+    assert engine._get_voice_state("narrator") == {"prompt": b"RIFF...."}
+
+    with pytest.raises(ValueError, match="Invalid voice name"):
+        engine.add_voice("../etc", b"RIFF....")
+    with pytest.raises(ValueError, match="built-in"):
+        engine.add_voice("alba", b"RIFF....")
+    with pytest.raises(ValueError, match="voice prompt"):
+        engine.add_voice("bad", b"garbage")
+
+    # Custom voices and computed built-in states survive a restart.
+    engine._get_voice_state("alba")
+    engine = _pocket(tmp_path)
+    assert "narrator" in [v.id for v in engine.list_voices()]
+    assert engine._get_voice_state("narrator") == {"prompt": b"RIFF...."}
+    assert engine._get_voice_state("alba") == {"prompt": "alba"}
+    assert engine._model.prompts == []
+
+
+def test_add_voice_unsupported_model(client):
+    r = client.post("/v1/voices/add?name=narrator&model_id=fake", content=b"RIFF")
+    assert r.status_code == 400
+
+
+class VoiceEngine:
+    """Records which thread computed each voice."""
+
+    name = "voices"
+
+    def __init__(self):
+        from local_tts.engines.scheduler import InferenceScheduler
+
+        self.scheduler = InferenceScheduler("voices")
+        self.threads = []
+
+    def add_voice(self, name, audio):
+        import threading
+
+        from local_tts.engines.base import VoiceInfo
+
+        self.threads.append(threading.current_thread().name)
+        return VoiceInfo(id=name, name=name, language="en", gender="unknown")
+
+
+async def test_registry_add_voice_uses_scheduler_and_drops_cached_audio():
+    import numpy as np
+
+    from local_tts.engines.cache import CacheKey, get_audio_cache
+    from local_tts.engines.registry import EngineRegistry
+
+    registry = EngineRegistry()
+    engine = VoiceEngine()
+    registry.register(engine)
+    cache = get_audio_cache()
+    old_max = cache.max_bytes
+    cache.resize(1 << 20)
+    stale = CacheKey("voices", "", "narrator", 1.0, "Hello.")
+    other = CacheKey("voices", "", "alba", 1.0, "Hello.")
+    try:
+        cache.put(stale, [np.ones(10, dtype=np.int16)])
+        cache.put(other, [np.ones(10, dtype=np.int16)])
+        voice = await registry.add_voice("voices", "narrator", b"RIFF")
+        assert voice.id == "narrator"
+        assert engine.threads[0].startswith("tts-voices")
+        assert cache.get(stale) is None
+        assert cache.get(other) is not None
+    finally:
+        cache.clear()
+        cache.resize(old_max)